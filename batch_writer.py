@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Pipelined writer for the conversations_batch_*.txt review files.
+
+Each batch is formatted into a single in-memory buffer on a pool of worker
+threads while a dedicated I/O thread flushes already formatted batches to
+disk. The hand-off queue is bounded so at most a couple of finished batches
+wait in memory (double buffering) regardless of how many batches there are.
+
+write_changed_batches rebuilds incrementally instead: batch_manifest.json
+records a hash of each batch's inputs (its slice of the report, the source
+chats' size and mtime, the classifier version), and only batches whose hash
+changed, or whose file was rewritten by something else, are formatted again,
+on a process pool.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+BATCH_SIZE = 500
+FLUSH_QUEUE_DEPTH = 2
+BATCH_MANIFEST = 'batch_manifest.json'
+# Bump when format_batch's layout changes, so every batch is rebuilt once
+BATCH_FORMAT_VERSION = 1
+# The conversation fields format_batch prints
+HASHED_FIELDS = ('filename', 'quality_score', 'message_count', 'avg_message_length', 'has_questions', 'sampled')
+_STOP = object()
+
+
+def batch_file_name(batch_num):
+    return f'conversations_batch_{batch_num:02d}.txt'
+
+
+def format_batch(batch_num, start_index, batch, format_messages, metrics=None):
+    """Format one batch (header, legend and every conversation) into a string"""
+    parts = [
+        f"=== BATCH {batch_num} - TOP QUALITY WHATSAPP CONVERSATIONS ===\n",
+        f"Total conversations in this batch: {len(batch)}\n",
+        f"Quality score range: {batch[-1]['quality_score']} - {batch[0]['quality_score']}\n",
+        "\nCLASSIFICATION LEGEND:\n",
+        "• agent: Staff members (Rona, Soha, Modi, Sarah Call Center, etc.)\n",
+        "• guest: Customer/client messages\n",
+        "• template: Automated template messages (booking confirmations, etc.)\n",
+        "• bot: Automated bot responses\n\n",
+    ]
+
+    for j, conv in enumerate(batch, 1):
+        parts.append(
+            f"\n{'='*80}\n"
+            f"CONVERSATION {start_index + j} - File: {conv['filename']}\n"
+            f"Quality Score: {conv['quality_score']}\n"
+            f"Messages: {conv['message_count']}, "
+            f"Avg Length: {conv['avg_message_length']:.1f}, "
+            f"Questions: {conv['has_questions']}"
+            f"{', Sampled: True' if conv.get('sampled') else ''}\n"
+            f"{'='*80}\n"
+        )
+        started = time.perf_counter()
+        formatted_messages = format_messages(conv['file_path'])
+        if metrics is not None:
+            metrics.add('format', time.perf_counter() - started)
+        if formatted_messages:
+            parts.append('\n'.join(formatted_messages))
+            parts.append('\n')
+        parts.append('\n')
+
+    return ''.join(parts)
+
+
+def _flush_batches(flush_queue, errors, metrics):
+    """I/O thread: write formatted buffers until the stop marker arrives"""
+    while True:
+        item = flush_queue.get()
+        if item is _STOP:
+            return
+        batch_file, buffer = item
+        started = time.perf_counter()
+        try:
+            with open(batch_file, 'w', encoding='utf-8') as f:
+                f.write(buffer)
+        except Exception as e:
+            errors.append((batch_file, e))
+        if metrics is not None:
+            metrics.add('write', time.perf_counter() - started)
+
+
+def write_review_batches(conversations, output_dir, format_messages, batch_size=BATCH_SIZE, workers=4,
+                         metrics=None):
+    """Write conversations_batch_NN.txt files, formatting batches in parallel.
+
+    conversations is a ranked list of dicts with filename, file_path,
+    quality_score, message_count, avg_message_length and has_questions.
+    format_messages(file_path) returns the formatted message lines.
+    metrics, a run_metrics.RunMetrics, collects format and write timings.
+    Returns the number of batch files written.
+    """
+    output_path = Path(output_dir)
+    flush_queue = queue.Queue(maxsize=FLUSH_QUEUE_DEPTH)
+    errors = []
+    writer = threading.Thread(target=_flush_batches, args=(flush_queue, errors, metrics), daemon=True)
+    writer.start()
+
+    def build(batch_num, start_index):
+        batch = conversations[start_index:start_index + batch_size]
+        buffer = format_batch(batch_num, start_index, batch, format_messages, metrics)
+        # Blocks while the I/O thread is still busy with earlier batches
+        flush_queue.put((output_path / batch_file_name(batch_num), buffer))
+        return batch_num
+
+    batch_count = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [
+                executor.submit(build, batch_num, start_index)
+                for batch_num, start_index in enumerate(range(0, len(conversations), batch_size), 1)
+            ]
+            for future in futures:
+                print(f"Formatted batch {future.result()}...")
+                batch_count += 1
+    finally:
+        flush_queue.put(_STOP)
+        writer.join()
+
+    if errors:
+        batch_file, error = errors[0]
+        raise IOError(f"Failed to write {batch_file}: {error}")
+
+    return batch_count
+
+
+
+def batch_input_hash(start_index, batch, source_stamps, classifier_version):
+    """sha1 of everything a batch file is built from"""
+    inputs = [BATCH_FORMAT_VERSION, classifier_version, start_index]
+    for conv, stamp in zip(batch, source_stamps):
+        inputs.append([conv.get(field) for field in HASHED_FIELDS] + [stamp])
+    return hashlib.sha1(json.dumps(inputs, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_batch_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / BATCH_MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_batch_manifest(output_dir, manifest):
+    path = Path(output_dir) / BATCH_MANIFEST
+    partial = path.with_name(path.name + '.part')
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(partial, path)
+
+
+def _write_batch(batch_file, batch_num, start_index, batch, format_messages):
+    """Process pool task: format one batch and replace its file atomically"""
+    buffer = format_batch(batch_num, start_index, batch, format_messages)
+    partial = Path(str(batch_file) + '.part')
+    with open(partial, 'w', encoding='utf-8') as f:
+        f.write(buffer)
+    os.replace(partial, batch_file)
+    return batch_num
+
+
+def write_changed_batches(conversations, output_dir, format_messages, source_stamp, classifier_version,
+                          batch_size=BATCH_SIZE, workers=None, initializer=None, initargs=(), full=False):
+    """Rebuild only the conversations_batch_NN.txt files whose inputs changed.
+
+    conversations and format_messages are as for write_review_batches, but
+    format_messages has to be a picklable module-level function, since it
+    runs in worker processes; initializer(*initargs) sets up each worker
+    (e.g. opens a chat store). source_stamp(conv) returns a JSON-serializable
+    fingerprint of the chat's source, such as its size and mtime.
+    full=True rebuilds every batch. Batch files left over from a longer
+    report are removed, with or without full, as long as the manifest still
+    lists them unchanged. Returns (batches written, batches left in place).
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    previous = load_batch_manifest(output_path)
+    manifest = {}
+    planned = set()
+    changed = []
+    for batch_num, start_index in enumerate(range(0, len(conversations), batch_size), 1):
+        batch = conversations[start_index:start_index + batch_size]
+        name = batch_file_name(batch_num)
+        planned.add(name)
+        input_hash = batch_input_hash(start_index, batch, [source_stamp(conv) for conv in batch],
+                                      classifier_version)
+        entry = previous.get(name)
+        # The file stamp catches batch files rewritten since, e.g. by a full organizer run
+        if not full and entry and entry['inputs'] == input_hash and entry['file'] == _file_stamp(output_path / name):
+            manifest[name] = entry
+        else:
+            changed.append((name, batch_num, start_index, batch, input_hash))
+
+    try:
+        if changed:
+            with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(changed)),
+                                     initializer=initializer, initargs=initargs) as executor:
+                futures = {
+                    executor.submit(_write_batch, output_path / name, batch_num, start_index, batch,
+                                    format_messages): (name, input_hash)
+                    for name, batch_num, start_index, batch, input_hash in changed
+                }
+                for future, (name, input_hash) in futures.items():
+                    print(f"Formatted batch {future.result()}...")
+                    manifest[name] = {'inputs': input_hash, 'file': _file_stamp(output_path / name)}
+
+        for name, entry in previous.items():
+            stale = output_path / name
+            if name not in planned and entry['file'] == _file_stamp(stale):
+                stale.unlink()
+    finally:
+        # Record whatever was written even if a batch failed, so a rerun resumes from there
+        _save_batch_manifest(output_path, manifest)
+
+    return len(changed), len(planned) - len(changed)
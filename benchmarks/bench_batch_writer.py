@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing ten 500-conversation review batches.
+
+Compares the previous one-f.write-per-line loop against the pipelined
+batch_writer (worker threads format, a dedicated thread flushes).
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from batch_writer import BATCH_SIZE, write_review_batches
+from benchmarks.synthetic_corpus import generate_corpus
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+
+def legacy_write(conversations, output_dir, format_messages):
+    """The original sequential loop with many small writes"""
+    for batch_num, i in enumerate(range(0, len(conversations), BATCH_SIZE), 1):
+        batch = conversations[i:i + BATCH_SIZE]
+        with open(Path(output_dir) / f'conversations_batch_{batch_num:02d}.txt', 'w', encoding='utf-8') as f:
+            f.write(f"=== BATCH {batch_num} - TOP QUALITY WHATSAPP CONVERSATIONS ===\n")
+            for j, conv in enumerate(batch, 1):
+                f.write(f"\n{'='*80}\n")
+                f.write(f"CONVERSATION {i + j} - File: {conv['filename']}\n")
+                f.write(f"Quality Score: {conv['quality_score']}\n")
+                f.write(f"Messages: {conv['message_count']}, ")
+                f.write(f"Avg Length: {conv['avg_message_length']:.1f}, ")
+                f.write(f"Questions: {conv['has_questions']}\n")
+                f.write(f"{'='*80}\n")
+                for message in format_messages(conv['file_path']):
+                    f.write(f"{message}\n")
+                f.write("\n")
+
+
+def main(conversation_count=5000, workers=4):
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        paths = generate_corpus(chat_dir, conversation_count)
+        analyzer = ConversationAnalyzer(chat_dir)
+        entries = [{
+            'filename': path.name,
+            'file_path': path,
+            'quality_score': 100,
+            'message_count': 10,
+            'avg_message_length': 42.0,
+            'has_questions': True
+        } for path in paths]
+
+        results = {}
+        for name, run in [
+            ('legacy', lambda out: legacy_write(entries, out, analyzer.format_conversation_for_team)),
+            ('pipelined', lambda out: write_review_batches(entries, out, analyzer.format_conversation_for_team,
+                                                           workers=workers)),
+        ]:
+            out_dir = Path(tmp) / name
+            out_dir.mkdir()
+            start = time.perf_counter()
+            run(out_dir)
+            results[name] = time.perf_counter() - start
+
+    for name, seconds in results.items():
+        print(f"{name:>10}: {seconds:.3f}s for {conversation_count} conversations")
+    print(f"   speedup: {results['legacy'] / results['pipelined']:.2f}x")
+    return results
+
+
+if __name__ == '__main__':
+    main()
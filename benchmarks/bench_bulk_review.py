@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark review submission throughput: one /api/review request per decision
+against /api/review_bulk with batches of decisions.
+
+Each mode runs against a fresh database on a real server (start.py, waitress
+by default) so the HTTP round trip is included, which is the cost the bulk
+endpoint removes. The team_progress totals are checked after every run.
+
+Usage: python benchmarks/bench_bulk_review.py [--decisions 1000] [--batch-sizes 10,50,200] [--server waitress]
+"""
+import argparse
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_load import free_port, wait_until_up
+from benchmarks.bench_webapp import prepare_webapp
+from benchmarks.synthetic_corpus import generate_corpus
+
+REVIEWER = 'Bench'
+
+
+def post(base_url, path, payload):
+    request = urllib.request.Request(base_url + path, data=json.dumps(payload).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def pending_filenames(db_path, count):
+    """Filenames to review, taken from the database the server just created"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute(
+            "SELECT filename FROM conversations WHERE status = 'pending' LIMIT ?", (count,))]
+    finally:
+        conn.close()
+
+
+def run_mode(webapp_dir, server, decisions, batch_size):
+    """Submit `decisions` reviews, one per request when batch_size is None"""
+    db_path = Path(webapp_dir) / 'conversations.db'
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{db_path}{suffix}').unlink(missing_ok=True)
+
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    process = subprocess.Popen(
+        [sys.executable, 'start.py', '--server', server, '--host', '127.0.0.1', '--port', str(port), '--no-browser'],
+        cwd=webapp_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(base_url, process)
+        filenames = pending_filenames(db_path, decisions)
+        reviews = [{'filename': name, 'accepted': i % 5 == 0} for i, name in enumerate(filenames)]
+
+        started = time.perf_counter()
+        if batch_size is None:
+            for review in reviews:
+                post(base_url, '/api/review', dict(review, reviewer=REVIEWER))
+        else:
+            for i in range(0, len(reviews), batch_size):
+                result = post(base_url, '/api/review_bulk', {'reviewer': REVIEWER, 'reviews': reviews[i:i + batch_size]})
+                assert result['status'] == 'success', result
+        elapsed = time.perf_counter() - started
+
+        with urllib.request.urlopen(base_url + '/api/progress', timeout=60) as response:
+            progress = {row['reviewer']: row for row in json.loads(response.read())['team_stats']}
+    finally:
+        process.terminate()
+        process.wait()
+
+    expected_accepted = sum(1 for review in reviews if review['accepted'])
+    totals = progress.get(REVIEWER, {})
+    consistent = (totals.get('total_reviewed') == len(reviews) and totals.get('accepted') == expected_accepted
+                  and totals.get('rejected') == len(reviews) - expected_accepted)
+    return {
+        'decisions': len(reviews),
+        'seconds': elapsed,
+        'decisions_per_sec': len(reviews) / elapsed,
+        'progress_consistent': consistent,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark single vs bulk review submission")
+    parser.add_argument('--decisions', type=int, default=1000)
+    parser.add_argument('--batch-sizes', default='10,50,200')
+    parser.add_argument('--server', default='waitress', choices=('dev', 'waitress', 'gunicorn'))
+    args = parser.parse_args(argv)
+
+    modes = [('single', None)] + [(f'bulk x{size}', int(size)) for size in args.batch_sizes.split(',')]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        generate_corpus(chat_dir, args.decisions, arabic_ratio=0.6, template_ratio=0.1)
+        webapp_dir = prepare_webapp(tmp, chat_dir, args.decisions)
+
+        for name, batch_size in modes:
+            results[name] = result = run_mode(webapp_dir, args.server, args.decisions, batch_size)
+            check = '✅' if result['progress_consistent'] else '❌ team_progress mismatch'
+            print(f"{name:>10}: {result['decisions_per_sec']:8.1f} decisions/s "
+                  f"({result['decisions']} in {result['seconds']:.2f}s) {check}")
+
+    single = results['single']['decisions_per_sec']
+    for name, result in results.items():
+        if name != 'single':
+            print(f"{name:>10}: {result['decisions_per_sec'] / single:.1f}x single-request throughput")
+    return results
+
+
+if __name__ == '__main__':
+    main()
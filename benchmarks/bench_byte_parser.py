@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bytes-mode parser against the text-mode one.
+
+Scans the same synthetic corpus serially with --parser text and --parser
+bytes, once mostly Arabic and once mostly English (ASCII messages skip
+decoding entirely), and reports scan throughput. Every file's features must
+be identical between the two parsers; the script exits with status 1 if any
+differ.
+
+Usage: python benchmarks/bench_byte_parser.py [--files 5000] [--repeat 3]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+CORPORA = (('arabic', 0.8), ('english', 0.2))
+
+
+def scan(chat_dir, parser):
+    analyzer = ConversationAnalyzer(chat_dir, parser=parser)
+    started = time.perf_counter()
+    analyzer.scan_all_conversations(workers=1)
+    return time.perf_counter() - started, analyzer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark bytes-mode against text-mode chat parsing")
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, arabic_ratio in CORPORA:
+            chat_dir = Path(tmp) / name
+            generate_corpus(chat_dir, args.files, arabic_ratio=arabic_ratio, template_ratio=0.1,
+                            multiline_ratio=0.1)
+            megabytes = sum(path.stat().st_size for path in chat_dir.iterdir()) / 1e6
+            text = min((scan(chat_dir, 'text') for _ in range(args.repeat)), key=lambda result: result[0])
+            raw = min((scan(chat_dir, 'bytes') for _ in range(args.repeat)), key=lambda result: result[0])
+            text_features = {record['filename']: record['features'] for record in text[1].features}
+            byte_features = {record['filename']: record['features'] for record in raw[1].features}
+            results.append((name, megabytes, text[0], raw[0], text_features == byte_features))
+
+    print()
+    ok = True
+    for name, megabytes, text_seconds, byte_seconds, identical in results:
+        print(f"{name:>8}   text: {text_seconds:6.2f}s ({args.files / text_seconds:,.0f} files/s, "
+              f"{megabytes / text_seconds:.1f} MB/s)")
+        print(f"{'':>8}  bytes: {byte_seconds:6.2f}s ({args.files / byte_seconds:,.0f} files/s, "
+              f"{megabytes / byte_seconds:.1f} MB/s) {text_seconds / byte_seconds:.2f}x")
+        if not identical:
+            ok = False
+            print(f"❌ {name}: features differ between the parsers")
+    if ok:
+        print("✅ Features identical for every file")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
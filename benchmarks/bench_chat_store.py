@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the packed chat store against the loose one-.txt-per-chat layout.
+
+Reports disk footprint, cold random-read latency (page cache dropped with
+posix_fadvise before each pass) and full-scan throughput.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from webapp.chat_store import ChatStore, pack_chat_directory
+
+
+def disk_usage(paths):
+    return sum(os.stat(path).st_blocks * 512 for path in paths)
+
+
+def drop_cache(paths):
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def read_loose(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def main(file_count=20000, samples=500):
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        store_dir = Path(tmp) / 'chat_store'
+        loose_paths = generate_corpus(chat_dir, file_count)
+        pack_chat_directory(chat_dir, store_dir)
+        store_paths = list(store_dir.iterdir())
+        sample_names = random.Random(7).sample([p.name for p in loose_paths], samples)
+
+        results = {'loose': {}, 'packed': {}}
+        results['loose']['disk_mb'] = disk_usage(loose_paths) / 1e6
+        results['packed']['disk_mb'] = disk_usage(store_paths) / 1e6
+
+        with ChatStore(store_dir) as store:
+            readers = {
+                'loose': lambda name: read_loose(chat_dir / name),
+                'packed': store.read_text,
+            }
+            cache_files = {'loose': loose_paths, 'packed': store_paths}
+
+            for layout, read in readers.items():
+                drop_cache(cache_files[layout])
+                latencies = []
+                for name in sample_names:
+                    start = time.perf_counter()
+                    read(name)
+                    latencies.append(time.perf_counter() - start)
+                results[layout]['cold_read_ms'] = statistics.median(latencies) * 1000
+
+                drop_cache(cache_files[layout])
+                start = time.perf_counter()
+                scanned = sum(len(read(path.name)) for path in loose_paths)
+                elapsed = time.perf_counter() - start
+                results[layout]['scan_files_per_sec'] = file_count / elapsed
+                results[layout]['scan_mb_per_sec'] = scanned / elapsed / 1e6
+
+    for layout, result in results.items():
+        print(f"{layout:>7}: {result['disk_mb']:.1f} MB on disk, cold read median {result['cold_read_ms']:.3f} ms, "
+              f"full scan {result['scan_files_per_sec']:.0f} files/sec ({result['scan_mb_per_sec']:.1f} MB/sec)")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark the windowed conversation view on one very long conversation.
+
+Opens a 5,000-message conversation in a disposable webapp copy, in a
+subprocess with Flask's test client:
+
+- the whole conversation rendered at once (/conversation/<f>?all=1, as the
+  page always did) against the first window only, which is what the browser
+  has to fetch and lay out before it can paint: response bytes, server time
+  and message cards;
+- the time to fetch every later window from /api/messages as a reviewer
+  scrolling to the end would;
+- saving an edit of a few messages: the request body of the old full
+  /api/save_edits against the /api/edit_messages changes, and the
+  /api/find_replace response with every message against only the changed ones.
+
+It also checks that the windows add up to the whole conversation and that
+saving the changes gives the same conversation as saving it in full; the
+script exits with status 1 if either does not hold.
+
+Usage: python benchmarks/bench_conversation_window.py [--messages 5000] [--rounds 20]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_webapp import prepare_webapp
+from benchmarks.synthetic_corpus import generate_corpus
+
+CLIENT = '''
+import contextlib, io, json, os, statistics, sys, time
+os.chdir({webapp!r})
+sys.path.insert(0, {webapp!r})
+with contextlib.redirect_stdout(io.StringIO()):
+    import app as webapp
+    client = webapp.app.test_client()
+    filename = {filename!r}
+
+    def timed(method, url, **kwargs):
+        times = []
+        for _ in range({rounds}):
+            started = time.perf_counter()
+            response = getattr(client, method)(url, **kwargs)
+            times.append(time.perf_counter() - started)
+        return response, statistics.median(times)
+
+    def page(url):
+        response, seconds = timed('get', url)
+        html = response.get_data(as_text=True)
+        return {{'bytes': len(response.get_data()), 'ms': seconds * 1000, 'cards': html.count('data-base-role=')}}
+
+    full = page(f'/conversation/{{filename}}?all=1')
+    first = page(f'/conversation/{{filename}}')
+
+    # Every later window, as scrolling to the end fetches them
+    started = time.perf_counter()
+    start, loaded, window_bytes = 0, [], 0
+    while True:
+        response = client.get(f'/api/messages/{{filename}}', query_string={{'start': start, 'limit': webapp.MESSAGE_WINDOW}})
+        window_bytes += len(response.get_data())
+        data = response.get_json()
+        loaded.extend(data['messages'])
+        start = data['end']
+        if start >= data['total']:
+            break
+    windows = {{'ms': (time.perf_counter() - started) * 1000, 'bytes': window_bytes}}
+    messages = webapp.conv_manager.get_conversation_content(filename)
+    windows_ok = loaded == messages
+
+    # A typical edit: three roles fixed, one text corrected, one message removed, one moved, one added
+    edited = [dict(message) for message in messages]
+    for i in (10, 2000, 4500):
+        edited[i]['role'] = 'agent'
+    edited[50]['text'] = edited[50]['actual_message'] = 'Corrected text'
+    moved = edited.pop(300)
+    edited.insert(5, moved)
+    del edited[4000]
+    new_id = max(message['id'] for message in messages) + 1
+    edited.append({{'id': new_id, 'role': 'agent', 'text': 'Added', 'actual_message': 'Added', 'timestamp': 'now'}})
+    changes = [{{'op': 'remove', 'id': messages[4000]['id']}},
+               {{'op': 'place', 'id': moved['id'], 'after': edited[4]['id']}}]
+    changes += [{{'op': 'update', 'id': messages[i]['id'], 'role': 'agent'}} for i in (10, 2000, 4500)]
+    changes += [{{'op': 'update', 'id': messages[50]['id'], 'text': 'Corrected text'}},
+                {{'op': 'place', 'id': new_id, 'after': edited[-2]['id'], 'role': 'agent', 'text': 'Added',
+                  'timestamp': 'now'}}]
+
+    # The old page sent every message it showed
+    full_body = json.dumps({{'filename': filename, 'corrected_messages': [
+        {{'id': m['id'], 'role': m['role'], 'text': m['text'], 'actual_message': m['text'], 'order': index,
+         'timestamp': m['timestamp']}} for index, m in enumerate(edited)]}})
+    changes_body = json.dumps({{'filename': filename, 'version': 0, 'changes': changes}})
+    response = client.post('/api/edit_messages', data=changes_body, content_type='application/json')
+    saved = response.get_json()
+    current = webapp.conv_manager.get_current_messages(filename)[0]
+    edit_ok = saved['status'] == 'success' and current == edited and saved['total'] == len(edited)
+
+    find_response = client.post('/api/find_replace', json={{'filename': filename, 'find_text': 'Corrected text',
+                                                             'replace_text': 'Fixed text'}})
+    find_replace = {{'bytes': len(find_response.get_data()), 'all_bytes': len(json.dumps(
+        {{'status': 'success', 'replaced_count': 1, 'updated_messages': current}}))}}
+
+print(json.dumps({{'full': full, 'first': first, 'windows': windows, 'windows_ok': windows_ok,
+                  'edit_ok': edit_ok, 'full_body': len(full_body), 'changes_body': len(changes_body),
+                  'find_replace': find_replace, 'window': webapp.MESSAGE_WINDOW}}))
+'''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the windowed conversation view")
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        paths = generate_corpus(chat_dir, 1, message_counts=[args.messages], arabic_ratio=0.6, template_ratio=0.1)
+        webapp_dir = prepare_webapp(tmp, chat_dir, 1)
+        script = CLIENT.format(webapp=str(webapp_dir), filename=paths[0].name, rounds=args.rounds)
+        output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+
+    kb = 1024
+    full, first, windows = results['full'], results['first'], results['windows']
+    print()
+    print(f"{args.messages}-message conversation, {results['window']} messages per window")
+    print(f"   whole page: {full['bytes'] / kb:8.1f} KB, {full['ms']:7.1f} ms to render, {full['cards']} message cards")
+    print(f" first window: {first['bytes'] / kb:8.1f} KB, {first['ms']:7.1f} ms to render, {first['cards']} message cards "
+          f"({full['bytes'] / first['bytes']:.0f}x smaller)")
+    print(f"  all windows: {windows['bytes'] / kb:8.1f} KB of JSON in {windows['ms']:.0f} ms")
+    print(f"    edit body: {results['changes_body']} B of changes vs {results['full_body'] / kb:.1f} KB "
+          f"for the whole conversation")
+    find_replace = results['find_replace']
+    print(f" find/replace: {find_replace['bytes']} B response vs {find_replace['all_bytes'] / kb:.1f} KB "
+          f"with every message")
+    ok = results['windows_ok'] and results['edit_ok']
+    if not results['windows_ok']:
+        print("❌ The windows do not add up to the whole conversation")
+    if not results['edit_ok']:
+        print("❌ Saving the changes did not give the edited conversation")
+    if ok:
+        print("✅ Windows add up to the conversation and saved changes match a full save")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
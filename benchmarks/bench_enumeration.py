@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark directory enumeration: list(Path.glob("*.txt")) vs fs_scan.
+
+Usage: python benchmarks/bench_enumeration.py [file_count]   (default 1,000,000)
+Files are created empty apart from a size-varying payload on every 100th one.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from webapp.fs_scan import count_files, iter_files, largest_first
+
+
+def populate(directory, file_count):
+    for i in range(file_count):
+        with open(os.path.join(directory, f"9665{i:08d}.txt"), 'wb') as f:
+            if i % 100 == 0:
+                f.write(b'x' * (i % 4096))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(file_count=1000000):
+    with tempfile.TemporaryDirectory() as tmp:
+        populate(tmp, file_count)
+        results = {
+            'glob list + len': timed(lambda: len(list(Path(tmp).glob("*.txt")))),
+            'scandir count': timed(lambda: count_files(tmp)),
+            'scandir + size sort': timed(lambda: len(largest_first(iter_files(tmp)))),
+            'glob + stat + size sort': timed(lambda: len(sorted(Path(tmp).glob("*.txt"),
+                                                                key=lambda p: p.stat().st_size, reverse=True))),
+        }
+
+    for name, (seconds, count) in results.items():
+        print(f"{name:>24}: {seconds:.3f}s ({count} files)")
+    return results
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
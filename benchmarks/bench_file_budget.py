@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-file budget on a corpus with a few huge group chats.
+
+Scans the same corpus three ways, serially:
+
+- unbudgeted: every message of every chat is parsed;
+- sampled: the default FileBudget, so the huge chats are scored from a
+  stratified message sample;
+- time limit: no sampling but a short per-file time limit, so the huge chats
+  are logged and skipped.
+
+It prints the wall time and the slowest file for each, checks that the
+ordinary chats get exactly the same features in every mode, and shows how
+far the sampled scores and features of the huge chats are from the full ones.
+
+Usage: python benchmarks/bench_file_budget.py [--files 2000] [--huge 3] [--huge-messages 200000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from file_budget import FileBudget
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+COMPARED_FEATURES = ('message_count', 'avg_message_length', 'question_count', 'template_ratio',
+                     'unique_content_ratio', 'time_span_hours')
+
+
+def scan(chat_dir, budget):
+    analyzer = ConversationAnalyzer(chat_dir, budget=budget)
+    started = time.perf_counter()
+    analyzer.scan_all_conversations(workers=1)
+    elapsed = time.perf_counter() - started
+    slowest = analyzer.metrics.to_dict()['slowest_files'][0]['seconds']
+    features = {record['filename']: record['features'] for record in analyzer.features}
+    return elapsed, slowest, features, analyzer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark message sampling and the per-file time limit")
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--huge', type=int, default=3)
+    parser.add_argument('--huge-messages', type=int, default=200000)
+    parser.add_argument('--sample-messages', type=int, default=5000)
+    parser.add_argument('--time-limit', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    modes = {
+        'unbudgeted': FileBudget(max_bytes=0, max_messages=0, time_limit=0),
+        'sampled': FileBudget(sample_messages=args.sample_messages),
+        'time limit': FileBudget(max_bytes=0, max_messages=0, time_limit=args.time_limit),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        generate_corpus(chat_dir, args.files, arabic_ratio=0.6, template_ratio=0.1)
+        huge = {path.name for path in generate_corpus(chat_dir, args.huge, seed=2,
+                                                      message_counts=(args.huge_messages,),
+                                                      arabic_ratio=0.6, template_ratio=0.1,
+                                                      multiline_ratio=0.05)}
+        results = {name: scan(chat_dir, budget) for name, budget in modes.items()}
+
+    print()
+    for name, (elapsed, slowest, features, analyzer) in results.items():
+        counters = analyzer.metrics.counters
+        print(f"{name:>11}: {elapsed:6.2f}s, slowest file {slowest:6.2f}s, "
+              f"{counters.get('files_sampled', 0)} sampled, {counters.get('files_timed_out', 0)} timed out")
+
+    _, _, full, full_analyzer = results['unbudgeted']
+    ok = True
+    for name, (_, _, features, _) in results.items():
+        ordinary = {filename for filename in full if filename not in huge}
+        differing = [filename for filename in ordinary if features.get(filename) != full[filename]]
+        if differing:
+            ok = False
+            print(f"❌ {name}: {len(differing)} ordinary chats got different features")
+    skipped = huge & set(results['time limit'][2])
+    if skipped:
+        ok = False
+        print(f"❌ time limit: {len(skipped)} huge chats were not skipped")
+
+    sampled_analyzer = results['sampled'][3]
+    sampled = results['sampled'][2]
+    print(f"\nHuge chats, full vs sampled ({args.sample_messages} messages):")
+    for filename in sorted(huge):
+        full_score = full_analyzer.score_features(full[filename])[0]
+        sampled_score = sampled_analyzer.score_features(sampled[filename])[0]
+        deltas = ', '.join(f"{key} {full[filename][key] or 0:.3g}->{sampled[filename][key] or 0:.3g}"
+                           for key in COMPARED_FEATURES)
+        print(f"  {filename}: score {full_score} -> {sampled_score}; {deltas}")
+
+    unbudgeted_seconds = results['unbudgeted'][0]
+    print(f"\n    speedup: {unbudgeted_seconds / results['sampled'][0]:.2f}x sampled, "
+          f"{unbudgeted_seconds / results['time limit'][0]:.2f}x with the time limit")
+    if ok:
+        print("✅ Ordinary chats identical in every mode, huge chats skipped under the time limit")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
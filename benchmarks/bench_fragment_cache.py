@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark the rendered message card cache on conversation views.
+
+In a disposable webapp copy with a 5,000-message conversation and a few
+hundred ordinary ones, a subprocess times each view with Flask's test client
+(no If-None-Match, so every request renders a page):
+
+- the long conversation's first window and whole page (?all=1);
+- the first window of every ordinary conversation.
+
+Each view is timed on the first request, which renders the cards and caches
+them, and then on the following requests, which reuse the cached cards. The
+script then prints the fragment cache lines of /metrics.
+
+It also checks four things:
+- cached pages are byte-identical to freshly rendered ones;
+- an edit shows on the next view;
+- a small cache (--small-mb) stays within its bound;
+- every page is still right after the small cache has evicted entries.
+
+It exits with status 1 if any check fails.
+
+Usage: python benchmarks/bench_fragment_cache.py [--files 300] [--messages 5000] [--rounds 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_webapp import prepare_webapp
+from benchmarks.synthetic_corpus import generate_corpus
+
+CLIENT = '''
+import contextlib, io, json, os, statistics, sys, time
+os.chdir({webapp!r})
+sys.path.insert(0, {webapp!r})
+with contextlib.redirect_stdout(io.StringIO()):
+    import app as webapp
+    client = webapp.app.test_client()
+    with open(os.path.join(webapp.DATA_DIR, 'quality_analysis_report.json'), encoding='utf-8') as f:
+        filenames = [row['filename'] for row in json.load(f)]
+    long_name = {long_name!r}
+    others = [name for name in filenames if name != long_name]
+    failures = []
+    # Parsed ahead, so the first view of each times rendering rather than parsing
+    for name in filenames:
+        webapp.conv_manager.get_conversation_content(name)
+
+    def view(url):
+        started = time.perf_counter()
+        html = client.get(url).get_data()
+        return html, (time.perf_counter() - started) * 1000
+
+    def uncached(url):
+        webapp.conv_manager.fragment_cache.invalidate(url.split('/')[2].split('?')[0])
+        return client.get(url).get_data()
+
+    results = {{}}
+    for name, urls in [('long conversation, first window', [f'/conversation/{{long_name}}']),
+                       ('long conversation, all messages', [f'/conversation/{{long_name}}?all=1']),
+                       ('ordinary conversations', [f'/conversation/{{name}}' for name in others])]:
+        first = [view(url) for url in urls]
+        again = [view(url) for _ in range({rounds}) for url in urls]
+        results[name] = {{'miss_ms': statistics.median(ms for _, ms in first),
+                         'hit_ms': statistics.median(ms for _, ms in again)}}
+        for url, (html, _) in zip(urls, first):
+            if client.get(url).get_data() != html or uncached(url) != html:
+                failures.append(f'{{url}}: cached page differs from a fresh render')
+
+    # An edit must show on the next view
+    client.post('/api/edit_messages', json={{'filename': long_name, 'version': 0,
+                                             'changes': [{{'op': 'update', 'id': 0, 'text': 'Edited by the bench'}}]}})
+    if b'Edited by the bench' not in client.get(f'/conversation/{{long_name}}').get_data():
+        failures.append('edit did not show on the next view')
+
+    cache = webapp.conv_manager.fragment_cache
+    if cache.size > cache.max_bytes:
+        failures.append(f'cache holds {{cache.size}} bytes, over its {{cache.max_bytes}} byte bound')
+    metrics = [line for line in client.get('/metrics').get_data(as_text=True).splitlines()
+               if 'fragment' in line]
+
+print(json.dumps({{'results': results, 'failures': failures, 'metrics': metrics,
+                  'size': cache.size, 'entries': len(cache), 'max_bytes': cache.max_bytes}}))
+'''
+
+
+def run(webapp_dir, long_name, rounds, cache_mb):
+    script = CLIENT.format(webapp=str(webapp_dir), long_name=long_name, rounds=rounds)
+    env = dict(os.environ, FRAGMENT_CACHE_MB=str(cache_mb))
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True,
+                            env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rendered message card cache")
+    parser.add_argument('--files', type=int, default=300)
+    parser.add_argument('--messages', type=int, default=5000, help="Messages in the long conversation")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--small-mb', type=int, default=2, help="Cache size for the bound check")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        generate_corpus(chat_dir, args.files, arabic_ratio=0.6, template_ratio=0.1)
+        long_chat, = generate_corpus(chat_dir, 1, seed=2, message_counts=[args.messages], arabic_ratio=0.6)
+        webapp_dir = prepare_webapp(tmp, chat_dir, args.files + 1)
+        results = run(webapp_dir, long_chat.name, args.rounds, 64)
+        (webapp_dir / 'conversations.db').unlink()
+        small = run(webapp_dir, long_chat.name, 1, args.small_mb)
+
+    print()
+    for name, times in results['results'].items():
+        print(f"{name:>32}: {times['miss_ms']:7.2f} ms rendering the cards, {times['hit_ms']:7.2f} ms from the cache "
+              f"({times['miss_ms'] / times['hit_ms']:.1f}x)")
+    print(f"cache after the run: {results['entries']} fragments, {results['size'] / 1024 / 1024:.1f} MB")
+    print(f"{args.small_mb} MB cache: {small['entries']} fragments, {small['size'] / 1024 / 1024:.2f} MB held")
+    print()
+    print('\n'.join(results['metrics']))
+    failures = results['failures'] + [f"{args.small_mb} MB cache: {failure}" for failure in small['failures']]
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Cached pages match fresh renders, edits show at once and the cache stays within its bound")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
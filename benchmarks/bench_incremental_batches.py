@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark incremental rebuilds of the review batch files in reformat_conversations.
+
+Scans a synthetic corpus into a quality report, runs reformat_conversations
+once to build every batch, then changes a little and runs it again:
+
+- no changes at all;
+- a few chats rewritten in place (their source mtime changes);
+- a few report entries swapped between two batches;
+- the report cut to a third and rebuilt with --full in the same directory,
+  which must remove the batch files past the new end.
+
+After each run the batch files must be byte-identical to a full rebuild of
+the same inputs in a separate directory; the script exits with status 1 if
+any differ.
+
+Usage: python benchmarks/bench_incremental_batches.py [--files 5000] [--changed 5]
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import reformat_conversations
+from benchmarks.synthetic_corpus import generate_corpus
+from webapp.columnar_report import REPORT_BIN, REPORT_JSON, write_columnar_report
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+
+def write_report(report_dir, rows):
+    with open(report_dir / REPORT_JSON, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    write_columnar_report(report_dir / REPORT_BIN, rows)
+
+
+def batch_files(directory):
+    return {path.name: path.read_bytes() for path in sorted(directory.glob('conversations_batch_*.txt'))}
+
+
+def reformat(report_dir, output_dir, chat_dir, full=False):
+    argv = ['--report-dir', str(report_dir), '--output-dir', str(output_dir), '--chat-dir', str(chat_dir)]
+    started = time.perf_counter()
+    reformat_conversations.main(argv + (['--full'] if full else []))
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark incremental review batch rebuilds")
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--changed', type=int, default=5, help="Chats rewritten and entries swapped per step")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    results = []
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        chat_dir = tmp / 'chats'
+        paths = generate_corpus(chat_dir, args.files, arabic_ratio=0.6, template_ratio=0.1)
+        analyzer = ConversationAnalyzer(chat_dir)
+        analyzer.scan_all_conversations()
+        report_dir = tmp / 'report'
+        report_dir.mkdir()
+        analyzer.save_top_conversations(report_dir, count=args.files, write_batches=False)
+        with open(report_dir / REPORT_JSON, encoding='utf-8') as f:
+            rows = json.load(f)
+        incremental_dir = tmp / 'incremental'
+
+        def step(name, full=False):
+            nonlocal ok
+            seconds = reformat(report_dir, incremental_dir, chat_dir, full=full)
+            full_dir = tmp / f'full-{len(results)}'
+            full_seconds = reformat(report_dir, full_dir, chat_dir, full=True)
+            identical = batch_files(incremental_dir) == batch_files(full_dir)
+            ok = ok and identical
+            results.append((name, seconds, full_seconds, identical))
+
+        reformat(report_dir, incremental_dir, chat_dir)
+        step('unchanged')
+
+        for path in rng.sample(paths, args.changed):
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write("[1/1/24, 09:00:00] Rona: Your booking is confirmed, anything else?\n")
+        step(f'{args.changed} chats rewritten')
+
+        for _ in range(args.changed):
+            i, j = rng.randrange(0, 500), rng.randrange(len(rows) - 500, len(rows))
+            rows[i], rows[j] = rows[j], rows[i]
+        write_report(report_dir, rows)
+        step(f'{args.changed} entries swapped')
+
+        write_report(report_dir, rows[:len(rows) // 3])
+        step('report cut, --full', full=True)
+
+    print()
+    for name, seconds, full_seconds, identical in results:
+        print(f"{name:>22}: incremental {seconds:6.2f}s, full rebuild {full_seconds:6.2f}s "
+              f"({full_seconds / seconds:.1f}x){'' if identical else '  ❌ output differs'}")
+    if ok:
+        print("✅ Output identical to a full rebuild in a fresh directory after every change")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
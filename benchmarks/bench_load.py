@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent reviewers against each way start.py can serve the app.
+
+Every server runs on a fresh copy of the database. Each simulated reviewer
+claims a batch by opening /review, then views and submits every
+conversation in it, and repeats. Errors include HTTP 5xx responses such as
+"database is locked"; duplicates are conversations submitted by more than
+one reviewer, which work claiming should keep at zero.
+
+The client is a thread pool in this process; on a machine with few cores it
+competes with the server for CPU, so compare servers on the same machine
+rather than reading the numbers as absolute capacity.
+
+Usage: python benchmarks/bench_load.py [--reviewers 50] [--duration 20] [--servers dev,waitress,gunicorn]
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_webapp import prepare_webapp
+from benchmarks.synthetic_corpus import generate_corpus
+
+CLAIMED_LINK = re.compile(r'href="/conversation/([^"]+)"')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(base_url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            urllib.request.urlopen(base_url + '/api/progress', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+def reviewer_loop(base_url, reviewer, stop_at, samples, errors, submitted):
+    """One simulated reviewer: claim a batch on /review, then view and submit each conversation"""
+    quoted = urllib.parse.quote(reviewer)
+    index = 0
+    while time.time() < stop_at:
+        start = time.perf_counter()
+        try:
+            page = urllib.request.urlopen(f'{base_url}/review?reviewer={quoted}', timeout=60).read().decode()
+        except (urllib.error.URLError, OSError) as e:
+            errors.append(('review page', str(e)))
+            continue
+        samples.append(('review page', time.perf_counter() - start))
+        batch = list(dict.fromkeys(CLAIMED_LINK.findall(page)))
+        if not batch:
+            return
+
+        for filename in batch:
+            if time.time() >= stop_at:
+                return
+            index += 1
+            body = json.dumps({'filename': filename, 'reviewer': reviewer, 'accepted': index % 4 != 0}).encode()
+            for kind, request in (
+                ('conversation', urllib.request.Request(f'{base_url}/conversation/{filename}')),
+                ('submit review', urllib.request.Request(f'{base_url}/api/review', data=body,
+                                                         headers={'Content-Type': 'application/json'})),
+            ):
+                start = time.perf_counter()
+                try:
+                    urllib.request.urlopen(request, timeout=60).read()
+                except (urllib.error.URLError, OSError) as e:
+                    errors.append((kind, str(e)))
+                    continue
+                samples.append((kind, time.perf_counter() - start))
+            submitted.append(filename)
+
+
+def run_load(webapp_dir, server, reviewers, duration, workers, threads):
+    db_path = Path(webapp_dir) / 'conversations.db'
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{db_path}{suffix}').unlink(missing_ok=True)
+
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    process = subprocess.Popen(
+        [sys.executable, 'start.py', '--server', server, '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--threads', str(threads), '--no-browser'],
+        cwd=webapp_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(base_url, process)
+        samples = []
+        errors = []
+        submitted = []
+        stop_at = time.time() + duration
+        started = time.perf_counter()
+        clients = [
+            threading.Thread(target=reviewer_loop, args=(base_url, f'Reviewer {i}', stop_at, samples, errors,
+                                                            submitted))
+            for i in range(reviewers)
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+    latencies = sorted(seconds for _, seconds in samples)
+    by_kind = {}
+    for kind, seconds in samples:
+        by_kind.setdefault(kind, []).append(seconds * 1000)
+    return {
+        'requests': len(samples),
+        'errors': len(errors),
+        'duplicates': len(submitted) - len(set(submitted)),
+        'requests_per_sec': len(samples) / elapsed,
+        'median_ms': statistics.median(latencies) * 1000 if latencies else 0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        'median_ms_by_request': {kind: statistics.median(values) for kind, values in by_kind.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the review app with concurrent reviewers")
+    parser.add_argument('--reviewers', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20, help="Seconds per server")
+    parser.add_argument('--conversations', type=int, default=5000)
+    parser.add_argument('--servers', default='dev,waitress,gunicorn')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        generate_corpus(chat_dir, args.conversations, arabic_ratio=0.6, template_ratio=0.1)
+        webapp_dir = prepare_webapp(tmp, chat_dir, args.conversations)
+
+        for server in args.servers.split(','):
+            print(f"\n🔥 {server}: {args.reviewers} reviewers for {args.duration:g}s...")
+            results[server] = result = run_load(webapp_dir, server, args.reviewers, args.duration,
+                                                args.workers, args.threads)
+            print(f"   {result['requests_per_sec']:.1f} req/s, median {result['median_ms']:.1f} ms, "
+                  f"p95 {result['p95_ms']:.1f} ms, {result['errors']} errors, {result['duplicates']} duplicate reviews "
+                  f"({result['requests']} requests)")
+            for kind, median_ms in result['median_ms_by_request'].items():
+                print(f"      {kind:>14}: median {median_ms:.1f} ms")
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
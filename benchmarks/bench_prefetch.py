@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark conversation view latency with and without queue prefetch.
+
+A simulated reviewer opens /review, then views and accepts each conversation
+of their claimed batch in order, pausing between views the way a person
+reads. With prefetch on, the app parses upcoming conversations on its
+background pool during those pauses. Each run starts from a fresh database. The chats are long (40-300 messages) so parsing dominates. The OS
+page cache is warm in both runs, so the gain on a cold disk is larger.
+
+Usage: python benchmarks/bench_prefetch.py [batches] [think_seconds]   (default 10 batches, 0.1 s)
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_webapp import prepare_webapp
+from benchmarks.synthetic_corpus import generate_corpus
+
+REVIEWER = '''
+import json, os, sys, time
+os.chdir({webapp!r})
+sys.path.insert(0, {webapp!r})
+import app as webapp
+
+client = webapp.app.test_client()
+samples = []
+for _ in range({batches}):
+    client.get('/review?reviewer=Bench').get_data()
+    # The reviewer's claimed batch, the same list the page shows
+    for conv in webapp.conv_manager.claim_conversations('Bench'):
+        time.sleep({think})
+        start = time.perf_counter()
+        response = client.get(f"/conversation/{{conv['filename']}}")
+        response.get_data()
+        samples.append((time.perf_counter() - start) * 1000)
+        client.post('/api/review', json={{'filename': conv['filename'], 'reviewer': 'Bench', 'accepted': True}})
+with open({results_path!r}, 'w') as f:
+    json.dump(samples, f)
+'''
+
+
+def measure(webapp_dir, batches, think, prefetch_ahead):
+    for suffix in ('', '-wal', '-shm'):
+        Path(webapp_dir, f'conversations.db{suffix}').unlink(missing_ok=True)
+    results_path = Path(webapp_dir) / 'prefetch_results.json'
+    script = REVIEWER.format(webapp=str(webapp_dir), batches=batches, think=think,
+                             results_path=str(results_path))
+    env = dict(os.environ, PREFETCH_AHEAD=str(prefetch_ahead))
+    subprocess.run([sys.executable, '-c', script], check=True, stdout=subprocess.DEVNULL, env=env)
+    with open(results_path) as f:
+        return json.load(f)
+
+
+def main(batches=10, think=0.1):
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        count = batches * 10 + 100
+        generate_corpus(chat_dir, count, message_counts=(40, 80, 150, 300), arabic_ratio=0.6,
+                        template_ratio=0.1, multiline_ratio=0.1)
+        webapp_dir = prepare_webapp(tmp, chat_dir, count)
+        results = {
+            'no prefetch': measure(webapp_dir, batches, think, 0),
+            'prefetch': measure(webapp_dir, batches, think, 10),
+        }
+
+    for name, samples in results.items():
+        samples.sort()
+        print(f"{name:>12}: median {statistics.median(samples):6.2f} ms, "
+              f"p95 {samples[int(len(samples) * 0.95)]:6.2f} ms ({len(samples)} views)")
+    speedup = statistics.median(results['no prefetch']) / statistics.median(results['prefetch'])
+    print(f"{'speedup':>12}: {speedup:.2f}x median view latency")
+    return results
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10, float(sys.argv[2]) if len(sys.argv) > 2 else 0.1)
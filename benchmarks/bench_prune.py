@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the top-K pruning stage of the organizer scan.
+
+Generates a corpus that looks like the real archive, mostly two-line
+verification-code chats plus some real conversations, and scans it with
+and without --prune. It reports the share of files skipped before parsing
+and the speedup, and checks that the top K conversations are identical.
+
+Usage: python benchmarks/bench_prune.py [--files 20000] [--target 1000] [--scan-workers 1]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+# Nine in ten chats are a verification code and a reply
+ARCHIVE_MESSAGE_COUNTS = (2,) * 27 + (5, 12, 40)
+
+
+def scan(chat_dir, workers, prune_top_k):
+    analyzer = ConversationAnalyzer(chat_dir)
+    started = time.perf_counter()
+    analyzer.scan_all_conversations(workers=workers, prune_top_k=prune_top_k)
+    return time.perf_counter() - started, analyzer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scan pruning against the top-K threshold")
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--target', type=int, default=1000)
+    parser.add_argument('--scan-workers', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        generate_corpus(chat_dir, args.files, message_counts=ARCHIVE_MESSAGE_COUNTS, arabic_ratio=0.6,
+                        template_ratio=0.3)
+        full = min(scan(chat_dir, args.scan_workers, None) for _ in range(args.repeat))
+        pruned = min(scan(chat_dir, args.scan_workers, args.target) for _ in range(args.repeat))
+
+    full_seconds, full_analyzer = full
+    pruned_seconds, pruned_analyzer = pruned
+    skipped = pruned_analyzer.metrics.counters.get('files_pruned', 0)
+    top = [(conv['filename'], conv['quality_score']) for conv in full_analyzer.get_top_conversations(args.target)]
+    pruned_top = [(conv['filename'], conv['quality_score'])
+                  for conv in pruned_analyzer.get_top_conversations(args.target)]
+
+    print(f"\n    full scan: {full_seconds:6.2f}s ({args.files / full_seconds:,.0f} files/s)")
+    print(f"  pruned scan: {pruned_seconds:6.2f}s ({args.files / pruned_seconds:,.0f} files/s)")
+    print(f"    skip rate: {skipped / args.files:.1%} ({skipped} of {args.files} files never parsed)")
+    print(f"      speedup: {full_seconds / pruned_seconds:.2f}x")
+    if top != pruned_top:
+        print(f"❌ Top {args.target} differs from the full scan")
+        return 1
+    print(f"✅ Top {args.target} identical to the full scan")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
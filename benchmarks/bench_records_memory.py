@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Measure the memory held by parsed conversation records.
+
+Two loads over the same synthetic corpus, each in a fresh subprocess:
+
+- organizer: ConversationAnalyzer.scan_all_conversations, which keeps a
+  features record and a ranked conversation (with its analysis) per file;
+- webapp: every conversation parsed by the web app's ConversationManager
+  (as the conversation cache holds them) and kept.
+
+For each it reports the deep size of the retained records (every object
+reachable from them, counted once) and the growth in process RSS, plus how
+long the load took. The web app load also times materializing message dicts
+for 1,000 conversations, which is what every view and export does.
+
+Usage: python benchmarks/bench_records_memory.py [--files 100000]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_webapp import prepare_webapp
+from benchmarks.synthetic_corpus import generate_corpus
+
+COMMON = '''
+import gc, json, os, sys, time
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def deep_size(*roots):
+    seen = set()
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+'''
+
+ORGANIZER = COMMON + '''
+sys.path.insert(0, {root!r})
+from whatsapp_conversation_organizer import ConversationAnalyzer
+analyzer = ConversationAnalyzer({chat_dir!r})
+gc.collect()
+before = rss()
+started = time.perf_counter()
+analyzer.scan_all_conversations()
+seconds = time.perf_counter() - started
+gc.collect()
+grown = rss() - before
+retained = deep_size(analyzer.features, analyzer.conversations)
+started = time.perf_counter()
+analyzer.rank_features()
+rank_seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds, 'rss': grown, 'retained': retained, 'rank_seconds': rank_seconds,
+                  'records': len(analyzer.features)}}))
+'''
+
+WEBAPP = COMMON + '''
+os.chdir({webapp!r})
+sys.path.insert(0, {webapp!r})
+import contextlib, io
+with contextlib.redirect_stdout(io.StringIO()):
+    import app as webapp
+manager = webapp.conv_manager
+names = sorted(os.listdir({chat_dir!r}))
+gc.collect()
+before = rss()
+started = time.perf_counter()
+parsed = [manager._load_conversation_content(name) for name in names]
+seconds = time.perf_counter() - started
+gc.collect()
+grown = rss() - before
+retained = deep_size(parsed)
+messages = sum(len(messages) for messages in parsed)
+started = time.perf_counter()
+for name in names[:1000]:
+    manager.get_conversation_content(name)
+view_seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds, 'rss': grown, 'retained': retained, 'view_seconds': view_seconds,
+                  'records': len(parsed), 'messages': messages}}))
+'''
+
+
+def run(script):
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure memory held by parsed conversation records")
+    parser.add_argument('--files', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        generate_corpus(chat_dir, args.files, arabic_ratio=0.6, template_ratio=0.1)
+        organizer = run(ORGANIZER.format(root=str(ROOT), chat_dir=str(chat_dir)))
+        webapp_dir = prepare_webapp(tmp, chat_dir, 100)
+        webapp = run(WEBAPP.format(webapp=str(webapp_dir), chat_dir=str(chat_dir)))
+
+    mb = 1024 * 1024
+    print()
+    print(f"organizer: {organizer['records']} files scanned in {organizer['seconds']:.1f}s, "
+          f"re-ranked in {organizer['rank_seconds']:.2f}s")
+    print(f"           retained {organizer['retained'] / mb:7.1f} MB "
+          f"({organizer['retained'] / organizer['records']:.0f} B/file), RSS +{organizer['rss'] / mb:.1f} MB")
+    print(f"   webapp: {webapp['records']} conversations ({webapp['messages']} messages) parsed in "
+          f"{webapp['seconds']:.1f}s, 1000 views materialized in {webapp['view_seconds']:.2f}s")
+    print(f"           retained {webapp['retained'] / mb:7.1f} MB "
+          f"({webapp['retained'] / webapp['messages']:.0f} B/message), RSS +{webapp['rss'] / mb:.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
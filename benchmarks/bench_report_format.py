@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark loading quality_analysis_report.json vs the columnar .bin report.
+
+Each loader runs in its own subprocess so peak RSS is not polluted by the
+other (peak RSS is read from /proc, so this benchmark is Linux-only). Loaders fetch the filename/quality_score/message_count columns, which
+is what the webapp and copy scripts actually need.
+
+It also checks that a scoring profile with fractional points (a per_unit of
+2.5 and a per_unit rule on time_span_hours) goes through
+save_top_conversations and load_report_rows with the same scores as the JSON
+report, and exits with status 1 if it does not.
+"""
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from scoring_profile import ScoringProfile, load_scoring_profile
+from webapp.columnar_report import REPORT_BIN, REPORT_JSON, load_report_rows, write_columnar_report
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+LOADER = '''
+import json, sys, time
+sys.path.insert(0, {webapp!r})
+from columnar_report import ColumnarReport
+
+def peak_rss_kb():
+    # VmHWM resets on exec, unlike ru_maxrss which a forked child inherits
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+
+before = peak_rss_kb()
+start = time.perf_counter()
+if {mode!r} == 'json':
+    with open({json_path!r}, encoding='utf-8') as f:
+        rows = [(r['filename'], r['quality_score'], r['message_count']) for r in json.load(f)]
+else:
+    with ColumnarReport({bin_path!r}) as report:
+        rows = list(zip(report.column('filename'), report.column('quality_score'), report.column('message_count')))
+elapsed = time.perf_counter() - start
+after = peak_rss_kb()
+print(json.dumps({{'seconds': elapsed, 'rss_kb': after - before, 'rows': len(rows)}}))
+'''
+
+
+def build_report(directory, row_count):
+    rows = [{
+        'filename': f"9665{i:08d}-{i * 7919:024x}.txt",
+        'quality_score': 100 - i % 90,
+        'message_count': 2 + i % 60,
+        'avg_message_length': round(20 + (i % 300) / 7, 2),
+        'has_questions': bool(i % 3),
+        'template_ratio': round((i % 10) / 10, 2),
+        'unique_content_ratio': round((i % 7) / 7, 2)
+    } for i in range(row_count)]
+    json_path = Path(directory) / REPORT_JSON
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    write_columnar_report(Path(directory) / REPORT_BIN, rows)
+    return json_path, Path(directory) / REPORT_BIN
+
+
+def check_fractional_scores(directory, file_count=200):
+    """Save a report scored with fractional points; return the rows whose loaded score differs from the JSON"""
+    profile = dict(load_scoring_profile().source)
+    profile['rules'] = [dict(rule, per_unit=2.5) if 'per_unit' in rule else rule for rule in profile['rules']]
+    profile['rules'].append({'name': 'time_span', 'feature': 'time_span_hours', 'per_unit': 0.25, 'cap': 10})
+    chat_dir = Path(directory) / 'chats'
+    data_dir = Path(directory) / 'data'
+    generate_corpus(chat_dir, file_count, arabic_ratio=0.6)
+
+    analyzer = ConversationAnalyzer(chat_dir, scoring_profile=ScoringProfile(profile))
+    analyzer.scan_all_conversations()
+    analyzer.save_top_conversations(data_dir, count=file_count, write_batches=False)
+    with open(data_dir / REPORT_JSON, encoding='utf-8') as f:
+        expected = {row['filename']: row['quality_score'] for row in json.load(f)}
+    loaded = load_report_rows(data_dir, ['filename', 'quality_score'])
+    mismatched = [row for row in loaded if row['quality_score'] != expected[row['filename']]]
+    fractional = sum(1 for score in expected.values() if not float(score).is_integer())
+    return mismatched, fractional, len(loaded)
+
+
+def main(row_count=350000):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, bin_path = build_report(tmp, row_count)
+        for mode, path in [('json', json_path), ('columnar', bin_path)]:
+            code = LOADER.format(webapp=str(ROOT / 'webapp'), mode=mode,
+                                 json_path=str(json_path), bin_path=str(bin_path))
+            output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+            results[mode] = dict(json.loads(output), size_mb=path.stat().st_size / 1e6)
+
+    for mode, result in results.items():
+        print(f"{mode:>9}: {result['size_mb']:.1f} MB on disk, load {result['seconds']:.3f}s, "
+              f"+{result['rss_kb'] / 1024:.1f} MB peak RSS for {result['rows']} rows")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mismatched, fractional, loaded = check_fractional_scores(tmp)
+    if mismatched:
+        print(f"❌ {len(mismatched)} of {loaded} scores differ between the columnar and JSON reports")
+        return 1
+    print(f"✅ Fractional profile: {loaded} scores ({fractional} fractional) load the same as the JSON report")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
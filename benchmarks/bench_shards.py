@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Check and time a sharded scan against a single-process one.
+
+Runs the organizer once over the whole synthetic corpus, then as N shard
+processes started side by side (standing in for N machines), then merges
+their partial reports. The merged quality_analysis_report.json, columnar
+report and batch files must be byte-for-byte identical to the single run;
+the script exits with status 1 if any file differs.
+
+On one machine the shards share its CPUs, so the timings show the overhead
+of sharding and merging rather than the speedup of separate machines.
+
+Usage: python benchmarks/bench_shards.py [--files 3000] [--shards 4] [--target 1000]
+"""
+import argparse
+import filecmp
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic_corpus import generate_corpus
+
+ORGANIZER = ROOT / 'whatsapp_conversation_organizer.py'
+
+
+def organizer(chat_dir, output_dir, target, *extra):
+    return [sys.executable, str(ORGANIZER), '--chat-dir', str(chat_dir), '--output-dir', str(output_dir),
+            '--target', str(target), '--scan-workers', '1', '--writers', '2', *extra]
+
+
+def timed_run(*commands):
+    """Start the commands together and wait for all of them; returns seconds"""
+    started = time.perf_counter()
+    processes = [subprocess.Popen(command, stdout=subprocess.DEVNULL) for command in commands]
+    for process in processes:
+        if process.wait() != 0:
+            raise SystemExit(f"{' '.join(process.args)} failed with status {process.returncode}")
+    return time.perf_counter() - started
+
+
+def compare_outputs(single_dir, merged_dir):
+    """Names of the report and batch files that differ or exist on one side only"""
+    patterns = ('quality_analysis_report.*', 'conversations_batch_*.txt')
+    single = {path.name for pattern in patterns for path in Path(single_dir).glob(pattern)}
+    merged = {path.name for pattern in patterns for path in Path(merged_dir).glob(pattern)}
+    _, mismatch, errors = filecmp.cmpfiles(single_dir, merged_dir, sorted(single & merged), shallow=False)
+    return sorted(mismatch + errors + sorted(single ^ merged)), len(single)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify that sharded scans merge to the single-node result")
+    parser.add_argument('--files', type=int, default=3000)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--target', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        generate_corpus(chat_dir, args.files, arabic_ratio=0.6, template_ratio=0.1)
+        single_dir = Path(tmp) / 'single'
+        partial_dir = Path(tmp) / 'partials'
+        merged_dir = Path(tmp) / 'merged'
+
+        single_seconds = timed_run(organizer(chat_dir, single_dir, args.target))
+        shard_seconds = timed_run(*(
+            organizer(chat_dir, partial_dir, args.target, '--shard', f'{index}/{args.shards}')
+            for index in range(1, args.shards + 1)
+        ))
+        partials = sorted(str(path) for path in partial_dir.glob('partial_report_*.json'))
+        merge_seconds = timed_run(organizer(chat_dir, merged_dir, args.target, '--merge', *partials))
+
+        differences, compared = compare_outputs(single_dir, merged_dir)
+
+    print(f"   single process: {single_seconds:6.2f}s")
+    print(f"{args.shards:>3} shard processes: {shard_seconds:6.2f}s (run side by side)")
+    print(f"            merge: {merge_seconds:6.2f}s")
+    if differences:
+        print(f"❌ Merged output differs from the single run: {', '.join(differences)}")
+        return 1
+    print(f"✅ {compared} report and batch files identical to the single run")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Measure how long a new chat export takes to become reviewable with watch_chats.py.
+
+Builds a disposable web app (see bench_webapp.prepare_webapp), starts it on a
+real server together with the watcher, then moves new chats into the watched
+directory: first one at a time, then as one burst. A chat counts as
+reviewable once it is pending in the conversations table (what the review
+queue reads) and the running server serves its conversation page. Chats
+scoring below the report's lowest score must not show up at all.
+
+Usage: python benchmarks/bench_watch.py [--files 1000] [--report 200] [--trickle 20] [--burst 200] [--poll]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_load import free_port, wait_until_up
+from benchmarks.bench_webapp import prepare_webapp
+from benchmarks.synthetic_corpus import generate_corpus
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+# Mostly long chats, so most of them make the report's cut
+NEW_CHAT_MESSAGE_COUNTS = (20, 40)
+TIMEOUT_SECONDS = 60
+
+
+def pending(db_path, names):
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        placeholders = ','.join('?' * len(names))
+        return {row[0] for row in conn.execute(
+            f"SELECT filename FROM conversations WHERE status = 'pending' AND filename IN ({placeholders})",
+            list(names))}
+    finally:
+        conn.close()
+
+
+def watch_pending(db_path, arrivals, latencies, seconds):
+    """Record seconds from arrival until pending for the arrived chats, for up to seconds or until all are in"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        waiting = [name for name in arrivals if name not in latencies]
+        if not waiting:
+            return
+        now = time.perf_counter()
+        for name in pending(db_path, waiting):
+            latencies[name] = now - arrivals[name]
+        time.sleep(0.01)
+
+
+def check_served(base_url, names):
+    for name in names:
+        with urllib.request.urlopen(f'{base_url}/conversation/{name}', timeout=30) as response:
+            assert response.status == 200
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure new-chat-to-reviewable latency of the chat watcher")
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--report', type=int, default=200)
+    parser.add_argument('--trickle', type=int, default=20)
+    parser.add_argument('--burst', type=int, default=200)
+    parser.add_argument('--poll', action='store_true')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        generate_corpus(chat_dir, args.files, arabic_ratio=0.6, template_ratio=0.1)
+        webapp_dir = prepare_webapp(tmp, chat_dir, args.report)
+        staging = Path(tmp) / 'incoming'
+        new_chats = generate_corpus(staging, args.trickle + args.burst, seed=5,
+                                    message_counts=NEW_CHAT_MESSAGE_COUNTS, arabic_ratio=0.6)
+        db_path = webapp_dir / 'conversations.db'
+        with open(webapp_dir / 'organized_whatsapp_conversations' / 'quality_analysis_report.json',
+                  encoding='utf-8') as f:
+            cut = min(row['quality_score'] for row in json.load(f))
+        analyzer = ConversationAnalyzer(staging)
+        qualifies = {path.name: analyzer.analyze_conversation_quality(path)[0] >= cut for path in new_chats}
+
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = subprocess.Popen(
+            [sys.executable, 'start.py', '--server', 'waitress', '--host', '127.0.0.1', '--port', str(port),
+             '--no-browser'], cwd=webapp_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        watcher = None
+        try:
+            wait_until_up(base_url, server)
+            watcher = subprocess.Popen(
+                [sys.executable, '-u', str(ROOT / 'watch_chats.py'), '--chat-dir', str(chat_dir),
+                 '--webapp-dir', str(webapp_dir)] + (['--poll', '--interval', '0.5'] if args.poll else []),
+                stdout=subprocess.PIPE, text=True)
+            for line in watcher.stdout:
+                if line.startswith('👀'):
+                    print(line.strip())
+                    break
+
+            trickle, trickle_latencies = {}, {}
+            for path in new_chats[:args.trickle]:
+                os.rename(path, chat_dir / path.name)
+                if qualifies[path.name]:
+                    trickle[path.name] = time.perf_counter()
+                watch_pending(db_path, trickle, trickle_latencies, 0.25)
+            watch_pending(db_path, trickle, trickle_latencies, TIMEOUT_SECONDS)
+            check_served(base_url, trickle_latencies)
+
+            burst, burst_latencies = {}, {}
+            for path in new_chats[args.trickle:]:
+                os.rename(path, chat_dir / path.name)
+                if qualifies[path.name]:
+                    burst[path.name] = time.perf_counter()
+            watch_pending(db_path, burst, burst_latencies, TIMEOUT_SECONDS)
+            check_served(base_url, burst_latencies)
+            below_cut = pending(db_path, [name for name, ok in qualifies.items() if not ok])
+        finally:
+            if watcher is not None:
+                watcher.terminate()
+                watcher.wait()
+            server.terminate()
+            server.wait()
+
+    ok = not below_cut
+    if below_cut:
+        print(f"❌ {len(below_cut)} chats scoring below {cut} were queued for review")
+    for name, arrivals, latencies in (('one at a time', trickle, trickle_latencies),
+                                      (f'burst of {args.burst}', burst, burst_latencies)):
+        if len(latencies) < len(arrivals):
+            ok = False
+            print(f"❌ {name}: only {len(latencies)} of {len(arrivals)} chats became reviewable")
+            continue
+        values = sorted(latencies.values())
+        print(f"{name:>14}: median {statistics.median(values):.2f}s, max {values[-1]:.2f}s "
+              f"from arrival to reviewable ({len(values)} chats)")
+    if ok:
+        print(f"✅ Every new chat scoring >= {cut} became reviewable without a rescan or restart; "
+              f"{sum(not ok for ok in qualifies.values())} below it stayed out")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the review web app's routes and exports against a synthetic corpus.
+
+A throwaway copy of webapp/ is built in a temp directory with its own
+chats/, quality report and conversations.db, so the real database is never
+touched. The app is then imported in a subprocess (it loads its data at
+import time) and driven through Flask's test client; per-route median and
+p95 latencies come back as JSON.
+
+Usage: python benchmarks/bench_webapp.py [conversation_count]   (default 2000)
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+WEBAPP_DIR = ROOT / 'webapp'
+
+CLIENT = '''
+import json, os, statistics, sys, time
+os.chdir({webapp!r})
+sys.path.insert(0, {webapp!r})
+import app as webapp
+
+client = webapp.app.test_client()
+with open(os.path.join(webapp.DATA_DIR, 'quality_analysis_report.json'), encoding='utf-8') as f:
+    filenames = [row['filename'] for row in json.load(f)]
+results = {{}}
+
+def timed(name, requests):
+    samples = []
+    for method, url, body in requests:
+        start = time.perf_counter()
+        response = client.open(url, method=method, json=body)
+        response.get_data()
+        samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f"{{method}} {{url}} returned {{response.status_code}}")
+    samples.sort()
+    results[name] = {{
+        'requests': len(samples),
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }}
+
+rounds = {rounds}
+view_files = filenames[:rounds]
+timed('GET /', [('GET', '/', None)] * rounds)
+timed('GET /review', [('GET', f'/review?reviewer=Bench&page={{i % 20 + 1}}', None) for i in range(rounds)])
+timed('GET /conversation', [('GET', f'/conversation/{{name}}', None) for name in view_files])
+timed('GET /api/get_edits', [('GET', f'/api/get_edits/{{name}}', None) for name in view_files])
+timed('POST /api/review', [
+    ('POST', '/api/review', {{'filename': name, 'reviewer': f'Reviewer {{i % 5}}', 'accepted': i % 4 != 0}})
+    for i, name in enumerate(filenames[:{reviews}])
+])
+timed('GET /approved', [('GET', f'/approved?page={{i % 5 + 1}}', None) for i in range(rounds)])
+timed('GET /api/progress', [('GET', '/api/progress', None)] * rounds)
+for export_format in ('jsonl', 'json', 'multiturn', 'txt', 'txt_individual'):
+    timed(f'GET /api/export?format={{export_format}}',
+          [('GET', f'/api/export?format={{export_format}}', None)] * {export_rounds})
+
+with open({results_path!r}, 'w', encoding='utf-8') as f:
+    json.dump(results, f)
+'''
+
+
+def prepare_webapp(directory, chat_dir, conversation_count):
+    """Build a disposable webapp copy whose report ranks the chats in chat_dir"""
+    webapp_dir = Path(directory) / 'webapp'
+    webapp_dir.mkdir(parents=True)
+    for module in WEBAPP_DIR.glob('*.py'):
+        shutil.copy2(module, webapp_dir / module.name)
+    shutil.copytree(WEBAPP_DIR / 'templates', webapp_dir / 'templates')
+    os.symlink(Path(chat_dir).resolve(), webapp_dir / 'chats')
+
+    analyzer = ConversationAnalyzer(chat_dir)
+    analyzer.scan_all_conversations()
+    analyzer.save_top_conversations(webapp_dir / 'organized_whatsapp_conversations', count=conversation_count,
+                                    write_batches=False)
+    return webapp_dir
+
+
+def run_client(webapp_dir, rounds=50, reviews=200, export_rounds=3):
+    """Drive the app in a subprocess and return {route: {requests, median_ms, p95_ms}}"""
+    results_path = Path(webapp_dir) / 'bench_results.json'
+    script = CLIENT.format(webapp=str(webapp_dir), rounds=rounds, reviews=reviews,
+                           export_rounds=export_rounds, results_path=str(results_path))
+    subprocess.run([sys.executable, '-c', script], check=True, stdout=subprocess.DEVNULL)
+    with open(results_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(conversation_count=2000, chat_dir=None, rounds=50, reviews=200, export_rounds=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        if chat_dir is None:
+            chat_dir = Path(tmp) / 'chats'
+            generate_corpus(chat_dir, conversation_count)
+        webapp_dir = prepare_webapp(tmp, chat_dir, conversation_count)
+        results = run_client(webapp_dir, rounds, reviews, export_rounds)
+
+    for name, timing in results.items():
+        print(f"{name:>38}: median {timing['median_ms']:8.2f} ms, p95 {timing['p95_ms']:8.2f} ms "
+              f"({timing['requests']} requests)")
+    return results
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
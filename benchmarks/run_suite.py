@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: scan, classify, batch writing, webapp routes and exports.
+
+Generates a deterministic synthetic corpus, measures every stage and compares
+the numbers with benchmarks/baseline.json. A metric that is worse than the
+baseline by more than --tolerance counts as a regression and the suite exits
+with status 1. Baselines are machine specific; record one on the machine that
+runs the comparison with --update-baseline. Results are only compared when the
+corpus options match the ones the baseline was recorded with.
+
+Usage: python benchmarks/run_suite.py [--files 3000] [--only scan,classify] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from batch_writer import write_review_batches
+from benchmarks import bench_webapp
+from benchmarks.synthetic_corpus import MESSAGE_COUNTS, generate_corpus, parse_message_counts
+from whatsapp_conversation_organizer import ConversationAnalyzer
+
+DEFAULT_BASELINE = Path(__file__).with_name('baseline.json')
+SUITES = ('scan', 'classify', 'batch_write', 'webapp')
+
+
+def best_of(repeat, func):
+    """Run func repeat times and return (fastest seconds, last result)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def metric(value, unit, higher_is_better=True):
+    return {'value': round(value, 3), 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def bench_scan(chat_dir, paths, repeat):
+    total_bytes = sum(path.stat().st_size for path in paths)
+
+    def scan():
+        analyzer = ConversationAnalyzer(chat_dir)
+        analyzer.scan_all_conversations()
+        return analyzer
+
+    seconds, analyzer = best_of(repeat, scan)
+    return {
+        'scan.files_per_sec': metric(len(paths) / seconds, 'files/s'),
+        'scan.mb_per_sec': metric(total_bytes / seconds / 1e6, 'MB/s'),
+    }, analyzer
+
+
+def bench_classify(analyzer, paths, repeat):
+    def classify():
+        return sum(len(analyzer.format_conversation_for_team(path)) for path in paths)
+
+    seconds, message_count = best_of(repeat, classify)
+    return {
+        'classify.files_per_sec': metric(len(paths) / seconds, 'files/s'),
+        'classify.messages_per_sec': metric(message_count / seconds, 'messages/s'),
+    }
+
+
+def bench_batch_write(analyzer, repeat, workers):
+    entries = [{
+        'filename': conv['filename'],
+        'file_path': conv['file_path'],
+        'quality_score': conv['quality_score'],
+        'message_count': conv['analysis']['message_count'],
+        'avg_message_length': conv['analysis']['avg_message_length'],
+        'has_questions': conv['analysis']['has_questions']
+    } for conv in analyzer.conversations]
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        seconds, _ = best_of(repeat, lambda: write_review_batches(entries, out_dir,
+                                                                  analyzer.format_conversation_for_team,
+                                                                  workers=workers))
+    return {'batch_write.conversations_per_sec': metric(len(entries) / seconds, 'conversations/s')}
+
+
+def bench_routes(tmp, chat_dir, file_count):
+    webapp_dir = bench_webapp.prepare_webapp(tmp, chat_dir, file_count)
+    timings = bench_webapp.run_client(webapp_dir)
+    return {
+        f'webapp.{route}.median_ms': metric(timing['median_ms'], 'ms', higher_is_better=False)
+        for route, timing in timings.items()
+    }
+
+
+def run_suite(args):
+    corpus = {
+        'files': args.files,
+        'seed': args.seed,
+        'message_counts': list(args.messages),
+        'arabic_ratio': args.arabic_ratio,
+        'template_ratio': args.template_ratio,
+        'multiline_ratio': args.multiline_ratio,
+    }
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chat_dir = Path(tmp) / 'chats'
+        print(f"Generating {args.files} synthetic chats...")
+        paths = generate_corpus(chat_dir, args.files, seed=args.seed, message_counts=args.messages,
+                                arabic_ratio=args.arabic_ratio, template_ratio=args.template_ratio,
+                                multiline_ratio=args.multiline_ratio)
+
+        # Scanning also ranks the corpus, which classify and batch_write reuse
+        scan_results, analyzer = bench_scan(chat_dir, paths, args.repeat if 'scan' in args.only else 1)
+        if 'scan' in args.only:
+            results.update(scan_results)
+        if 'classify' in args.only:
+            print("Benchmarking classify...")
+            results.update(bench_classify(analyzer, paths, args.repeat))
+        if 'batch_write' in args.only:
+            print("Benchmarking batch writing...")
+            results.update(bench_batch_write(analyzer, args.repeat, args.writers))
+        if 'webapp' in args.only:
+            print("Benchmarking webapp routes and exports...")
+            results.update(bench_routes(tmp, chat_dir, args.files))
+
+    return {
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'corpus': corpus,
+        'results': results,
+    }
+
+
+def compare(run, baseline, tolerance):
+    """Print each metric next to its baseline; return the names that regressed"""
+    regressions = []
+    base_results = baseline.get('results', {})
+    for name, current in run['results'].items():
+        base = base_results.get(name)
+        line = f"{name:>52}: {current['value']:>12,.2f} {current['unit']}"
+        if not base or not base['value']:
+            print(line + "   (no baseline)")
+            continue
+        change = (current['value'] - base['value']) / base['value']
+        worse = -change if current['higher_is_better'] else change
+        status = "❌ REGRESSION" if worse > tolerance else "✅"
+        if worse > tolerance:
+            regressions.append(name)
+        print(f"{line}   baseline {base['value']:,.2f} ({change:+.1%}) {status}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare against a baseline")
+    parser.add_argument('--files', type=int, default=3000, help="Synthetic chat files to generate")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--messages', type=parse_message_counts, default=MESSAGE_COUNTS,
+                        help="Comma separated pool of per-file message counts")
+    parser.add_argument('--arabic-ratio', type=float, default=0.6)
+    parser.add_argument('--template-ratio', type=float, default=0.1)
+    parser.add_argument('--multiline-ratio', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=3, help="Keep the best of this many runs")
+    parser.add_argument('--writers', type=int, default=4, help="Batch formatting threads")
+    parser.add_argument('--only', type=lambda value: tuple(value.split(',')), default=SUITES,
+                        help=f"Comma separated subset of {','.join(SUITES)}")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown before a metric counts as a regression")
+    parser.add_argument('--update-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--output', help="Also write this run's results to a JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    unknown = set(args.only) - set(SUITES)
+    if unknown:
+        raise SystemExit(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+
+    run = run_suite(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+            f.write('\n')
+        print(f"\n📌 Baseline written to {args.baseline}")
+        compare(run, {}, args.tolerance)
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('corpus') != run['corpus']:
+            print("\n⚠️  Corpus options differ from the baseline's; showing results without comparison")
+            baseline = {}
+    else:
+        print(f"\n⚠️  No baseline at {args.baseline}; run with --update-baseline to record one")
+
+    print()
+    regressions = compare(run, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
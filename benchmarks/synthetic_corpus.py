@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic WhatsApp chat exports for benchmarks.
+
+The same seed and options always produce byte-identical files. With the
+default options the output matches what the earlier benchmarks were measured
+against; the extra knobs only draw random numbers when they are switched on.
+
+Usage: python benchmarks/synthetic_corpus.py <directory> [--files N] [--arabic-ratio R]
+       [--template-ratio R] [--multiline-ratio R] [--messages 2,5,40] [--seed S]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+GUEST_LINES = [
+    "السلام عليكم", "how can I book a table for tonight?", "what time do you open",
+    "شكرا", "ok", "هل يوجد حجز متاح اليوم؟", "can I change my reservation?",
+]
+AGENT_LINES = [
+    "Sarah Call Center: وعليكم السلام كيف اقدر اخدمك",
+    "Rona: We open at 1pm, would you like to reserve?",
+    "Bot: ماذا تريد ان تفعل؟",
+    "Modi: Entrecote Cafe De Paris Menu",
+    "Soha: تم إرسال رمز التحقق",
+]
+
+# Language-specific pools, used when arabic_ratio is given
+GUEST_LINES_AR = [
+    "السلام عليكم", "شكرا", "هل يوجد حجز متاح اليوم؟", "كيف اقدر احجز طاولة الليلة؟",
+    "متى تفتحون؟", "ابي اغير موعد الحجز", "كم شخص يقدر يجلس على الطاولة؟",
+]
+GUEST_LINES_EN = [
+    "how can I book a table for tonight?", "what time do you open", "ok", "thanks a lot",
+    "can I change my reservation?", "is there parking near the restaurant?", "we are 4 people",
+]
+AGENT_LINES_AR = [
+    "Sarah Call Center: وعليكم السلام كيف اقدر اخدمك",
+    "Soha: اكيد، الحجز متاح الساعة ٩ مساء",
+    "Rona: نعتذر، لا يوجد طاولات متاحة اليوم",
+    "Sara: تقدر تعدل الحجز من الرابط المرسل",
+]
+AGENT_LINES_EN = [
+    "Rona: We open at 1pm, would you like to reserve?",
+    "Modi: Entrecote Cafe De Paris Menu",
+    "Sarah: Your table for 4 is confirmed at 9pm",
+    "Soha: Parking is available behind the building",
+]
+TEMPLATE_LINES = [
+    "Entrecote: Your verification code is {code}",
+    "Entrecote: رمز التحقق الخاص بك هو {code}",
+    "Entrecote: تم إرسال تأكيد الحجز رقم {code}",
+    "Entrecote: نرحب بك في مطعمنا، رقم الحجز {code}",
+    "Entrecote: Template - booking {code} was sent to your email",
+]
+CONTINUATION_LINES = [
+    "- 2 adults", "- 1 kid", "الطابق الثاني لو سمحت", "near the window please",
+    "بدون بصل", "we will be 10 minutes late",
+]
+MESSAGE_COUNTS = (2, 2, 5, 8, 12, 20, 40)
+
+
+def _message_text(rnd, i, j, arabic_ratio, template_ratio):
+    if template_ratio and rnd.random() < template_ratio:
+        return rnd.choice(TEMPLATE_LINES).format(code=rnd.randint(1000, 9999))
+    if arabic_ratio is None:
+        if j % 2 == 0:
+            return f"Guest {i % 97}: {rnd.choice(GUEST_LINES)}"
+        return rnd.choice(AGENT_LINES)
+    arabic = rnd.random() < arabic_ratio
+    if j % 2 == 0:
+        return f"Guest {i % 97}: {rnd.choice(GUEST_LINES_AR if arabic else GUEST_LINES_EN)}"
+    return rnd.choice(AGENT_LINES_AR if arabic else AGENT_LINES_EN)
+
+
+def generate_corpus(directory, file_count, seed=1, message_counts=MESSAGE_COUNTS, arabic_ratio=None,
+                    template_ratio=0.0, multiline_ratio=0.0):
+    """Write file_count chat files into directory and return their paths.
+
+    message_counts is the pool each file's message count is drawn from.
+    arabic_ratio (0-1) picks Arabic over English lines; None keeps the
+    original mixed pools. template_ratio is the share of automated template
+    messages and multiline_ratio the share of messages continued on extra
+    lines without a timestamp, as WhatsApp exports them.
+    """
+    rnd = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+
+    for i in range(file_count):
+        message_count = rnd.choice(message_counts)
+        moment = datetime(2024, 1, 1) + timedelta(minutes=rnd.randint(0, 500000))
+        lines = []
+        for j in range(message_count):
+            moment += timedelta(minutes=rnd.choice([1, 5, 30, 300]))
+            text = _message_text(rnd, i, j, arabic_ratio, template_ratio)
+            if rnd.random() < 0.3:
+                text += " " + "details " * rnd.randint(1, 30)
+            lines.append(f"[{moment.strftime('%m/%d/%Y %H:%M:%S')}] {text}")
+            if multiline_ratio and rnd.random() < multiline_ratio:
+                lines.extend(rnd.choice(CONTINUATION_LINES) for _ in range(rnd.randint(1, 3)))
+
+        path = directory / f"9665{i:08d}-{rnd.getrandbits(48):012x}.txt"
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        paths.append(path)
+
+    return paths
+
+
+def parse_message_counts(value):
+    return tuple(int(count) for count in value.split(',') if count)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic WhatsApp chat corpus")
+    parser.add_argument('directory')
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--messages', type=parse_message_counts, default=MESSAGE_COUNTS,
+                        help="Comma separated pool of per-file message counts")
+    parser.add_argument('--arabic-ratio', type=float, default=None)
+    parser.add_argument('--template-ratio', type=float, default=0.0)
+    parser.add_argument('--multiline-ratio', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    paths = generate_corpus(args.directory, args.files, seed=args.seed, message_counts=args.messages,
+                            arabic_ratio=args.arabic_ratio, template_ratio=args.template_ratio,
+                            multiline_ratio=args.multiline_ratio)
+    print(f"Generated {len(paths)} chat files in {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Bytes-mode message parsing for the organizer scan.
+
+The text-mode parser decodes the whole file, matches every line with a
+regex, parses every timestamp with strptime and tests every indicator word
+with `in`. This parser works on the raw bytes instead:
+
+- one precompiled bytes regex finds every '[timestamp] text' line;
+- timestamps in the usual 'MM/DD/YYYY HH:MM:SS' shape are read straight into
+  datetime, trying month/day then day/month as strptime with the first two
+  TIMESTAMP_FORMATS would; anything else goes through strptime;
+- a message body is only decoded when it isn't pure ASCII, and the indicator
+  lists are matched with one compiled alternation per list (bytes for ASCII
+  bodies, str for decoded ones) instead of a loop over the words.
+
+The features come out identical to text mode. A file is handed back to the
+text parser (NeedsTextParse) when its bytes could decode differently from
+open(..., errors='ignore'): an invalid byte inside a message, non-ASCII
+bytes in front of a '[' at the start of a line, or a file starting with a
+non-ASCII byte.
+"""
+import re
+from datetime import datetime
+
+from file_budget import until_deadline
+
+MESSAGE_LINE = re.compile(rb'^\[([^\]\n]+)\]([^\n]*)', re.M)
+# Text mode drops invalid bytes and strip() drops Unicode spaces, either of which can start a message here
+HIDDEN_MESSAGE_START = re.compile(rb'^[\x80-\xff]+\[', re.M)
+MONTH_FIRST_TIMESTAMP = re.compile(rb'(\d\d)/(\d\d)/(\d{4}) (\d\d):(\d\d):(\d\d)')
+MONTH_FIRST_FORMATS = ['%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S']
+# What str.strip() removes from ASCII text
+ASCII_WHITESPACE = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
+
+
+class NeedsTextParse(Exception):
+    pass
+
+
+def _any_of(words):
+    """A compiled pattern matching any of words, or None when there are none"""
+    words = list(words)
+    return re.compile(b'|'.join(map(re.escape, words)) if isinstance(words[0], bytes)
+                      else '|'.join(map(re.escape, words))) if words else None
+
+
+class ByteParser:
+    def __init__(self, question_words, template_indicators, timestamp_formats):
+        self._questions = _any_of(question_words)
+        self._questions_bytes = _any_of(word.encode('utf-8') for word in question_words)
+        self._templates = _any_of(template_indicators)
+        self._templates_bytes = _any_of(word.encode('utf-8') for word in template_indicators)
+        self.timestamp_formats = list(timestamp_formats)
+        # The fast path stands in for the first two formats, as long as no later one takes slashes
+        self._month_first = (self.timestamp_formats[:2] == MONTH_FIRST_FORMATS
+                             and not any('/' in fmt for fmt in self.timestamp_formats[2:]))
+
+    def parse(self, data, deadline=None):
+        """(message bodies, timestamps) of raw chat bytes, as the text parser would find them.
+
+        Bodies are stripped; ASCII ones stay bytes and the rest are decoded
+        to str. Raises NeedsTextParse when the text parser must be used, and
+        FileTimeLimitExceeded once past the deadline.
+        """
+        if b'\r' in data:
+            # Text mode's universal newlines
+            data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        data = data.lstrip(ASCII_WHITESPACE)
+        # Text mode may drop or strip leading non-ASCII bytes and whitespace behind them
+        if data[:1] >= b'\x80' or HIDDEN_MESSAGE_START.search(data):
+            raise NeedsTextParse
+
+        lines = MESSAGE_LINE.findall(data)
+        bodies = []
+        timestamps = []
+        for timestamp, body in until_deadline(lines, deadline):
+            body = body.strip(ASCII_WHITESPACE)
+            if not body:
+                continue
+            if not body.isascii():
+                try:
+                    body = body.decode('utf-8').strip()
+                except UnicodeDecodeError:
+                    raise NeedsTextParse
+                if not body:
+                    continue
+                if body.isascii():
+                    # Only Unicode spaces around it; keep it comparable with the other ASCII bodies
+                    body = body.encode('ascii')
+            bodies.append(body)
+            parsed = self.parse_timestamp(timestamp)
+            if parsed is not None:
+                timestamps.append(parsed)
+        return bodies, timestamps
+
+    def parse_timestamp(self, timestamp):
+        """The datetime the first matching timestamp format gives, or None"""
+        match = MONTH_FIRST_TIMESTAMP.fullmatch(timestamp) if self._month_first else None
+        if match:
+            first, second, year, hour, minute, second_of_minute = map(int, match.groups())
+            for month, day in ((first, second), (second, first)):
+                try:
+                    return datetime(year, month, day, hour, minute, second_of_minute)
+                except ValueError:
+                    continue
+            # Neither reading is a valid date; no later format has this shape
+            return None
+
+        try:
+            timestamp = timestamp.decode('utf-8')
+        except UnicodeDecodeError:
+            raise NeedsTextParse
+        for fmt in self.timestamp_formats:
+            try:
+                return datetime.strptime(timestamp, fmt)
+            except ValueError:
+                continue
+        return None
+
+    def classify(self, body):
+        """(is a question, is a template) for one parsed body"""
+        if isinstance(body, bytes):
+            questions, templates = self._questions_bytes, self._templates_bytes
+        else:
+            questions, templates = self._questions, self._templates
+        body = body.lower()
+        return (questions is not None and questions.search(body) is not None,
+                templates is not None and templates.search(body) is not None)
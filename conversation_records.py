@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Slotted records for the per-file results the organizer keeps in memory.
+
+A scan holds, for every chat, its extracted features and, if it scores, a
+ranked entry with its analysis. As dicts that came to over a kilobyte per
+file, most of it dict overhead, and the analysis copied most of its values
+from the features. Here each is a small object with __slots__:
+
+- Features holds the extracted values; sampled_messages is only set for
+  sampled chats;
+- Analysis is a view over the Features it was scored from plus the one
+  value scoring adds (conversation_flow), so nothing is stored twice;
+- ScannedFile and RankedConversation keep the path once and slice the
+  filename out of it.
+
+All of them read like the dicts they replace (record['key'], .get(), 'key'
+in record, dict(record), == against a dict), so scoring profiles, report
+writers and merged shard reports work unchanged. to_dict() gives the plain
+form for JSON.
+"""
+import os
+from collections.abc import Mapping
+
+
+class Record(Mapping):
+    """Mapping over the keys in _fields; a slot that was never set is a missing key"""
+    __slots__ = ()
+    _fields = ()
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # Scoring calls this for every rule of every file, so skip the Mapping machinery
+        return getattr(self, key, default) if key in self._fields else default
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return (key for key in self._fields if hasattr(self, key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        return {key: value.to_dict() if isinstance(value, Record) else value for key, value in self.items()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Features(Record):
+    __slots__ = _fields = ('message_count', 'avg_message_length', 'question_count', 'template_ratio',
+                           'length_spread', 'unique_content_ratio', 'time_span_hours', 'sampled_messages')
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+
+class Analysis(Record):
+    """What score_features reports about a scored chat, read from its features"""
+    __slots__ = ('features', 'conversation_flow')
+    _fields = ('message_count', 'avg_message_length', 'has_questions', 'conversation_flow', 'template_ratio',
+               'unique_content_ratio', 'time_span_hours', 'sampled')
+
+    def __init__(self, features, conversation_flow):
+        self.features = features
+        self.conversation_flow = conversation_flow
+
+    @property
+    def message_count(self):
+        return self.features['message_count']
+
+    @property
+    def avg_message_length(self):
+        return self.features['avg_message_length']
+
+    @property
+    def has_questions(self):
+        return self.features['question_count'] > 0
+
+    @property
+    def template_ratio(self):
+        return self.features['template_ratio']
+
+    @property
+    def unique_content_ratio(self):
+        return self.features['unique_content_ratio']
+
+    @property
+    def time_span_hours(self):
+        return self.features.get('time_span_hours') or 0
+
+    @property
+    def sampled(self):
+        return 'sampled_messages' in self.features
+
+
+class ScannedFile(Record):
+    """One entry of ConversationAnalyzer.features"""
+    __slots__ = ('file_path', '_name_start', 'features')
+    _fields = ('file_path', 'filename', 'features')
+
+    def __init__(self, file_path, features):
+        self.file_path = file_path
+        self._name_start = file_path.rfind(os.sep) + 1
+        self.features = features
+
+    @property
+    def filename(self):
+        return self.file_path[self._name_start:]
+
+
+class RankedConversation(Record):
+    """One entry of ConversationAnalyzer.conversations"""
+    __slots__ = ('file', 'quality_score', 'analysis')
+    _fields = ('file_path', 'filename', 'quality_score', 'analysis')
+
+    def __init__(self, file, quality_score, analysis):
+        self.file = file
+        self.quality_score = quality_score
+        self.analysis = analysis
+
+    @property
+    def file_path(self):
+        return self.file.file_path
+
+    @property
+    def filename(self):
+        return self.file.filename
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Per-file limits that keep a few pathological chats from stalling a scan.
+
+Huge group exports cost time in proportion to their message count, because
+every line is matched, its timestamp parsed and its text checked against the
+indicator lists. Above max_bytes or max_messages the organizer works from a
+sample of sample_messages messages instead:
+
+- the message lines are found with one regex pass over the whole text, so
+  the message count stays exact;
+- they are split into sample_messages equal strata in file order, and one
+  message is drawn from each, plus the first and last message so the time
+  span is exact too;
+- the draw is seeded with the filename, so every run, worker and shard picks
+  the same messages.
+
+Averages and ratios come from the sample, and the question count is scaled
+to the full message count. The unique content ratio of a repetitive chat
+reads higher on a sample than on the whole chat, since a sample repeats
+less. The scored analysis carries 'sampled': True and the batch header says
+"Sampled: True".
+
+time_limit is a wall-clock budget per file. The parse and classify loops
+check it every DEADLINE_CHECK_EVERY lines and raise FileTimeLimitExceeded,
+which the organizer logs before skipping the file. Set a limit to 0 (or
+None) to turn it off.
+"""
+import random
+import re
+import time
+import zlib
+
+DEFAULT_MAX_FILE_MB = 16
+DEFAULT_MAX_MESSAGES = 50000
+DEFAULT_SAMPLE_MESSAGES = 5000
+DEFAULT_TIME_LIMIT = 120
+DEADLINE_CHECK_EVERY = 4096
+# A message line: '[timestamp]' followed by some non-blank text, as the line parser accepts it
+MESSAGE_LINE = re.compile(r'^\[[^\]\n]+\][^\S\n]*\S[^\n]*', re.M)
+
+
+class FileTimeLimitExceeded(Exception):
+    pass
+
+
+class FileBudget:
+    def __init__(self, max_bytes=DEFAULT_MAX_FILE_MB * 1024 * 1024, max_messages=DEFAULT_MAX_MESSAGES,
+                 sample_messages=DEFAULT_SAMPLE_MESSAGES, time_limit=DEFAULT_TIME_LIMIT):
+        self.max_bytes = max_bytes or None
+        self.max_messages = max_messages or None
+        # The first and last message are always kept, so a sample has at least two
+        self.sample_messages = max(2, sample_messages)
+        self.time_limit = time_limit or None
+
+    def over(self, size, content):
+        """Whether a chat of size bytes, as text or raw bytes, should be sampled"""
+        if self.max_bytes is not None and size > self.max_bytes:
+            return True
+        # Lines starting with '[' bound the message count and are cheap to count
+        if isinstance(content, bytes):
+            # Raw bytes still have the \r line endings text mode turns into \n
+            lines = content.count(b'\n[') + content.count(b'\r[') + 1
+        else:
+            lines = content.count('\n[') + 1
+        return self.max_messages is not None and lines > self.max_messages
+
+    def deadline(self, started):
+        return started + self.time_limit if self.time_limit is not None else None
+
+    def sample_lines(self, content, name):
+        """(sampled message lines in file order, total message count) for an over-budget chat"""
+        lines = MESSAGE_LINE.findall(content)
+        return [lines[i] for i in stratified_sample(len(lines), self.sample_messages, name)], len(lines)
+
+
+def stratified_sample(count, size, name):
+    """Sorted indices: one from each of size equal strata of range(count), plus the first and last"""
+    if count <= size:
+        return range(count)
+    rng = random.Random(zlib.crc32(name.encode('utf-8')))
+    step = count / size
+    picks = {min(count - 1, int((stratum + rng.random()) * step)) for stratum in range(size)}
+    picks.update((0, count - 1))
+    return sorted(picks)
+
+
+def until_deadline(items, deadline):
+    """items, raising FileTimeLimitExceeded once the clock passes deadline (checked every DEADLINE_CHECK_EVERY)"""
+    if deadline is None:
+        return items
+    return _until_deadline(items, deadline)
+
+
+def _until_deadline(items, deadline):
+    for start in range(0, len(items), DEADLINE_CHECK_EVERY):
+        if time.perf_counter() > deadline:
+            raise FileTimeLimitExceeded
+        yield from items[start:start + DEADLINE_CHECK_EVERY]
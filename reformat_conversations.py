@@ -1,38 +1,66 @@
 #!/usr/bin/env python3
+"""
+Rewrite the conversations_batch_*.txt review files with the improved classifier.
+
+Only batches whose inputs changed since the last run are rebuilt: their slice
+of the quality report, the size and mtime of their source chats, or the
+classifier below (CLASSIFIER_VERSION). Pass --full to rebuild everything.
+"""
+import argparse
+import hashlib
 import json
+import os
 import re
 from pathlib import Path
 
-def format_conversation_for_team(file_path):
+from batch_writer import write_changed_batches
+from webapp.chat_store import INDEX_FILENAME, open_chat_store
+from webapp.columnar_report import load_report_rows
+
+DEFAULT_REPORT_DIR = "/Users/mahmouddinnawi/Data_Org/organized_whatsapp_conversations"
+DEFAULT_OUTPUT_DIR = "/Users/mahmouddinnawi/Data_Org/organized_whatsapp_conversations"
+DEFAULT_CHAT_DIR = "/Users/mahmouddinnawi/Desktop/chats"
+
+# Known agent names (add more as needed)
+AGENT_NAMES = {
+    'rona daghistani', 'rona', 'soha suliman', 'soha', 'modi',
+    'sarah call center', 'sarah', 'sara mohamad', 'sara',
+    'it departments', 'it department', 'sarah alothman',
+    'shourouk', 'salman outhman', 'salman'
+}
+
+# Template/Bot indicators
+TEMPLATE_INDICATORS = [
+    'template', 'verification code', 'your code is', 'was sent',
+    'نرحب بك', 'رمز التحقق', 'تم إرسال', 'نود أن نعرف رأيكم',
+    'استمتع بليلة موسيقية', 'إنه لمن دواعي سرورنا', 'نعتذر في حال',
+    'your verification code', 'code is', 'enjoy a unique'
+]
+
+BOT_INDICATORS = [
+    'bot:', '_اهلا ومرحبا بكم في مطعم', 'ماذا تريد ان تفعل',
+    'تم تحويلك الى احد مندوبي', 'اختر اللغة المفضلة'
+]
+
+# Bump when the classification rules in format_conversation_for_team change;
+# edits to the lists above are picked up on their own
+CLASSIFIER_REVISION = 1
+CLASSIFIER_VERSION = hashlib.sha1(json.dumps(
+    [CLASSIFIER_REVISION, sorted(AGENT_NAMES), TEMPLATE_INDICATORS, BOT_INDICATORS], ensure_ascii=False
+).encode('utf-8')).hexdigest()[:16]
+
+def format_conversation_for_team(file_path, chat_store=None):
     """Format a conversation file with proper agent/guest/template/bot classification"""
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        if chat_store is not None:
+            content = chat_store.read_text(Path(file_path).name)
+        else:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
         
         lines = content.strip().split('\n')
         formatted_messages = []
         
-        # Known agent names (add more as needed)
-        agent_names = {
-            'rona daghistani', 'rona', 'soha suliman', 'soha', 'modi', 
-            'sarah call center', 'sarah', 'sara mohamad', 'sara', 
-            'it departments', 'it department', 'sarah alothman', 
-            'shourouk', 'salman outhman', 'salman'
-        }
-        
-        # Template/Bot indicators
-        template_indicators = [
-            'template', 'verification code', 'your code is', 'was sent',
-            'نرحب بك', 'رمز التحقق', 'تم إرسال', 'نود أن نعرف رأيكم',
-            'استمتع بليلة موسيقية', 'إنه لمن دواعي سرورنا', 'نعتذر في حال',
-            'your verification code', 'code is', 'enjoy a unique'
-        ]
-        
-        bot_indicators = [
-            'bot:', '_اهلا ومرحبا بكم في مطعم', 'ماذا تريد ان تفعل',
-            'تم تحويلك الى احد مندوبي', 'اختر اللغة المفضلة'
-        ]
-        
         for line in lines:
             timestamp_match = re.match(r'\[([^\]]+)\]', line)
             if timestamp_match:
@@ -50,16 +78,16 @@ def format_conversation_for_team(file_path):
                     role = "guest"  # default
                     
                     # Check for bot messages first
-                    if any(indicator in message_text.lower() for indicator in bot_indicators):
+                    if any(indicator in message_text.lower() for indicator in BOT_INDICATORS):
                         role = "bot"
                     # Check for template messages
-                    elif any(indicator in message_text.lower() for indicator in template_indicators):
+                    elif any(indicator in message_text.lower() for indicator in TEMPLATE_INDICATORS):
                         role = "template"
                     # Check if sender is a known agent
-                    elif sender_name and any(agent_name in sender_name for agent_name in agent_names):
+                    elif sender_name and any(agent_name in sender_name for agent_name in AGENT_NAMES):
                         role = "agent"
                     # Check message content for agent-like patterns
-                    elif any(name in message_text.lower() for name in agent_names):
+                    elif any(name in message_text.lower() for name in AGENT_NAMES):
                         role = "agent"
                     
                     # Format without timestamp
@@ -71,16 +99,49 @@ def format_conversation_for_team(file_path):
         print(f"Error formatting {file_path}: {e}")
         return []
 
-def main():
-    # Load the quality analysis report
-    quality_report_path = "/Users/mahmouddinnawi/Data_Org/organized_whatsapp_conversations/quality_analysis_report.json"
-    output_directory = "/Users/mahmouddinnawi/Data_Org/organized_whatsapp_conversations"
-    chat_directory = "/Users/mahmouddinnawi/Desktop/chats"
-    
+_worker_chat_store = None
+
+def _init_format_worker(chat_directory):
+    """Open the chat store once per worker process"""
+    global _worker_chat_store
+    _worker_chat_store = open_chat_store(chat_directory)
+
+def _format_in_worker(file_path):
+    return format_conversation_for_team(file_path, _worker_chat_store)
+
+def source_stamper(chat_directory, chat_store=None):
+    """source_stamp(conv) for write_changed_batches: the chat's size and mtime, or None if it is missing"""
+    if chat_store is not None:
+        # Packed chats only change when the store is repacked, which rewrites its index
+        store_mtime = os.stat(Path(chat_directory) / INDEX_FILENAME).st_mtime_ns
+        return lambda conv: ([chat_store.size(conv['filename']), store_mtime]
+                             if conv['filename'] in chat_store else None)
+
+    def stamp(conv):
+        try:
+            stat = os.stat(conv['file_path'])
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+    return stamp
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rewrite the review batch files with the improved classifier")
+    parser.add_argument('--report-dir', default=DEFAULT_REPORT_DIR,
+                        help="Directory holding quality_analysis_report.json/.bin")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help="Where the batch files go")
+    parser.add_argument('--chat-dir', default=DEFAULT_CHAT_DIR, help="Chat directory or packed chat store")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes formatting changed batches (defaults to the CPU count)")
+    parser.add_argument('--full', action='store_true', help="Rebuild every batch, changed or not")
+    args = parser.parse_args(argv)
+
     print("Loading quality analysis report...")
     try:
-        with open(quality_report_path, 'r', encoding='utf-8') as f:
-            quality_data = json.load(f)
+        quality_data = load_report_rows(
+            args.report_dir,
+            ['filename', 'quality_score', 'message_count', 'avg_message_length', 'has_questions']
+        )
     except FileNotFoundError:
         print("Quality analysis report not found. Please run the main analyzer first.")
         return
@@ -88,46 +149,21 @@ def main():
     print(f"Reformatting {len(quality_data)} conversations with improved classification...")
     
     # Create batches for team review (500 conversations per file)
-    batch_size = 500
-    batch_num = 1
-    
-    for i in range(0, len(quality_data), batch_size):
-        batch = quality_data[i:i + batch_size]
-        batch_file = Path(output_directory) / f'conversations_batch_{batch_num:02d}.txt'
-        
-        print(f"Creating batch {batch_num}...")
-        
-        with open(batch_file, 'w', encoding='utf-8') as f:
-            f.write(f"=== BATCH {batch_num} - TOP QUALITY WHATSAPP CONVERSATIONS ===\n")
-            f.write(f"Total conversations in this batch: {len(batch)}\n")
-            f.write(f"Quality score range: {batch[-1]['quality_score']} - {batch[0]['quality_score']}\n")
-            f.write(f"\nCLASSIFICATION LEGEND:\n")
-            f.write(f"• agent: Staff members (Rona, Soha, Modi, Sarah Call Center, etc.)\n")
-            f.write(f"• guest: Customer/client messages\n") 
-            f.write(f"• template: Automated template messages (booking confirmations, etc.)\n")
-            f.write(f"• bot: Automated bot responses\n\n")
-            
-            for j, conv in enumerate(batch, 1):
-                f.write(f"\n{'='*80}\n")
-                f.write(f"CONVERSATION {i + j} - File: {conv['filename']}\n")
-                f.write(f"Quality Score: {conv['quality_score']}\n")
-                f.write(f"Messages: {conv['message_count']}, ")
-                f.write(f"Avg Length: {conv['avg_message_length']:.1f}, ")
-                f.write(f"Questions: {conv['has_questions']}\n")
-                f.write(f"{'='*80}\n")
-                
-                # Format the conversation
-                file_path = Path(chat_directory) / conv['filename']
-                formatted_messages = format_conversation_for_team(file_path)
-                
-                for message in formatted_messages:
-                    f.write(f"{message}\n")
-                f.write(f"\n")
-        
-        batch_num += 1
+    batch_entries = [dict(conv, file_path=str(Path(args.chat_dir) / conv['filename'])) for conv in quality_data]
+    chat_store = open_chat_store(args.chat_dir)
+    try:
+        written, unchanged = write_changed_batches(
+            batch_entries, args.output_dir, _format_in_worker,
+            source_stamper(args.chat_dir, chat_store), CLASSIFIER_VERSION,
+            workers=args.workers, initializer=_init_format_worker, initargs=(args.chat_dir,), full=args.full
+        )
+    finally:
+        if chat_store is not None:
+            chat_store.close()
     
-    print(f"Successfully reformatted {len(quality_data)} conversations into {batch_num - 1} batch files")
+    print(f"Successfully reformatted {len(quality_data)} conversations: "
+          f"{written} batch files rebuilt, {unchanged} unchanged")
     print("✅ Improved classification complete!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
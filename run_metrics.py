@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing for the conversation organizer pipeline.
+
+Stage totals are summed across every thread and worker process that did the
+work, so with parallel scanning or batch writing they can exceed the wall
+clock time of the run. The run report also keeps the slowest individual
+files so a pathological chat is easy to spot.
+"""
+import heapq
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PIPELINE_STAGES = ('enumerate', 'read', 'prune', 'parse', 'classify', 'score', 'sort', 'format', 'write')
+SLOWEST_FILES = 20
+
+
+class RunMetrics:
+    def __init__(self, slowest_files=SLOWEST_FILES):
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stage_seconds = {stage: 0.0 for stage in PIPELINE_STAGES}
+        self.stage_calls = {stage: 0 for stage in PIPELINE_STAGES}
+        self.files = 0
+        self.bytes_read = 0
+        self.counters = {}
+        self._slowest_limit = slowest_files
+        self._slowest = []
+
+    def add(self, stage, seconds, calls=1):
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+            self.stage_calls[stage] = self.stage_calls.get(stage, 0) + calls
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code as one call of the named stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def count(self, name, amount=1):
+        """Bump a free-form counter that ends up in the run report"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_file(self, file_path, size, stage_times):
+        """Record one scanned file: its size and the seconds spent per stage"""
+        total = sum(stage_times.values())
+        with self._lock:
+            self.files += 1
+            self.bytes_read += size
+            for stage, seconds in stage_times.items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+                self.stage_calls[stage] = self.stage_calls.get(stage, 0) + 1
+            entry = (total, str(file_path), size)
+            if len(self._slowest) < self._slowest_limit:
+                heapq.heappush(self._slowest, entry)
+            elif total > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def to_dict(self):
+        wall_seconds = time.perf_counter() - self._start
+        scan_seconds = sum(self.stage_seconds.get(stage, 0.0) for stage in ('read', 'prune', 'parse', 'classify'))
+        return {
+            'started_at': self.started_at,
+            'wall_seconds': round(wall_seconds, 3),
+            'stages': {
+                stage: {'seconds': round(seconds, 4), 'calls': self.stage_calls.get(stage, 0)}
+                for stage, seconds in self.stage_seconds.items()
+            },
+            'files_scanned': self.files,
+            'bytes_read': self.bytes_read,
+            'files_per_sec': round(self.files / wall_seconds, 1) if wall_seconds else 0,
+            'scan_files_per_cpu_sec': round(self.files / scan_seconds, 1) if scan_seconds else 0,
+            'counters': dict(self.counters),
+            'slowest_files': [
+                {'file': path, 'seconds': round(seconds, 4), 'bytes': size}
+                for seconds, path, size in sorted(self._slowest, reverse=True)
+            ]
+        }
+
+    def write_report(self, path, **extra):
+        """Write the machine-readable run report as JSON"""
+        report = self.to_dict()
+        report.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
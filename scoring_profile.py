@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Declarative scoring profiles for the WhatsApp conversation quality analyzer.
+
+A profile is a JSON file holding the indicator lists used during feature
+extraction and the point rules applied to the extracted features. Profiles
+are compiled once into plain Python closures so scoring a stored feature set
+does not touch any chat file.
+
+Each rule also compiles an upper bound: the most points it could award when
+every feature is only known to lie in a range. The analyzer uses that to skip
+chats that cannot reach the current top-K without parsing them.
+"""
+import hashlib
+import json
+import math
+import operator
+from pathlib import Path
+
+DEFAULT_SCORING_PROFILE = Path(__file__).with_name('scoring_profile.json')
+
+_COMPARATORS = {
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+
+
+def _compile_checks(spec, rule_name):
+    """Turn {"gte": 10, "lt": 20, ...} into a tuple of (comparator, bound) pairs"""
+    checks = []
+    for key, bound in spec.items():
+        if key == 'points':
+            continue
+        if key not in _COMPARATORS:
+            raise ValueError(f"Unknown comparison '{key}' in scoring rule '{rule_name}'")
+        checks.append((_COMPARATORS[key], bound))
+    return tuple(checks)
+
+
+def _passes(checks, value):
+    for compare, bound in checks:
+        if not compare(value, bound):
+            return False
+    return True
+
+
+def _could_pass(checks, low, high):
+    """Whether some value in [low, high] might pass every check.
+
+    Strict comparisons are treated as inclusive, so this can answer yes
+    when the true answer is no, but never the other way round.
+    """
+    for compare, bound in checks:
+        if compare in (operator.gt, operator.ge):
+            low = max(low, bound)
+        else:
+            high = min(high, bound)
+    return low <= high
+
+
+def _compile_rule(rule):
+    """Compile a single profile rule into (scorer, bound).
+
+    scorer(features) returns the points for a feature dict; bound(ranges)
+    returns the most points any features within ranges could get, where
+    ranges maps a feature to (low, high) and unlisted features may take any
+    value, including None.
+    """
+    name = rule['name']
+    feature = rule['feature']
+    guards = tuple(
+        (guard_feature, _compile_checks(spec, name))
+        for guard_feature, spec in rule.get('when', {}).items()
+    )
+
+    if 'per_unit' in rule:
+        per_unit = rule['per_unit']
+        cap = rule.get('cap')
+
+        def award(value):
+            points = value * per_unit
+            return points if cap is None else min(points, cap)
+
+        def award_bound(low, high):
+            if per_unit == 0:
+                return 0
+            points = max(low * per_unit, high * per_unit)
+            return points if cap is None else min(points, cap)
+    elif 'buckets' in rule:
+        # First matching bucket wins, so list buckets from best to worst
+        buckets = tuple((_compile_checks(bucket, name), bucket['points']) for bucket in rule['buckets'])
+        default = rule.get('default', 0)
+
+        def award(value):
+            for checks, points in buckets:
+                if _passes(checks, value):
+                    return points
+            return default
+
+        def award_bound(low, high):
+            reachable = [points for checks, points in buckets if _could_pass(checks, low, high)]
+            return max(reachable + [default])
+    else:
+        raise ValueError(f"Scoring rule '{name}' needs either 'buckets' or 'per_unit'")
+
+    def scorer(features):
+        value = features.get(feature)
+        if value is None:
+            return 0
+        for guard_feature, checks in guards:
+            guard_value = features.get(guard_feature)
+            if guard_value is None or not _passes(checks, guard_value):
+                return 0
+        return award(value)
+
+    def bound(ranges):
+        low, high = ranges.get(feature, (-math.inf, math.inf))
+        best = award_bound(low, high)
+        # A missing feature or a failed guard scores 0
+        if feature not in ranges or guards:
+            best = max(best, 0)
+        for guard_feature, checks in guards:
+            guard_low, guard_high = ranges.get(guard_feature, (-math.inf, math.inf))
+            if not _could_pass(checks, guard_low, guard_high):
+                return 0
+        return best
+
+    return scorer, bound
+
+
+class ScoringProfile:
+    def __init__(self, profile):
+        # Keep the raw profile so it can be shipped to worker processes and recompiled there
+        self.source = profile
+        self.name = profile.get('name', 'unnamed')
+        self.version = profile['version']
+        self.min_messages = profile.get('min_messages', 2)
+        self.floor = profile.get('floor', 0)
+
+        indicators = profile.get('indicators', {})
+        self.question_words = tuple(indicators.get('question_words', []))
+        self.template_indicators = tuple(indicators.get('template_indicators', []))
+
+        # Feature extraction only depends on the indicator lists, so stored
+        # features stay valid across profiles that share this signature
+        signature_source = json.dumps({
+            'question_words': self.question_words,
+            'template_indicators': self.template_indicators,
+        }, sort_keys=True, ensure_ascii=False)
+        self.feature_signature = hashlib.sha1(signature_source.encode('utf-8')).hexdigest()[:16]
+        # Identifies the whole profile, so results scored on different machines can be combined safely
+        self.signature = hashlib.sha1(
+            json.dumps(profile, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+        self._rules = {}
+        bounds = []
+        for rule in profile.get('rules', []):
+            self._rules[rule['name']], bound = _compile_rule(rule)
+            bounds.append(bound)
+        self._scorers = tuple(self._rules.values())
+        self._bounds = tuple(bounds)
+
+    @property
+    def label(self):
+        return f"{self.name} v{self.version}"
+
+    def score(self, features):
+        """Score a feature dict; files below min_messages always score 0"""
+        if features.get('message_count', 0) < self.min_messages:
+            return 0
+        total = 0
+        for scorer in self._scorers:
+            total += scorer(features)
+        return max(self.floor, total)
+
+    def upper_bound(self, ranges):
+        """Highest score any features within ranges could get (see _compile_rule)"""
+        message_count = ranges.get('message_count')
+        if message_count is not None and message_count[1] < self.min_messages:
+            return 0
+        total = 0
+        for bound in self._bounds:
+            total += bound(ranges)
+        return max(self.floor, total)
+
+    def matches(self, rule_name, features):
+        """Return True if the named rule awarded positive points"""
+        scorer = self._rules.get(rule_name)
+        return bool(scorer and scorer(features) > 0)
+
+
+def load_scoring_profile(path=None):
+    """Load and compile a scoring profile (defaults to scoring_profile.json)"""
+    profile_path = Path(path) if path else DEFAULT_SCORING_PROFILE
+    with open(profile_path, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    return ScoringProfile(profile)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Split a scan across machines and merge the partial results.
+
+`--shard i/N` makes the organizer scan only the chats whose filename hashes
+to shard i of N (crc32, so every machine computes the same split without
+coordinating) and write that shard's top-K as a partial report instead of
+the final outputs:
+
+    partial_report_002_of_004.json
+
+`--merge partial_report_*.json` combines the N partial reports into the
+usual quality_analysis_report.json and batch files. Conversations are
+ranked by (-quality_score, filename), a total order, so every conversation
+in the overall top-K is also in its own shard's top-K, and a k-way merge of
+the partial lists gives exactly the single-machine ranking.
+
+Each partial report records its shard, the shard count, K and the scoring
+profile signature, and the merge refuses reports that don't fit together.
+"""
+import argparse
+import heapq
+import json
+import zlib
+from pathlib import Path
+
+PARTIAL_REPORT_FORMAT = 'partial_quality_report'
+PARTIAL_REPORT_PATTERN = 'partial_report_{index:03d}_of_{count:03d}.json'
+
+
+def parse_shard(spec):
+    """'i/N' -> (i, N) with 1 <= i <= N; for argparse type="""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like i/N, e.g. 1/4, got {spec!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {spec} is out of range; i must be between 1 and N")
+    return index, count
+
+
+def shard_of(filename, count):
+    """The 1-based shard a chat belongs to; stable across machines and Python runs"""
+    return zlib.crc32(filename.encode('utf-8')) % count + 1
+
+
+def in_shard(filename, shard):
+    index, count = shard
+    return shard_of(filename, count) == index
+
+
+def rank_key(conversation):
+    """Best first, ties broken by filename so the order never depends on which machine listed the file"""
+    return -conversation['quality_score'], conversation['filename']
+
+
+def partial_report_path(output_dir, shard):
+    index, count = shard
+    return Path(output_dir) / PARTIAL_REPORT_PATTERN.format(index=index, count=count)
+
+
+def write_partial_report(path, shard, conversations, top_k, scoring_profile, files_scanned, files_pruned=0):
+    """Write one shard's top_k ranked conversations (already sorted by rank_key)"""
+    index, count = shard
+    report = {
+        'format': PARTIAL_REPORT_FORMAT,
+        'shard': index,
+        'shard_count': count,
+        'top_k': top_k,
+        'scoring_profile': scoring_profile.label,
+        'profile_signature': scoring_profile.signature,
+        'files_scanned': files_scanned,
+        'conversations_ranked': len(conversations),
+        'files_pruned': files_pruned,
+        # file_path is machine specific; the merge resolves filenames against its own --chat-dir
+        'conversations': [
+            {'filename': conv['filename'], 'quality_score': conv['quality_score'], 'analysis': dict(conv['analysis'])}
+            for conv in conversations[:top_k]
+        ],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False)
+    return report
+
+
+def load_partial_reports(paths, scoring_profile, target):
+    """Read and check a complete set of partial reports; returns them ordered by shard"""
+    reports = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if report.get('format') != PARTIAL_REPORT_FORMAT:
+            raise ValueError(f"{path} is not a partial quality report")
+        report['path'] = str(path)
+        reports.append(report)
+    if not reports:
+        raise ValueError("No partial reports given")
+
+    count = reports[0]['shard_count']
+    shards = sorted(report['shard'] for report in reports)
+    if any(report['shard_count'] != count for report in reports):
+        raise ValueError("Partial reports come from different shard counts")
+    if shards != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(shards))
+        raise ValueError(f"Need exactly one report per shard 1..{count}; "
+                         f"missing {missing or 'none'}, got {shards}")
+    for report in reports:
+        if report['profile_signature'] != scoring_profile.signature:
+            raise ValueError(f"{report['path']} was scored with {report['scoring_profile']}, "
+                             f"not {scoring_profile.label}")
+        # A shard that kept (or, pruning, could prove) fewer than target could hide part of the overall top target
+        dropped = report['conversations_ranked'] > len(report['conversations']) or report.get('files_pruned')
+        if report['top_k'] < target and dropped:
+            raise ValueError(f"{report['path']} only kept its top {report['top_k']}; "
+                             f"rerun the shards with --target {target} or more")
+    return sorted(reports, key=lambda report: report['shard'])
+
+
+def merge_partial_reports(reports, target):
+    """The overall top target conversations from per-shard ranked lists"""
+    merged = heapq.merge(*(report['conversations'] for report in reports), key=rank_key)
+    return [conv for _, conv in zip(range(target), merged)]
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Watch the chat directory and feed new exports straight to the review web app.
+
+Otherwise a new WhatsApp export only reaches reviewers after a full organizer
+run, copy_data.py and a web app restart. watch_chats.py waits for new .txt
+files instead (inotify on Linux, polling elsewhere or with --poll), scores
+each one as the organizer does and, for those scoring at least --min-score:
+
+- links or copies the chat into the web app's chats/ directory, unless that
+  is the watched directory;
+- inserts it as pending into the conversations table, where the running web
+  app's review queue picks it up on the next request;
+- adds it to quality_analysis_report.json/.bin in the web app's data
+  directory, so a restart (or copy_data.py elsewhere) sees it too.
+
+--min-score defaults to the lowest score in the current report, the cut the
+last full run made. On start, chats modified after the report was written are
+scored first, so exports that arrived while the watcher was down are not
+missed. Chats that don't qualify are only remembered for this session, and
+are scored again if they are rewritten.
+
+Usage: python watch_chats.py --chat-dir /path/to/chats [--webapp-dir webapp] [--min-score 60] [--poll]
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import shutil
+import sqlite3
+import struct
+import sys
+import time
+from pathlib import Path
+
+from scoring_profile import load_scoring_profile
+from shard_report import rank_key
+from webapp.chat_store import is_chat_store
+from webapp.columnar_report import REPORT_BIN, REPORT_JSON, load_report_rows, write_columnar_report
+from webapp.fs_scan import iter_files
+from whatsapp_conversation_organizer import ConversationAnalyzer, report_row
+
+DEFAULT_WEBAPP_DIR = Path(__file__).resolve().parent / 'webapp'
+POLL_INTERVAL = 2.0
+# Exports tend to arrive in bursts; gather them until this much quiet, but
+# never hold the first one back longer than MAX_GATHER_SECONDS
+SETTLE_SECONDS = 0.2
+MAX_GATHER_SECONDS = 1.0
+MAX_BATCH = 500
+SQLITE_BUSY_TIMEOUT = 30
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def is_chat_name(name):
+    """The files iter_files lists: visible *.txt"""
+    return name.endswith('.txt') and not name.startswith('.')
+
+
+class InotifyWatcher:
+    """New and rewritten chats from Linux inotify, reported once the writer closes them.
+
+    When the kernel's event queue overflows, as in a big enough burst of exports,
+    events are lost; wait() then returns rescan() instead (by default every chat
+    in the directory).
+    """
+    kind = 'inotify'
+
+    def __init__(self, directory, rescan=None):
+        self.rescan = rescan or (lambda: {entry.name for entry in iter_files(directory)})
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Names of chats finished within timeout seconds"""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        names = set()
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                start = offset + INOTIFY_EVENT.size
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    names.add(os.fsdecode(data[start:start + length].rstrip(b'\0')))
+                offset = start + length
+        if overflowed:
+            print("⚠️  inotify event queue overflowed; rescanning the chat directory")
+            names |= self.rescan()
+        return {name for name in names if is_chat_name(name)}
+
+
+class PollingWatcher:
+    """New and rewritten chats from comparing directory listings, reported once their size and mtime settle"""
+    kind = 'polling'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._previous = self._snapshot()
+        self._changed = set()
+
+    def _snapshot(self):
+        snapshot = {}
+        for entry in iter_files(self.directory):
+            stat = entry.stat()
+            snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        current = self._snapshot()
+        # Changed in the last poll and unchanged since, so nothing is still writing it
+        ready = {name for name in self._changed if name in current and current[name] == self._previous.get(name)}
+        self._changed = {name for name, stat in current.items() if self._previous.get(name) != stat}
+        self._previous = current
+        return ready
+
+
+def open_watcher(directory, poll=False, rescan=None):
+    """inotify watcher, or a polling one; rescan() names the chats to check if inotify loses events"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory, rescan)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  inotify unavailable ({e}), polling instead")
+    return PollingWatcher(directory)
+
+
+class ChatIngest:
+    def __init__(self, analyzer, chat_dir, webapp_dir, min_score=None):
+        self.analyzer = analyzer
+        self.chat_dir = Path(chat_dir)
+        webapp_dir = Path(webapp_dir)
+        self.webapp_chat_dir = webapp_dir / 'chats'
+        self.data_dir = webapp_dir / 'organized_whatsapp_conversations'
+        self.db_path = webapp_dir / 'conversations.db'
+        self.copy_chats = self.webapp_chat_dir.resolve() != self.chat_dir.resolve()
+
+        report_path = self.data_dir / REPORT_JSON
+        try:
+            self.rows = load_report_rows(self.data_dir)
+            self.report_mtime = report_path.stat().st_mtime if report_path.exists() else 0
+        except FileNotFoundError:
+            self.rows = []
+            self.report_mtime = 0
+        self.known = {row['filename'] for row in self.rows}
+        if min_score is None:
+            min_score = min((row['quality_score'] for row in self.rows), default=1)
+        self.min_score = max(1, min_score)
+        # Scored this session without qualifying: name -> mtime_ns it had then
+        self.rejected = {}
+
+    def check_database(self):
+        """Fail early, with a hint, when the web app hasn't created its database yet"""
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT)
+        try:
+            conn.execute('SELECT 1 FROM conversations LIMIT 1')
+        except sqlite3.OperationalError:
+            raise SystemExit(f"❌ No conversations table in {self.db_path}; start the web app once to create it")
+        finally:
+            conn.close()
+
+    def arrived_since_report(self):
+        """Chats modified after the report was written that it doesn't list"""
+        return {entry.name for entry in iter_files(self.chat_dir)
+                if entry.name not in self.known and entry.stat().st_mtime > self.report_mtime}
+
+    def ingest(self, names):
+        """Score the named chats and publish the qualifying ones; returns how many were added"""
+        started = time.perf_counter()
+        accepted = []
+        scored = 0
+        for name in sorted(names):
+            path = self.chat_dir / name
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue  # Moved away again before we got to it
+            if name in self.known or self.rejected.get(name) == mtime:
+                continue
+            try:
+                quality_score, analysis = self.analyzer.score_features(self.analyzer.extract_features(path))
+            except Exception as e:
+                print(f"❌ Error scoring {name}: {e}")
+                continue
+            scored += 1
+            if quality_score < self.min_score:
+                self.rejected[name] = mtime
+                continue
+            accepted.append({'filename': name, 'file_path': str(path),
+                             'quality_score': quality_score, 'analysis': analysis})
+
+        if accepted:
+            for conv in accepted:
+                if self.copy_chats:
+                    self._publish_chat(Path(conv['file_path']))
+            added = self._insert_pending(accepted)
+            self._update_report(accepted)
+            self.known.update(conv['filename'] for conv in accepted)
+        else:
+            added = 0
+        if scored:
+            print(f"📥 Scored {scored} new chats in {time.perf_counter() - started:.2f}s: "
+                  f"{added} added for review (score >= {self.min_score:g})")
+        return added
+
+    def _publish_chat(self, source):
+        """Hardlink the chat into the web app's chats/, or copy it there under a temporary name first"""
+        self.webapp_chat_dir.mkdir(exist_ok=True)
+        dest = self.webapp_chat_dir / source.name
+        if dest.exists():
+            dest.unlink()
+        try:
+            os.link(source, dest)
+        except OSError:
+            partial = dest.with_name(dest.name + '.part')
+            shutil.copy2(source, partial)
+            os.replace(partial, dest)
+
+    def _insert_pending(self, accepted):
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT)
+        try:
+            with conn:
+                before = conn.total_changes
+                conn.executemany('''
+                    INSERT OR IGNORE INTO conversations (filename, quality_score, message_count)
+                    VALUES (?, ?, ?)
+                ''', [(conv['filename'], conv['quality_score'], conv['analysis']['message_count'])
+                      for conv in accepted])
+                return conn.total_changes - before
+        finally:
+            conn.close()
+
+    def _update_report(self, accepted):
+        """Rewrite both report files with the new rows ranked in, each replaced atomically"""
+        self.rows.extend(report_row(conv) for conv in accepted)
+        self.rows.sort(key=rank_key)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+
+        json_path = self.data_dir / REPORT_JSON
+        partial = json_path.with_name(json_path.name + '.part')
+        with open(partial, 'w', encoding='utf-8') as f:
+            json.dump(self.rows, f, indent=2, ensure_ascii=False)
+        os.replace(partial, json_path)
+        # Written second, so the .bin stays at least as new as the JSON and readers keep using it
+        bin_path = self.data_dir / REPORT_BIN
+        partial = bin_path.with_name(bin_path.name + '.part')
+        write_columnar_report(partial, self.rows)
+        os.replace(partial, bin_path)
+        self.report_mtime = json_path.stat().st_mtime
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score new chat exports as they arrive and queue them for review")
+    parser.add_argument('--chat-dir', required=True, help="Directory the WhatsApp .txt exports arrive in")
+    parser.add_argument('--webapp-dir', default=str(DEFAULT_WEBAPP_DIR),
+                        help="Web app directory holding conversations.db, chats/ and the quality report")
+    parser.add_argument('--scoring-profile', default=None,
+                        help="Scoring profile JSON (defaults to scoring_profile.json)")
+    parser.add_argument('--min-score', type=float, default=None,
+                        help="Lowest score to queue for review (defaults to the lowest score in the report)")
+    parser.add_argument('--poll', action='store_true', help="Poll the directory instead of using inotify")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help="Seconds between directory polls")
+    parser.add_argument('--once', action='store_true',
+                        help="Only ingest the chats that arrived since the report was written, then exit")
+    args = parser.parse_args(argv)
+    if is_chat_store(args.chat_dir):
+        parser.error("--chat-dir is a packed chat store; watch the directory the loose exports arrive in")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    analyzer = ConversationAnalyzer(args.chat_dir, load_scoring_profile(args.scoring_profile))
+    ingest = ChatIngest(analyzer, args.chat_dir, args.webapp_dir, args.min_score)
+    ingest.check_database()
+    print(f"Scoring profile: {analyzer.scoring_profile.label}")
+    print(f"Report lists {len(ingest.rows)} conversations; queueing new chats scoring >= {ingest.min_score:g}")
+
+    # Start watching before catching up so nothing written in between is missed
+    watcher = None
+    if not args.once:
+        watcher = open_watcher(args.chat_dir, poll=args.poll, rescan=ingest.arrived_since_report)
+    missed = ingest.arrived_since_report()
+    if missed:
+        print(f"🔎 {len(missed)} chats arrived since the report was written")
+        for start in range(0, len(missed), MAX_BATCH):
+            ingest.ingest(sorted(missed)[start:start + MAX_BATCH])
+    if watcher is None:
+        return
+
+    print(f"👀 Watching {args.chat_dir} ({watcher.kind}); Ctrl+C to stop")
+    timeout = args.interval if watcher.kind == 'polling' else None
+    try:
+        while True:
+            names = watcher.wait(timeout)
+            gather_until = time.monotonic() + MAX_GATHER_SECONDS
+            while names and len(names) < MAX_BATCH and time.monotonic() < gather_until:
+                more = watcher.wait(SETTLE_SECONDS if watcher.kind == 'inotify' else args.interval)
+                if not more:
+                    break
+                names |= more
+            if names:
+                ingest.ingest(names)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
 from flask import Flask, render_template, request, jsonify, redirect, url_for
+from markupsafe import Markup
+import hashlib
 import json
 import re
 from pathlib import Path
-from datetime import datetime
-import sqlite3
+from datetime import datetime, timedelta
 import os
+import threading
+
+from chat_store import open_chat_store
+from columnar_report import REPORT_JSON, columnar_report_is_current, load_report_rows
+from conversation_cache import ConversationCache
+from fragment_cache import FragmentCache
+from http_caching import compress_responses, make_etag, not_modified, with_etag
+from message_records import ROLES, ConversationBuilder, ParsedConversation
+from metrics import instrument_app, instrumented_connect, registry as metrics_registry
+from multiturn_export import BUDGET_UNITS, iter_windows, length_function, merge_turns
 
 app = Flask(__name__)
 
@@ -13,10 +24,97 @@ app = Flask(__name__)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "organized_whatsapp_conversations") 
 CHAT_DIR = os.path.join(BASE_DIR, "chats")
+CHAT_STORE_DIR = os.path.join(BASE_DIR, "chat_store")
 DB_PATH = os.path.join(BASE_DIR, "conversations.db")
+# Seconds a connection waits for another worker's write lock before giving up
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', '30'))
+# Parsed conversations kept in memory, and how many upcoming pending ones to parse ahead
+CONVERSATION_CACHE_SIZE = int(os.environ.get('CONVERSATION_CACHE_SIZE', '512'))
+PREFETCH_AHEAD = int(os.environ.get('PREFETCH_AHEAD', '10'))
+PREFETCH_WORKERS = 2
+# Memory for rendered message cards, reused until a conversation is edited
+FRAGMENT_CACHE_MB = int(os.environ.get('FRAGMENT_CACHE_MB', '64'))
+# Each reviewer holds a batch of pending conversations for this long; unfinished
+# claims go back to the pool once the lease runs out
+CLAIM_BATCH_SIZE = 10
+CLAIM_LEASE_MINUTES = int(os.environ.get('CLAIM_LEASE_MINUTES', '30'))
+# Default size limit of one multi-turn export sample (override with ?budget=&unit=)
+MULTITURN_BUDGET = int(os.environ.get('MULTITURN_BUDGET', '4096'))
+MULTITURN_BUDGET_UNIT = os.environ.get('MULTITURN_BUDGET_UNIT', 'tokens')
+# Messages per window of the conversation view; the page renders the first
+# and loads the rest from /api/messages as the reviewer scrolls
+MESSAGE_WINDOW = int(os.environ.get('MESSAGE_WINDOW', '100'))
+MAX_MESSAGE_WINDOW = 1000
+
+instrument_app(app)
+compress_responses(app)
+
+def _template_version():
+    """Digest of the templates, part of the validators of every rendered page"""
+    digest = hashlib.sha1()
+    for path in sorted(Path(BASE_DIR, 'templates').glob('*.html')):
+        digest.update(path.name.encode('utf-8'))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+TEMPLATE_VERSION = _template_version()
+
+# When the last connection to a WAL database closes, SQLite checkpoints it and
+# deletes the -wal/-shm files, which the next request then has to recreate.
+# One idle connection per process keeps them open. SQLite connections must not
+# cross a fork, and gunicorn forks its workers after the app (and its database
+# setup) is loaded, so the keepalive is closed before every fork and each
+# process opens its own on its first connection.
+_wal_keepalive = {}
+_wal_keepalive_lock = threading.Lock()
+
+def _close_wal_keepalive():
+    with _wal_keepalive_lock:
+        keepalive = _wal_keepalive.pop(os.getpid(), None)
+        if keepalive is not None:
+            keepalive.close()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_close_wal_keepalive)
+
+def _keep_wal_open():
+    pid = os.getpid()
+    if pid in _wal_keepalive:
+        return
+    with _wal_keepalive_lock:
+        if pid not in _wal_keepalive:
+            keepalive = instrumented_connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT)
+            # Write-ahead logging lets reviewers keep reading while another request
+            # writes; the mode is stored in the database file, so this is a no-op
+            # after the first run
+            keepalive.execute('PRAGMA journal_mode = WAL').fetchone()
+            # A read is what attaches the connection to the -wal/-shm files
+            keepalive.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            _wal_keepalive[pid] = keepalive
+
+def connect_db():
+    """Open a connection to the progress database; statements are timed for /metrics.
+
+    Each request opens its own connection, so this is safe under a threaded
+    or multi-process WSGI server. Writers wait up to SQLITE_BUSY_TIMEOUT for
+    the lock instead of failing with "database is locked".
+    """
+    _keep_wal_open()
+    conn = instrumented_connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT)
+    # Under WAL, NORMAL skips the fsync per commit; a power cut can lose the
+    # last few reviews but cannot corrupt the database
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
 
 class ConversationManager:
     def __init__(self):
+        # Packed chat store, used for chats that have no loose .txt file in CHAT_DIR
+        self.chat_store = open_chat_store(CHAT_STORE_DIR)
+        self.conversation_cache = ConversationCache(self._load_conversation_content,
+                                                    max_entries=CONVERSATION_CACHE_SIZE,
+                                                    prefetch_workers=PREFETCH_WORKERS,
+                                                    metrics=metrics_registry)
+        self.fragment_cache = FragmentCache(max_bytes=FRAGMENT_CACHE_MB * 1024 * 1024, metrics=metrics_registry)
         self.init_database()
         self.load_conversations()
     
@@ -27,7 +125,8 @@ class ConversationManager:
         if db_dir:  # Only create directory if DB_PATH has a directory component
             os.makedirs(db_dir, exist_ok=True)
         
-        conn = sqlite3.connect(DB_PATH)
+        # Also switches the database to WAL
+        conn = connect_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -41,10 +140,22 @@ class ConversationManager:
                 reviewed_at TIMESTAMP,
                 accepted BOOLEAN,
                 notes TEXT,
-                corrected_messages TEXT
+                corrected_messages TEXT,
+                claimed_by TEXT,
+                lease_expires_at TIMESTAMP,
+                pairs_computed_at TIMESTAMP,
+                edit_version INTEGER DEFAULT 0
             )
         ''')
         
+        # Older databases lack the work claiming, training pair and edit version columns
+        cursor.execute('PRAGMA table_info(conversations)')
+        columns = {row[1] for row in cursor.fetchall()}
+        for column, column_type in (('claimed_by', 'TEXT'), ('lease_expires_at', 'TIMESTAMP'),
+                                    ('pairs_computed_at', 'TIMESTAMP'), ('edit_version', 'INTEGER DEFAULT 0')):
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE conversations ADD COLUMN {column} {column_type}')
+        
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS team_progress (
                 reviewer TEXT PRIMARY KEY,
@@ -55,18 +166,37 @@ class ConversationManager:
             )
         ''')
         
+        # Cleaned guest -> agent pairs of each conversation, kept current with
+        # its messages (pairs_computed_at is set once they are), so exports
+        # read them instead of parsing every accepted conversation
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS training_pairs (
+                filename TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                user_content TEXT NOT NULL,
+                assistant_content TEXT NOT NULL,
+                PRIMARY KEY (filename, position)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Serves the pending queue (/review) and the prefetch look-ahead in index order
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_conversations_queue
+            ON conversations (status, quality_score DESC, message_count DESC)
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_claims ON conversations (claimed_by)')
+        
         conn.commit()
         conn.close()
     
     def load_conversations(self):
         """Load conversations from quality report OR extract from batch files"""
-        quality_report_path = os.path.join(DATA_DIR, "quality_analysis_report.json")
+        quality_report_path = os.path.join(DATA_DIR, REPORT_JSON)
         
-        # Try to load from quality report first
-        if os.path.exists(quality_report_path):
+        # Try to load from quality report first (columnar .bin when it is current)
+        if os.path.exists(quality_report_path) or columnar_report_is_current(DATA_DIR):
             try:
-                with open(quality_report_path, 'r', encoding='utf-8') as f:
-                    quality_data = json.load(f)
+                quality_data = load_report_rows(DATA_DIR, ['filename', 'quality_score', 'message_count'])
                 self._load_from_quality_data(quality_data)
                 return
             except Exception as e:
@@ -90,7 +220,7 @@ class ConversationManager:
     
     def _load_from_quality_data(self, quality_data):
         """Load conversation data into database"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         for conv in quality_data:
@@ -161,8 +291,9 @@ class ConversationManager:
             elif line.startswith('Quality Score:') and current_conv:
                 try:
                     score_part = line.split('Quality Score: ')[1]
-                    score = int(score_part.split(',')[0] if ',' in score_part else score_part)
-                    current_conv['quality_score'] = score
+                    # Profiles with fractional points give fractional scores; whole ones stay ints
+                    score = float(score_part.split(',')[0] if ',' in score_part else score_part)
+                    current_conv['quality_score'] = int(score) if score.is_integer() else score
                 except:
                     pass
             
@@ -190,12 +321,73 @@ class ConversationManager:
         
         return conversations
     
-    def get_conversation_content(self, filename):
+    def get_conversation_content(self, filename, use_cache=True):
+        """Parsed messages of a conversation, served from the cache when prefetched.
+
+        The cache holds compact ParsedConversation records; each call gets new
+        message dicts, which callers such as find/replace edit in place.
+        use_cache=False skips adding the result to the cache.
+        """
+        return list(self.conversation_cache.get(filename, store=use_cache))
+    
+    def get_current_messages(self, filename):
+        """(messages, has_saved_edits, edit_version, content_tag) of the version reviewers see.
+
+        messages are the saved edits as a list of dicts, or else the cached
+        ParsedConversation, which must not be modified; slice it to get dicts.
+        edit_version counts the saves, so clients can tell their copy is stale.
+        content_tag is a digest of the messages, for validators of responses made from them.
+        """
+        conn = connect_db()
+        cursor = conn.cursor()
+        cursor.execute('SELECT corrected_messages, edit_version FROM conversations WHERE filename = ?',
+                       (filename,))
+        row = cursor.fetchone()
+        conn.close()
+        edit_version = (row[1] or 0) if row else 0
+        if row and row[0]:
+            try:
+                content_tag = hashlib.sha1(row[0].encode('utf-8')).hexdigest()
+                return with_unique_ids(json.loads(row[0])), True, edit_version, content_tag
+            except Exception as e:
+                print(f"⚠️  Error loading edited messages for {filename}: {e}")
+        messages = self.conversation_cache.get(filename)
+        return messages, False, edit_version, messages.digest()
+    
+    def prefetch_conversations(self, filenames):
+        """Parse conversations a reviewer is about to open on the background pool"""
+        if PREFETCH_AHEAD > 0 and filenames:
+            self.conversation_cache.prefetch(filenames[:PREFETCH_AHEAD])
+    
+    def prefetch_after(self, filename):
+        """Prefetch the conversations queued after filename, without blocking the request"""
+        if PREFETCH_AHEAD > 0:
+            self.conversation_cache.submit(
+                lambda: self.prefetch_conversations(self.get_next_pending(filename)))
+    
+    def get_next_pending(self, filename, limit=PREFETCH_AHEAD):
+        """Filenames that follow filename in its reviewer's claimed batch (or the unclaimed pool)"""
+        conn = connect_db()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT filename FROM conversations
+            WHERE status = 'pending' AND filename != :filename
+              AND claimed_by IS (SELECT claimed_by FROM conversations WHERE filename = :filename)
+              AND (quality_score, message_count) <= (
+                  SELECT quality_score, message_count FROM conversations WHERE filename = :filename)
+            ORDER BY quality_score DESC, message_count DESC
+            LIMIT :limit
+        ''', {'filename': filename, 'limit': limit})
+        filenames = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return filenames
+    
+    def _load_conversation_content(self, filename):
         """Load and parse a specific conversation from batch files"""
         try:
             # First try to load from individual chat file
             file_path = Path(CHAT_DIR) / filename
-            if os.path.exists(file_path):
+            if os.path.exists(file_path) or (self.chat_store is not None and filename in self.chat_store):
                 return self._parse_individual_chat_file(file_path)
             
             # If individual file doesn't exist, extract from batch files
@@ -203,15 +395,21 @@ class ConversationManager:
             
         except Exception as e:
             print(f"Error loading conversation {filename}: {e}")
-            return []
+            return ConversationBuilder().build()
+    
+    def _read_chat_text(self, file_path):
+        """Read a chat from its loose .txt file, falling back to the packed chat store"""
+        if self.chat_store is not None and not os.path.exists(file_path):
+            return self.chat_store.read_text(Path(file_path).name)
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
     
     def _parse_individual_chat_file(self, file_path):
         """Parse messages from individual chat file"""
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        content = self._read_chat_text(file_path)
         
         lines = content.strip().split('\n')
-        messages = []
+        messages = ConversationBuilder()
         
         # Known agent names
         agent_names = {
@@ -261,16 +459,9 @@ class ConversationManager:
                     elif any(name in message_text.lower() for name in agent_names):
                         role = "agent"
                     
-                    messages.append({
-                        'id': i,
-                        'timestamp': timestamp,
-                        'role': role,
-                        'text': message_text,
-                        'sender_name': sender_name,
-                        'actual_message': actual_message
-                    })
+                    messages.add(i, timestamp, role, message_text, sender_name, actual_message)
         
-        return messages
+        return messages.build()
     
     def _extract_conversation_from_batches(self, filename):
         """Extract a specific conversation from batch files"""
@@ -289,16 +480,16 @@ class ConversationManager:
             except Exception as e:
                 print(f"Error searching in {batch_file.name}: {e}")
         
-        # If not found, return empty list
+        # If not found, return no messages
         print(f"Conversation {filename} not found in batch files")
-        return []
+        return ConversationBuilder().build()
     
     def _find_conversation_in_batch(self, content, target_filename):
         """Find and extract a specific conversation from batch content"""
         lines = content.split('\n')
         in_target_conversation = False
         in_messages_section = False
-        messages = []
+        messages = ConversationBuilder()
         message_id = 0
         
         for line in lines:
@@ -331,21 +522,22 @@ class ConversationManager:
                         from datetime import datetime
                         timestamp = datetime.now().strftime('%m/%d/%Y %H:%M:%S')
                         
-                        messages.append({
-                            'id': message_id,
-                            'timestamp': timestamp,
-                            'role': role,
-                            'text': f"{role}: {message_text}",
-                            'sender_name': role,
-                            'actual_message': message_text
-                        })
+                        messages.add(message_id, timestamp, role, f"{role}: {message_text}", role, message_text)
                         message_id += 1
         
-        return messages if in_target_conversation else []
+        return messages.build() if in_target_conversation else ConversationBuilder().build()
     
     def get_conversations_for_review(self, reviewer=None, status='pending', limit=50, offset=0):
-        """Get conversations for review with pagination"""
-        conn = sqlite3.connect(DB_PATH)
+        """Get conversations for review with pagination.
+
+        For a reviewer's pending queue this is their own claimed batch of up
+        to `limit` conversations (see claim_conversations) instead of a page.
+        """
+        if reviewer and status == 'pending':
+            conversations = self.claim_conversations(reviewer, limit)
+            return conversations, len(conversations)
+        
+        conn = connect_db()
         cursor = conn.cursor()
         
         query = '''
@@ -379,45 +571,229 @@ class ConversationManager:
         
         return conversations, total_count
     
-    def update_conversation_status(self, filename, reviewer, accepted, notes="", corrected_messages=None):
-        """Update conversation review status"""
-        conn = sqlite3.connect(DB_PATH)
+    def claim_conversations(self, reviewer, batch_size=CLAIM_BATCH_SIZE):
+        """Atomically claim a batch of pending conversations for a reviewer.
+
+        The reviewer's existing claims are renewed first, then the batch is
+        topped up from the pool: unclaimed conversations and ones whose lease
+        has expired. It is a single UPDATE ... RETURNING, so two reviewers
+        can never be handed the same conversation.
+        """
+        now = datetime.now()
+        lease_expires_at = (now + timedelta(minutes=CLAIM_LEASE_MINUTES)).isoformat(timespec='seconds')
+        
+        conn = connect_db()
         cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE conversations
+            SET claimed_by = :reviewer, lease_expires_at = :lease_expires_at
+            WHERE id IN (
+                SELECT id FROM conversations
+                WHERE claimed_by = :reviewer AND status = 'pending'
+                UNION ALL
+                SELECT id FROM (
+                    SELECT id FROM conversations
+                    WHERE status = 'pending'
+                      AND (claimed_by IS NULL OR (lease_expires_at <= :now AND claimed_by != :reviewer))
+                    ORDER BY quality_score DESC, message_count DESC
+                    LIMIT max(0, :batch_size - (
+                        SELECT COUNT(*) FROM conversations
+                        WHERE claimed_by = :reviewer AND status = 'pending'))
+                )
+            )
+            RETURNING filename, quality_score, message_count, status, reviewer, notes, accepted
+        ''', {
+            'reviewer': reviewer,
+            'lease_expires_at': lease_expires_at,
+            'now': now.isoformat(timespec='seconds'),
+            'batch_size': batch_size
+        })
+        results = cursor.fetchall()
+        conn.commit()
+        conn.close()
         
-        status = 'reviewed'
+        conversations = [{
+            'filename': row[0],
+            'quality_score': row[1],
+            'message_count': row[2],
+            'status': row[3],
+            'reviewer': row[4],
+            'notes': row[5],
+            'accepted': row[6],
+            'lease_expires_at': lease_expires_at
+        } for row in results]
+        # RETURNING comes back in storage order, not queue order
+        conversations.sort(key=lambda conv: (conv['quality_score'], conv['message_count']), reverse=True)
+        return conversations
+    
+    def count_unclaimed(self):
+        """Pending conversations nobody holds a live lease on"""
+        conn = connect_db()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*) FROM conversations
+            WHERE status = 'pending' AND (claimed_by IS NULL OR lease_expires_at <= ?)
+        ''', (datetime.now().isoformat(timespec='seconds'),))
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
+    def update_conversation_status(self, filename, reviewer, accepted, notes="", corrected_messages=None):
+        """Update conversation review status"""
+        self.apply_reviews([{
+            'filename': filename, 'reviewer': reviewer, 'accepted': accepted,
+            'notes': notes, 'corrected_messages': corrected_messages,
+        }])
+    
+    def apply_reviews(self, reviews):
+        """Record many review decisions in one transaction.
+
+        Each review is a dict with filename, reviewer, accepted and optionally
+        notes and corrected_messages (a JSON string; None keeps the existing
+        corrections). team_progress gets one upsert per reviewer with the
+        summed counts. Returns the number of conversations updated.
+        """
         timestamp = datetime.now().isoformat()
-        
-        # If no corrected_messages provided, preserve existing ones
-        if corrected_messages is None:
-            cursor.execute('''
-                UPDATE conversations 
-                SET status = ?, reviewer = ?, reviewed_at = ?, accepted = ?, notes = ?
-                WHERE filename = ?
-            ''', (status, reviewer, timestamp, accepted, notes, filename))
+        totals = {}
+        # Parse accepted conversations before taking the write lock
+        pairs = self._pairs_for_accepted(reviews)
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            for review in reviews:
+                reviewer = review['reviewer']
+                accepted = review['accepted']
+                corrected_messages = review.get('corrected_messages')
+                cursor.execute('''
+                    UPDATE conversations 
+                    SET status = 'reviewed', reviewer = ?, reviewed_at = ?, accepted = ?, notes = ?,
+                        corrected_messages = COALESCE(?, corrected_messages),
+                        edit_version = COALESCE(edit_version, 0) + (? IS NOT NULL),
+                        pairs_computed_at = CASE WHEN ? IS NULL THEN pairs_computed_at END,
+                        claimed_by = NULL, lease_expires_at = NULL
+                    WHERE filename = ?
+                ''', (reviewer, timestamp, accepted, review.get('notes', ''),
+                      corrected_messages, corrected_messages, corrected_messages, review['filename']))
+                if cursor.rowcount:
+                    counts = totals.setdefault(reviewer, [0, 0, 0])
+                    counts[0] += 1
+                    counts[1 if accepted else 2] += 1
+                    if review['filename'] in pairs:
+                        self._store_training_pairs(cursor, review['filename'], pairs.pop(review['filename']))
+            
+            # Update team progress
+            cursor.executemany('''
+                INSERT INTO team_progress (reviewer, total_reviewed, accepted, rejected, last_active)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (reviewer) DO UPDATE SET
+                    total_reviewed = total_reviewed + excluded.total_reviewed,
+                    accepted = accepted + excluded.accepted,
+                    rejected = rejected + excluded.rejected,
+                    last_active = excluded.last_active
+            ''', [(reviewer, *counts, timestamp) for reviewer, counts in totals.items()])
+            
+            conn.commit()
+        finally:
+            conn.close()
+        for review in reviews:
+            if review.get('corrected_messages') is not None:
+                self.fragment_cache.invalidate(review['filename'])
+        return sum(counts[0] for counts in totals.values())
+    
+    def _pairs_for_accepted(self, reviews):
+        """Training pairs of the accepted reviews whose stored pairs are missing or outdated"""
+        pairs = {}
+        conn = connect_db()
+        cursor = conn.cursor()
+        for review in reviews:
+            if not review['accepted']:
+                continue
+            filename = review['filename']
+            corrected_messages = review.get('corrected_messages')
+            if corrected_messages is None:
+                cursor.execute('SELECT corrected_messages, pairs_computed_at FROM conversations WHERE filename = ?',
+                               (filename,))
+                row = cursor.fetchone()
+                if row is None or row[1]:
+                    continue
+                corrected_messages = row[0]
+            pairs[filename] = self._training_pairs_of(filename, corrected_messages)
+        conn.close()
+        return pairs
+    
+    def _training_pairs_of(self, filename, corrected_messages_json, use_cache=True):
+        if corrected_messages_json:
+            messages = json.loads(corrected_messages_json)
         else:
+            messages = self.get_conversation_content(filename, use_cache=use_cache)
+        return extract_training_pairs(messages)
+    
+    def _store_training_pairs(self, cursor, filename, pairs):
+        """Replace the stored pairs of filename; runs inside the caller's transaction"""
+        cursor.execute('DELETE FROM training_pairs WHERE filename = ?', (filename,))
+        cursor.executemany('''
+            INSERT INTO training_pairs (filename, position, user_content, assistant_content)
+            VALUES (?, ?, ?, ?)
+        ''', [(filename, position, user_content, assistant_content)
+              for position, (user_content, assistant_content) in enumerate(pairs)])
+        cursor.execute('UPDATE conversations SET pairs_computed_at = ? WHERE filename = ?',
+                       (datetime.now().isoformat(), filename))
+    
+    def save_corrected_messages(self, filename, messages, expected_version=None):
+        """Persist edited messages together with the training pairs derived from them.
+
+        Returns the new edit_version, or None if expected_version is given and
+        someone saved another version first (nothing is written then).
+        """
+        pairs = extract_training_pairs(messages)
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
             cursor.execute('''
                 UPDATE conversations 
-                SET status = ?, reviewer = ?, reviewed_at = ?, accepted = ?, notes = ?, corrected_messages = ?
-                WHERE filename = ?
-            ''', (status, reviewer, timestamp, accepted, notes, corrected_messages, filename))
-        
-        # Update team progress
+                SET corrected_messages = ?, edit_version = COALESCE(edit_version, 0) + 1
+                WHERE filename = ? AND (? IS NULL OR COALESCE(edit_version, 0) = ?)
+                RETURNING edit_version
+            ''', (json.dumps(messages), filename, expected_version, expected_version))
+            row = cursor.fetchone()
+            if row:
+                self._store_training_pairs(cursor, filename, pairs)
+            conn.commit()
+        finally:
+            conn.close()
+        if row:
+            self.fragment_cache.invalidate(filename)
+        return row[0] if row else None
+    
+    def ensure_training_pairs(self):
+        """Extract pairs for accepted conversations that have none yet, e.g. reviewed before pairs were stored"""
+        conn = connect_db()
+        cursor = conn.cursor()
         cursor.execute('''
-            INSERT OR REPLACE INTO team_progress 
-            (reviewer, total_reviewed, accepted, rejected, last_active)
-            VALUES (?, 
-                COALESCE((SELECT total_reviewed FROM team_progress WHERE reviewer = ?), 0) + 1,
-                COALESCE((SELECT accepted FROM team_progress WHERE reviewer = ?), 0) + ?,
-                COALESCE((SELECT rejected FROM team_progress WHERE reviewer = ?), 0) + ?,
-                ?)
-        ''', (reviewer, reviewer, reviewer, 1 if accepted else 0, reviewer, 0 if accepted else 1, timestamp))
-        
-        conn.commit()
+            SELECT filename, corrected_messages FROM conversations
+            WHERE accepted = 1 AND status = "reviewed" AND pairs_computed_at IS NULL
+        ''')
+        missing = cursor.fetchall()
         conn.close()
+        if not missing:
+            return 0
+        
+        pairs = {filename: self._training_pairs_of(filename, corrected_messages, use_cache=False)
+                 for filename, corrected_messages in missing}
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            for filename, conversation_pairs in pairs.items():
+                self._store_training_pairs(cursor, filename, conversation_pairs)
+            conn.commit()
+        finally:
+            conn.close()
+        print(f"🧮 Extracted training pairs for {len(pairs)} accepted conversations")
+        return len(pairs)
     
     def get_team_progress(self):
         """Get progress statistics for both team members"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM team_progress')
@@ -456,26 +832,25 @@ def index():
 
 @app.route('/review')
 def review():
-    """Conversation review interface"""
-    page = int(request.args.get('page', 1))
+    """Conversation review interface: the reviewer's own claimed batch"""
     reviewer = request.args.get('reviewer', 'Team Member')
-    limit = 10
-    offset = (page - 1) * limit
     
-    conversations, total_count = conv_manager.get_conversations_for_review(
+    # Renews the reviewer's leases and tops the batch up from the pool
+    conversations, claimed_count = conv_manager.get_conversations_for_review(
         reviewer=reviewer, 
         status='pending', 
-        limit=limit, 
-        offset=offset
+        limit=CLAIM_BATCH_SIZE
     )
     
-    total_pages = (total_count + limit - 1) // limit
+    # The reviewer opens these next, in order; have them parsed by then
+    conv_manager.prefetch_conversations([conv['filename'] for conv in conversations])
     
+    lease_expires_at = conversations[0]['lease_expires_at'] if conversations else None
     return render_template('review.html', 
                          conversations=conversations,
-                         current_page=page,
-                         total_pages=total_pages,
-                         total_count=total_count,
+                         claimed_count=claimed_count,
+                         unclaimed_count=conv_manager.count_unclaimed(),
+                         lease_expires_at=lease_expires_at,
                          reviewer=reviewer)
 
 @app.route('/approved')
@@ -496,7 +871,7 @@ def approved():
     approved_count = len(approved_conversations)
     
     # Get total approved count
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     cursor = conn.cursor()
     cursor.execute('SELECT COUNT(*) FROM conversations WHERE status = "reviewed" AND accepted = 1')
     total_approved = cursor.fetchone()[0]
@@ -512,38 +887,84 @@ def approved():
 
 @app.route('/conversation/<filename>')
 def view_conversation(filename):
-    """View individual conversation for detailed review"""
-    # First get the original messages
-    messages = conv_manager.get_conversation_content(filename)
+    """View individual conversation for detailed review.
+
+    Only the first MESSAGE_WINDOW messages are rendered; the page fetches the
+    rest from /api/messages as the reviewer scrolls. ?all=1 renders them all.
+    """
+    # The saved edits if there are any, else the original messages
+    messages, has_saved_edits, edit_version, content_tag = conv_manager.get_current_messages(filename)
+    show_all = bool(request.args.get('all'))
     
-    # Check if there are saved edits for this conversation
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT corrected_messages FROM conversations WHERE filename = ?', (filename,))
-        result = cursor.fetchone()
-        conn.close()
-        
-        has_saved_edits = bool(result and result[0])
-        
-        # If there are saved edits, use them instead of the original messages
-        if has_saved_edits and result[0]:
-            try:
-                edited_messages = json.loads(result[0])
-                messages = edited_messages
-                print(f"✅ Loaded edited version of {filename} with {len(messages)} messages")
-            except Exception as e:
-                print(f"⚠️  Error loading edited messages for {filename}: {e}")
-                # Fall back to original messages
-        
-    except Exception as e:
-        has_saved_edits = False
-        print(f"Error checking for saved edits: {e}")
+    # The page is the same until the conversation, its edit version or a template changes
+    etag = make_etag('conversation', TEMPLATE_VERSION, MESSAGE_WINDOW, filename, content_tag, edit_version,
+                     has_saved_edits, show_all)
+    response = not_modified(etag)
+    if response is None:
+        if has_saved_edits:
+            print(f"✅ Loaded edited version of {filename} with {len(messages)} messages")
+        
+        role_counts, next_message_id = message_summary(messages)
+        window = min(len(messages), len(messages) if show_all else MESSAGE_WINDOW)
+        html = render_template('conversation.html', 
+                             filename=filename, 
+                             message_cards=Markup(render_message_cards(filename, messages, 0, window, has_saved_edits,
+                                                                       edit_version, content_tag)),
+                             loaded_messages=window,
+                             total_messages=len(messages),
+                             role_counts=role_counts,
+                             next_message_id=next_message_id,
+                             edit_version=edit_version,
+                             message_window=MESSAGE_WINDOW,
+                             has_saved_edits=has_saved_edits)
+        response = with_etag(html, etag)
+    
+    # Queued after rendering so the look-ahead doesn't compete with this request
+    conv_manager.prefetch_after(filename)
+    return response
+
+@app.route('/api/messages/<filename>')
+def api_messages(filename):
+    """One window of a conversation's current messages: ?start=0&limit=MESSAGE_WINDOW&format=json|html.
+
+    format=html returns the rendered message cards instead of the messages.
+    version is the conversation's edit_version; positions only hold within one version.
+    """
+    start = max(request.args.get('start', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', MESSAGE_WINDOW, type=int), 1), MAX_MESSAGE_WINDOW)
+    as_html = request.args.get('format') == 'html'
+    messages, has_saved_edits, edit_version, content_tag = conv_manager.get_current_messages(filename)
+    
+    etag = make_etag('messages', TEMPLATE_VERSION if as_html else None, filename, content_tag, edit_version,
+                     has_saved_edits, start, limit)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
-    return render_template('conversation.html', 
-                         filename=filename, 
-                         messages=messages,
-                         has_saved_edits=has_saved_edits)
+    end = min(start + limit, len(messages))
+    
+    response = {
+        'status': 'success',
+        'filename': filename,
+        'start': start,
+        'end': max(start, end),
+        'total': len(messages),
+        'version': edit_version
+    }
+    if as_html:
+        response['html'] = render_message_cards(filename, messages, start, end, has_saved_edits, edit_version,
+                                                content_tag)
+    else:
+        response['messages'] = messages[start:end]
+    return with_etag(jsonify(response), etag)
+
+def render_message_cards(filename, messages, start, end, has_saved_edits, edit_version, content_tag):
+    """HTML of the cards of messages[start:end], rendered once per edit version and kept in the fragment cache"""
+    if end <= start:
+        return ''
+    key = (filename, edit_version, TEMPLATE_VERSION, start, end)
+    return conv_manager.fragment_cache.get(key, content_tag, lambda: render_template(
+        '_message_cards.html', messages=messages[start:end], has_saved_edits=has_saved_edits))
 
 @app.route('/api/review', methods=['POST'])
 def api_review():
@@ -562,9 +983,48 @@ def api_review():
     
     return jsonify({'status': 'success'})
 
+@app.route('/api/review_bulk', methods=['POST'])
+def api_review_bulk():
+    """API endpoint to submit many reviews at once, e.g. a batch of obvious rejects.
+
+    Body: {"reviewer": ..., "reviews": [{"filename": ..., "accepted": ..., "notes": ...}, ...]}.
+    A review may name its own reviewer; all of them are applied in one transaction.
+    """
+    data = request.json or {}
+    default_reviewer = data.get('reviewer')
+    reviews = []
+    for item in data.get('reviews') or []:
+        reviewer = item.get('reviewer', default_reviewer)
+        if not item.get('filename') or not reviewer or 'accepted' not in item:
+            return jsonify({'status': 'error', 'message': 'Each review needs filename, reviewer and accepted'})
+        corrected_messages = item.get('corrected_messages')
+        reviews.append({
+            'filename': item['filename'],
+            'reviewer': reviewer,
+            'accepted': bool(item['accepted']),
+            'notes': item.get('notes', ''),
+            'corrected_messages': json.dumps(corrected_messages) if corrected_messages else None,
+        })
+    
+    if not reviews:
+        return jsonify({'status': 'error', 'message': 'No reviews given'})
+    
+    updated = conv_manager.apply_reviews(reviews)
+    return jsonify({'status': 'success', 'reviewed': updated, 'missing': len(reviews) - updated})
+
+def edit_conflict(version):
+    """Response for an edit made against an older edit_version than the saved one"""
+    return jsonify({'status': 'conflict', 'version': version,
+                    'message': 'The conversation was saved by someone else; reload it to see their changes'})
+
 @app.route('/api/save_edits', methods=['POST'])
 def api_save_edits():
-    """API endpoint to save conversation edits (persistent)"""
+    """API endpoint to save conversation edits (persistent): the whole edited conversation.
+
+    With "version" (the edit_version the edits were made against) nothing is saved
+    and the status is 'conflict' if someone saved the conversation since; without
+    it the last save wins.
+    """
     data = request.json
     filename = data.get('filename')
     corrected_messages = data.get('corrected_messages')
@@ -573,47 +1033,92 @@ def api_save_edits():
         return jsonify({'status': 'error', 'message': 'Missing filename or messages'})
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        # Save the corrected messages as JSON, with their training pairs
+        version = conv_manager.save_corrected_messages(filename, corrected_messages,
+                                                       expected_version=data.get('version'))
+        if version is None:
+            return edit_conflict(conv_manager.get_current_messages(filename)[2])
         
-        # Save the corrected messages as JSON
-        cursor.execute('''
-            UPDATE conversations 
-            SET corrected_messages = ?
-            WHERE filename = ?
-        ''', (json.dumps(corrected_messages), filename))
-        
-        conn.commit()
-        conn.close()
-        
-        return jsonify({'status': 'success', 'message': 'Edits saved successfully'})
+        return jsonify({'status': 'success', 'message': 'Edits saved successfully', 'version': version})
         
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
+@app.route('/api/edit_messages', methods=['POST'])
+def api_edit_messages():
+    """API endpoint to save conversation edits as only the messages that changed.
+
+    Body: {"filename": ..., "version": ..., "changes": [...]}, the changes applied in order:
+    - {"op": "update", "id": ..., "role": ..., "text": ...} (role and text each optional);
+    - {"op": "remove", "id": ...};
+    - {"op": "place", "id": ..., "after": id or null} moves a message after another one, or
+      first; with an id not in the conversation it adds {"role", "text", "timestamp"} there.
+    version is the edit_version the changes were made against. If someone saved the
+    conversation since, nothing is saved and the status is 'conflict'.
+    """
+    data = request.json or {}
+    filename = data.get('filename')
+    changes = data.get('changes')
+    
+    if not filename or not isinstance(changes, list):
+        return jsonify({'status': 'error', 'message': 'Missing filename or changes'})
+    
+    messages, _, edit_version, _ = conv_manager.get_current_messages(filename)
+    version = data.get('version', edit_version)
+    if version != edit_version:
+        return edit_conflict(edit_version)
+    
+    try:
+        messages = apply_message_changes(messages[:], changes)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+    
+    new_version = conv_manager.save_corrected_messages(filename, messages, expected_version=version)
+    if new_version is None:
+        return edit_conflict(conv_manager.get_current_messages(filename)[2])
+    
+    role_counts, next_message_id = message_summary(messages)
+    return jsonify({
+        'status': 'success',
+        'version': new_version,
+        'total': len(messages),
+        'role_counts': role_counts,
+        'next_message_id': next_message_id
+    })
+
 @app.route('/api/get_edits/<filename>')
 def api_get_edits(filename):
     """API endpoint to get saved edits for a conversation"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         cursor.execute('SELECT corrected_messages FROM conversations WHERE filename = ?', (filename,))
         result = cursor.fetchone()
         conn.close()
         
-        if result and result[0]:
-            corrected_messages = json.loads(result[0])
-            return jsonify({'status': 'success', 'corrected_messages': corrected_messages})
+        saved = result[0] if result else None
+        etag = make_etag('edits', hashlib.sha1(saved.encode('utf-8')).hexdigest() if saved else None)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        if saved:
+            corrected_messages = json.loads(saved)
+            return with_etag(jsonify({'status': 'success', 'corrected_messages': corrected_messages}), etag)
         else:
-            return jsonify({'status': 'success', 'corrected_messages': None})
+            return with_etag(jsonify({'status': 'success', 'corrected_messages': None}), etag)
             
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
 @app.route('/api/find_replace', methods=['POST'])
 def api_find_replace():
-    """API endpoint to find and replace text in conversation"""
+    """API endpoint to find and replace text in conversation.
+
+    Like /api/edit_messages, "version" is the edit_version the page shows; if
+    someone saved the conversation since, nothing is replaced and the status is 'conflict'.
+    """
     data = request.json
     filename = data.get('filename')
     find_text = data.get('find_text', '').strip()
@@ -624,22 +1129,13 @@ def api_find_replace():
     
     try:
         # Get current conversation content (including any saved edits)
-        messages = conv_manager.get_conversation_content(filename)
-        
-        # Check if there are saved edits
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT corrected_messages FROM conversations WHERE filename = ?', (filename,))
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result and result[0]:
-            # Use saved edits if available
-            saved_messages = json.loads(result[0])
-            messages = saved_messages
+        messages, _, version, _ = conv_manager.get_current_messages(filename)
+        if data.get('version', version) != version:
+            return edit_conflict(version)
+        messages = messages[:]
         
         # Perform find and replace
-        replaced_count = 0
+        updated_messages = []
         for message in messages:
             if find_text.lower() in message.get('text', '').lower():
                 # Case-insensitive replace
@@ -653,24 +1149,21 @@ def api_find_replace():
                     new_actual = re.sub(re.escape(find_text), replace_text, original_actual, flags=re.IGNORECASE)
                     message['actual_message'] = new_actual
                 
-                replaced_count += 1
+                updated_messages.append(message)
         
         # Save the updated messages
-        if replaced_count > 0:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE conversations 
-                SET corrected_messages = ?
-                WHERE filename = ?
-            ''', (json.dumps(messages), filename))
-            conn.commit()
-            conn.close()
+        if updated_messages:
+            saved_version = conv_manager.save_corrected_messages(filename, messages, expected_version=version)
+            if saved_version is None:
+                return edit_conflict(conv_manager.get_current_messages(filename)[2])
+            version = saved_version
         
+        # Only the changed messages; the page may not have loaded the others
         return jsonify({
             'status': 'success', 
-            'replaced_count': replaced_count,
-            'updated_messages': messages
+            'replaced_count': len(updated_messages),
+            'updated_messages': updated_messages,
+            'version': version
         })
         
     except Exception as e:
@@ -681,71 +1174,83 @@ def api_export():
     """Export accepted conversations in multiple formats"""
     format_type = request.args.get('format', 'jsonl')
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT filename, corrected_messages FROM conversations 
+    # An export only changes when the accepted conversations, their order or their edits do
+    etag = make_etag('export', format_type, request.args.get('budget', MULTITURN_BUDGET),
+                     request.args.get('unit', MULTITURN_BUDGET_UNIT), export_version())
+    # The zip of individual files is stamped with the time of export, so copies are only equivalent
+    weak = format_type == 'txt_individual'
+    return not_modified(etag, weak) or with_etag(export_response(format_type), etag, weak)
+
+def export_version():
+    """Digest of the accepted conversations in export order, with their edit versions"""
+    conn = connect_db()
+    digest = hashlib.sha1()
+    for row in conn.execute('''
+        SELECT id, filename, quality_score, message_count, edit_version FROM conversations
         WHERE accepted = 1 AND status = "reviewed"
-    ''')
-    
-    accepted_conversations = cursor.fetchall()
+        ORDER BY quality_score DESC, message_count DESC, id
+    '''):
+        digest.update(repr(row).encode('utf-8'))
     conn.close()
+    return digest.hexdigest()
+
+def export_response(format_type):
+    """The export of accepted conversations in format_type"""
+    if format_type == 'multiturn':
+        unit = request.args.get('unit', MULTITURN_BUDGET_UNIT)
+        budget = request.args.get('budget', str(MULTITURN_BUDGET))
+        budget = int(budget) if budget.isdigit() else 0
+        if unit not in BUDGET_UNITS or budget <= 0:
+            return jsonify({'status': 'error',
+                            'message': f"budget must be a positive integer and unit one of {', '.join(BUDGET_UNITS)}"})
+        return export_multiturn(budget, unit)
     
-    if format_type == 'txt_individual':
-        return export_individual_txt_files(accepted_conversations)
-    
-    # Generate training data for JSON/JSONL formats
-    training_data = []
-    all_conversations = []
-    
-    for filename, corrected_messages_json in accepted_conversations:
-        if corrected_messages_json:
-            # Use corrected messages
-            messages = json.loads(corrected_messages_json)
-        else:
-            # Use original messages
-            messages = conv_manager.get_conversation_content(filename)
-        
-        # Store full conversation for txt format
-        all_conversations.append({
-            'filename': filename,
-            'messages': messages
-        })
-        
-        # Convert to training format pairs
-        conversation_pairs = []
-        for i in range(len(messages) - 1):
-            current_msg = messages[i]
-            next_msg = messages[i + 1]
-            
-            if current_msg.get('role') in ['guest'] and next_msg.get('role') in ['agent']:
-                # Clean the message content
-                user_content = extract_clean_message(current_msg)
-                assistant_content = extract_clean_message(next_msg)
-                
-                if user_content and assistant_content:
-                    conversation_pairs.append({
-                        "messages": [
-                            {"role": "user", "content": user_content},
-                            {"role": "assistant", "content": assistant_content}
-                        ]
-                    })
+    if format_type in ('txt', 'txt_individual'):
+        # Full conversations, so these still load every accepted conversation
+        conn = connect_db()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT filename, corrected_messages FROM conversations 
+            WHERE accepted = 1 AND status = "reviewed"
+            ORDER BY quality_score DESC, message_count DESC
+        ''')
+        accepted_conversations = cursor.fetchall()
+        conn.close()
         
-        training_data.extend(conversation_pairs)
+        if format_type == 'txt_individual':
+            return export_individual_txt_files(accepted_conversations)
+        return export_txt(accepted_conversations)
+    
+    # Training pairs were extracted when each conversation was accepted or edited
+    conv_manager.ensure_training_pairs()
+    pairs_query = '''
+        SELECT p.user_content, p.assistant_content
+        FROM conversations c JOIN training_pairs p ON p.filename = c.filename
+        WHERE c.accepted = 1 AND c.status = "reviewed"
+        ORDER BY c.quality_score DESC, c.message_count DESC, c.id, p.position
+    '''
     
     if format_type == 'jsonl':
         from flask import Response
         
         def generate():
-            for item in training_data:
-                yield json.dumps(item, ensure_ascii=False) + '\n'
+            conn = connect_db()
+            try:
+                for user_content, assistant_content in conn.execute(pairs_query):
+                    yield json.dumps(training_pair(user_content, assistant_content), ensure_ascii=False) + '\n'
+            finally:
+                conn.close()
         
         return Response(generate(), 
                        mimetype='application/jsonl',
                        headers={'Content-Disposition': 'attachment; filename=fine_tuning_data.jsonl'})
     
-    elif format_type == 'json':
+    conn = connect_db()
+    training_data = [training_pair(user_content, assistant_content)
+                     for user_content, assistant_content in conn.execute(pairs_query)]
+    conn.close()
+    
+    if format_type == 'json':
         from flask import Response
         
         json_data = json.dumps(training_data, ensure_ascii=False, indent=2)
@@ -753,24 +1258,164 @@ def api_export():
                        mimetype='application/json',
                        headers={'Content-Disposition': 'attachment; filename=fine_tuning_data.json'})
     
-    elif format_type == 'txt':
-        from flask import Response
-        
-        def generate():
-            for conv in all_conversations:
-                yield f"=== CONVERSATION: {conv['filename']} ===\n"
-                for msg in conv['messages']:
-                    clean_msg = extract_clean_message(msg)
-                    if clean_msg:
-                        yield f"{msg.get('role', 'unknown')}: {clean_msg}\n"
-                yield "\n" + "="*80 + "\n\n"
-        
-        return Response(generate(),
-                       mimetype='text/plain',
-                       headers={'Content-Disposition': 'attachment; filename=approved_conversations.txt'})
-    
     return jsonify(training_data)
 
+def training_pair(user_content, assistant_content):
+    """One fine-tuning example in the chat messages format"""
+    return {
+        "messages": [
+            {"role": "user", "content": user_content},
+            {"role": "assistant", "content": assistant_content}
+        ]
+    }
+
+def with_unique_ids(messages):
+    """Give repeated message ids new ones after the largest, so edits can address every message.
+
+    The editor used to number added messages from the message count, which could
+    repeat an id once messages had been removed.
+    """
+    ids = [message.get('id') for message in messages]
+    next_id = max((i for i in ids if isinstance(i, int)), default=-1) + 1
+    seen = set()
+    for message, message_id in zip(messages, ids):
+        if not isinstance(message_id, int) or message_id in seen:
+            message['id'] = message_id = next_id
+            next_id += 1
+        seen.add(message_id)
+    return messages
+
+def message_summary(messages):
+    """(messages per role, next unused message id) of a conversation"""
+    if isinstance(messages, ParsedConversation):
+        return messages.role_counts(), messages.max_id() + 1
+    role_counts = dict.fromkeys(ROLES, 0)
+    for message in messages:
+        if message.get('role') in role_counts:
+            role_counts[message['role']] += 1
+    return role_counts, max((message['id'] for message in messages), default=-1) + 1
+
+def apply_message_changes(messages, changes):
+    """Apply the edit operations of /api/edit_messages, in order, to a list of message dicts.
+
+    Returns the edited list; messages the changes don't touch are kept as they are.
+    Raises ValueError for a malformed or unknown operation or a message id that isn't there.
+    """
+    order = [message['id'] for message in messages]
+    by_id = {message['id']: message for message in messages}
+    for change in changes:
+        if not isinstance(change, dict):
+            raise ValueError(f"Edit operation {change!r} is not an object")
+        op = change.get('op')
+        message_id = change.get('id')
+        if not isinstance(message_id, int):
+            raise ValueError(f"Message id {message_id!r} is not an integer")
+        message = by_id.get(message_id)
+        if op == 'place':
+            if message is None:
+                role, text = change.get('role'), change.get('text')
+                if role not in ROLES or not isinstance(text, str) or not text:
+                    raise ValueError(f"New message {message_id} needs a role and text")
+                by_id[message_id] = {'id': message_id, 'role': role, 'text': text, 'actual_message': text,
+                                     'timestamp': change.get('timestamp', '')}
+            else:
+                order.remove(message_id)
+            after = change.get('after')
+            if after is not None and not isinstance(after, int):
+                raise ValueError(f"Message id {after!r} is not an integer")
+            if after is None:
+                order.insert(0, message_id)
+            elif after in by_id and after != message_id:
+                order.insert(order.index(after) + 1, message_id)
+            else:
+                raise ValueError(f"Cannot place message {message_id} after unknown message {after}")
+        elif message is None:
+            raise ValueError(f"No message with id {message_id}")
+        elif op == 'update':
+            if 'role' in change:
+                if change['role'] not in ROLES:
+                    raise ValueError(f"Unknown role {change['role']!r}")
+                message['role'] = change['role']
+            if 'text' in change:
+                if not isinstance(change['text'], str) or not change['text']:
+                    raise ValueError(f"Text of message {message_id} must be a non-empty string")
+                message['text'] = message['actual_message'] = change['text']
+        elif op == 'remove':
+            order.remove(message_id)
+            del by_id[message_id]
+        else:
+            raise ValueError(f"Unknown edit operation {op!r}")
+    return [by_id[message_id] for message_id in order]
+
+def extract_training_pairs(messages):
+    """Cleaned (user, assistant) texts of each guest message directly answered by an agent"""
+    pairs = []
+    for i in range(len(messages) - 1):
+        current_msg = messages[i]
+        next_msg = messages[i + 1]
+        
+        if current_msg.get('role') in ['guest'] and next_msg.get('role') in ['agent']:
+            # Clean the message content
+            user_content = extract_clean_message(current_msg)
+            assistant_content = extract_clean_message(next_msg)
+            
+            if user_content and assistant_content:
+                pairs.append((user_content, assistant_content))
+    return pairs
+
+def export_multiturn(budget, unit):
+    """Stream multi-turn samples of every accepted conversation as JSONL, packed into windows of at most budget"""
+    from flask import Response
+    
+    measure = length_function(unit)
+    
+    def generate():
+        # One conversation in memory at a time, however many are exported
+        conn = connect_db()
+        try:
+            cursor = conn.execute('''
+                SELECT filename, corrected_messages FROM conversations 
+                WHERE accepted = 1 AND status = "reviewed"
+                ORDER BY quality_score DESC, message_count DESC
+            ''')
+            for filename, corrected_messages_json in cursor:
+                if corrected_messages_json:
+                    messages = json.loads(corrected_messages_json)
+                else:
+                    messages = conv_manager.get_conversation_content(filename, use_cache=False)
+                
+                turns = merge_turns((msg.get('role'), extract_clean_message(msg)) for msg in messages)
+                for window in iter_windows(turns, budget, measure):
+                    yield json.dumps({"messages": window}, ensure_ascii=False) + '\n'
+        finally:
+            conn.close()
+    
+    return Response(generate(),
+                   mimetype='application/jsonl',
+                   headers={'Content-Disposition': f'attachment; filename=fine_tuning_multiturn_{budget}_{unit}.jsonl'})
+
+def export_txt(accepted_conversations):
+    """Export all accepted conversations as one plain text file"""
+    from flask import Response
+    
+    def generate():
+        for filename, corrected_messages_json in accepted_conversations:
+            if corrected_messages_json:
+                messages = json.loads(corrected_messages_json)
+            else:
+                messages = conv_manager.get_conversation_content(filename, use_cache=False)
+            
+            yield f"=== CONVERSATION: {filename} ===\n"
+            for msg in messages:
+                clean_msg = extract_clean_message(msg)
+                if clean_msg:
+                    yield f"{msg.get('role', 'unknown')}: {clean_msg}\n"
+            yield "\n" + "="*80 + "\n\n"
+    
+    return Response(generate(),
+                   mimetype='text/plain',
+                   headers={'Content-Disposition': 'attachment; filename=approved_conversations.txt'})
+
 def extract_clean_message(message):
     """Extract clean message content from message object"""
     # Try different message content fields
@@ -801,7 +1446,7 @@ def export_individual_txt_files(accepted_conversations):
             if corrected_messages_json:
                 messages = json.loads(corrected_messages_json)
             else:
-                messages = conv_manager.get_conversation_content(filename)
+                messages = conv_manager.get_conversation_content(filename, use_cache=False)
             
             # Create content for individual file
             content_lines = []
@@ -834,5 +1479,12 @@ def api_progress():
     """Get current team progress"""
     return jsonify(conv_manager.get_team_progress())
 
+@app.route('/metrics')
+def metrics():
+    """Request, query and cache metrics in Prometheus text format"""
+    from flask import Response
+    
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
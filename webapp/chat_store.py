@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Packed, compressed storage for WhatsApp chat exports.
+
+Instead of one .txt file per conversation, a chat store directory holds a few
+large shard files plus an index:
+
+    chat_store/
+        shard_000.pack ...   every conversation deflate-compressed on its own
+        chat_index.bin       columnar index: filename, shard, offset, length, size
+        chat_store.zdict     optional preset dictionary shared by all members
+
+Each conversation is an independent deflate stream (the algorithm gzip
+uses), so a single chat can be read with one pread and one decompress. The
+preset dictionary is built from a sample of the corpus and makes the many
+tiny chats compress far better than they would as separate gzip files.
+
+Pack a directory with:
+    python3 chat_store.py pack /path/to/chats /path/to/chat_store
+"""
+import argparse
+import os
+import time
+import zlib
+from pathlib import Path
+
+try:
+    from .columnar_report import ColumnarReport, write_columnar_report
+    from .fs_scan import iter_files
+except ImportError:
+    from columnar_report import ColumnarReport, write_columnar_report
+    from fs_scan import iter_files
+
+INDEX_FILENAME = 'chat_index.bin'
+DICTIONARY_FILENAME = 'chat_store.zdict'
+SHARD_SIZE = 256 * 1024 * 1024
+DICTIONARY_SIZE = 32 * 1024
+DICTIONARY_SAMPLES = 200
+COMPRESSION_LEVEL = 6
+
+INDEX_COLUMNS = (
+    ('filename', 's'),
+    ('shard', 'i'),
+    ('offset', 'q'),
+    ('length', 'i'),
+    ('size', 'i'),
+)
+
+
+def _shard_name(number):
+    return f'shard_{number:03d}.pack'
+
+
+def _build_dictionary(paths):
+    """Concatenate the start of evenly spaced sample files into a zlib preset dictionary"""
+    if not paths:
+        return b''
+    step = max(1, len(paths) // DICTIONARY_SAMPLES)
+    per_sample = max(256, DICTIONARY_SIZE // DICTIONARY_SAMPLES)
+    chunks = []
+    for path in paths[::step][:DICTIONARY_SAMPLES]:
+        with open(path, 'rb') as f:
+            chunks.append(f.read(per_sample))
+    # zlib favours matches near the end of the dictionary, so keep the most
+    # recent window if the samples overflow it
+    return b''.join(chunks)[-DICTIONARY_SIZE:]
+
+
+def _compressor(zdict):
+    if zdict:
+        return zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15, zdict=zdict)
+    return zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15)
+
+
+def _decompressor(zdict):
+    if zdict:
+        return zlib.decompressobj(-15, zdict=zdict)
+    return zlib.decompressobj(-15)
+
+
+def is_chat_store(path):
+    """True if path is a chat store directory"""
+    return os.path.exists(os.path.join(path, INDEX_FILENAME))
+
+
+def pack_chat_directory(chat_dir, store_dir, shard_size=SHARD_SIZE):
+    """Pack every *.txt file in chat_dir into a chat store at store_dir"""
+    store_path = Path(store_dir)
+    store_path.mkdir(parents=True, exist_ok=True)
+    paths = sorted(Path(entry.path) for entry in iter_files(chat_dir))
+
+    zdict = _build_dictionary(paths)
+    with open(store_path / DICTIONARY_FILENAME, 'wb') as f:
+        f.write(zdict)
+
+    rows = []
+    shard_number = 0
+    shard = open(store_path / _shard_name(shard_number), 'wb')
+    offset = 0
+    raw_bytes = 0
+    try:
+        for path in paths:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            compressor = _compressor(zdict)
+            member = compressor.compress(raw) + compressor.flush()
+
+            if offset and offset + len(member) > shard_size:
+                shard.close()
+                shard_number += 1
+                shard = open(store_path / _shard_name(shard_number), 'wb')
+                offset = 0
+
+            shard.write(member)
+            rows.append({
+                'filename': path.name,
+                'shard': shard_number,
+                'offset': offset,
+                'length': len(member),
+                'size': len(raw)
+            })
+            offset += len(member)
+            raw_bytes += len(raw)
+    finally:
+        shard.close()
+
+    # The index goes last so a half-written store is never mistaken for a valid one
+    write_columnar_report(store_path / INDEX_FILENAME, rows, INDEX_COLUMNS)
+    return {'files': len(rows), 'shards': shard_number + 1, 'raw_bytes': raw_bytes}
+
+
+class ChatStore:
+    """Random-access reader for a packed chat store; safe to share between threads"""
+
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        dictionary_path = self.store_dir / DICTIONARY_FILENAME
+        self.zdict = dictionary_path.read_bytes() if dictionary_path.exists() else b''
+
+        with ColumnarReport(self.store_dir / INDEX_FILENAME) as index:
+            names = list(index.column('filename'))
+            shards = list(index.column('shard'))
+            offsets = list(index.column('offset'))
+            lengths = list(index.column('length'))
+            sizes = list(index.column('size'))
+
+        self._names = names
+        self._entries = {
+            name: (shard, offset, length, size)
+            for name, shard, offset, length, size in zip(names, shards, offsets, lengths, sizes)
+        }
+        shard_count = max(shards) + 1 if shards else 0
+        self._shard_fds = [os.open(self.store_dir / _shard_name(i), os.O_RDONLY) for i in range(shard_count)]
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, filename):
+        return filename in self._entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def names(self):
+        """Filenames in pack order"""
+        return list(self._names)
+
+    def size(self, filename):
+        """Uncompressed size of a conversation in bytes"""
+        return self._entries[filename][3]
+
+    def read_bytes(self, filename):
+        """Read and decompress one conversation"""
+        shard, offset, length, size = self._entries[filename]
+        member = os.pread(self._shard_fds[shard], length, offset)
+        decompressor = _decompressor(self.zdict)
+        return decompressor.decompress(member) + decompressor.flush()
+
+    def read_text(self, filename):
+        """Read a conversation the way open(path, 'r', errors='ignore').read() would"""
+        return decode_chat(self.read_bytes(filename))
+
+    def close(self):
+        for fd in self._shard_fds:
+            os.close(fd)
+        self._shard_fds = []
+
+
+def decode_chat(data):
+    """Decode raw chat bytes exactly as open(path, 'r', encoding='utf-8', errors='ignore').read() does"""
+    text = data.decode('utf-8', errors='ignore')
+    # Match text-mode universal newline handling
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def open_chat_store(store_dir):
+    """Open the chat store at store_dir, or return None if there isn't one"""
+    if store_dir and is_chat_store(store_dir):
+        return ChatStore(store_dir)
+    return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pack chat .txt files into a compressed chat store")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    pack_parser = subcommands.add_parser('pack', help="Pack a chat directory")
+    pack_parser.add_argument('chat_dir')
+    pack_parser.add_argument('store_dir')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = pack_chat_directory(args.chat_dir, args.store_dir)
+    packed_bytes = sum(p.stat().st_size for p in Path(args.store_dir).iterdir())
+    print(f"✅ Packed {stats['files']} chats into {stats['shards']} shard(s) in {time.perf_counter() - start:.1f}s")
+    print(f"📦 {stats['raw_bytes'] / 1e6:.1f} MB raw -> {packed_bytes / 1e6:.1f} MB packed")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Compact columnar companion to quality_analysis_report.json.
+
+quality_analysis_report.bin stores each report field as its own fixed-width
+little-endian array, plus an offsets array and a UTF-8 string table for the
+filenames. Readers memory-map the file and only touch the columns they ask
+for, so getting filename/score/count columns no longer parses the whole JSON.
+
+Layout:
+    header       magic "QRPT", format version, column count, row count
+    directory    one entry per column: name, type code, byte offset, byte length
+    columns      8-byte aligned; 's' columns are (row count + 1) uint32
+                 offsets followed by the concatenated UTF-8 strings
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+REPORT_JSON = 'quality_analysis_report.json'
+REPORT_BIN = 'quality_analysis_report.bin'
+
+MAGIC = b'QRPT'
+FORMAT_VERSION = 1
+
+REPORT_COLUMNS = (
+    ('filename', 's'),
+    # Doubles, since a scoring profile with fractional points gives fractional scores
+    ('quality_score', 'd'),
+    ('message_count', 'i'),
+    ('avg_message_length', 'd'),
+    ('has_questions', '?'),
+    ('template_ratio', 'd'),
+    ('unique_content_ratio', 'd'),
+)
+
+_HEADER = struct.Struct('<4sHHI')
+_COLUMN_ENTRY = struct.Struct('<32sc7xQQ')
+_ALIGNMENT = 8
+
+
+def _padding(size):
+    return b'\0' * (-size % _ALIGNMENT)
+
+
+def _encode_column(type_code, values):
+    if type_code == 's':
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = array('I', [0])
+        total = 0
+        for item in encoded:
+            total += len(item)
+            offsets.append(total)
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        return offsets.tobytes() + b''.join(encoded)
+    if type_code == '?':
+        return bytes(1 if value else 0 for value in values)
+    data = array(type_code, values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_columnar_report(path, rows, columns=REPORT_COLUMNS):
+    """Write report rows (dicts as in quality_analysis_report.json) to path"""
+    row_count = len(rows)
+    payloads = [_encode_column(type_code, [row[name] for row in rows]) for name, type_code in columns]
+
+    offset = _HEADER.size + _COLUMN_ENTRY.size * len(columns)
+    offset += len(_padding(offset))
+    directory = []
+    for (name, type_code), payload in zip(columns, payloads):
+        directory.append(_COLUMN_ENTRY.pack(name.encode('utf-8'), type_code.encode('ascii'), offset, len(payload)))
+        offset += len(payload) + len(_padding(len(payload)))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        head = _HEADER.pack(MAGIC, FORMAT_VERSION, len(columns), row_count) + b''.join(directory)
+        f.write(head + _padding(len(head)))
+        for payload in payloads:
+            f.write(payload + _padding(len(payload)))
+    os.replace(tmp_path, path)
+
+
+class _StringColumn:
+    """Lazily decoded view of a string column"""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def __iter__(self):
+        offsets = self._offsets
+        blob = self._blob
+        for i in range(len(offsets) - 1):
+            yield str(blob[offsets[i]:offsets[i + 1]], 'utf-8')
+
+
+class ColumnarReport:
+    """Memory-mapped reader for quality_analysis_report.bin.
+
+    Column views are only valid until close(); copy them (list(...)) if they
+    must outlive the reader.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._map)
+        self._views = [self._buffer]
+
+        magic, version, column_count, self.row_count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar quality report")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} has unsupported report format version {version}")
+
+        self.columns = {}
+        for i in range(column_count):
+            raw_name, type_code, offset, length = _COLUMN_ENTRY.unpack_from(self._map, _HEADER.size + i * _COLUMN_ENTRY.size)
+            name = raw_name.rstrip(b'\0').decode('utf-8')
+            self.columns[name] = (type_code.decode('ascii'), offset, length)
+
+    def __len__(self):
+        return self.row_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _view(self, start, length, type_code):
+        raw = self._buffer[start:start + length]
+        self._views.append(raw)
+        if type_code == 'B' or sys.byteorder == 'little':
+            view = raw.cast(type_code)
+            self._views.append(view)
+            return view
+        data = array(type_code, raw.tobytes())
+        data.byteswap()
+        return data
+
+    def column(self, name):
+        """Return a read-only sequence for a single column"""
+        if name not in self.columns:
+            raise KeyError(f"Column '{name}' not in {self.path}")
+        type_code, offset, length = self.columns[name]
+        if type_code == 's':
+            offsets_size = (self.row_count + 1) * 4
+            offsets = self._view(offset, offsets_size, 'I')
+            blob = self._view(offset + offsets_size, length - offsets_size, 'B')
+            return _StringColumn(offsets, blob)
+        if type_code == '?':
+            return self._view(offset, length, '?')
+        return self._view(offset, length, type_code)
+
+    def rows(self, names=None):
+        """Yield row dicts holding only the requested columns"""
+        names = list(names or self.columns)
+        columns = [self.column(name) for name in names]
+        for values in zip(*columns):
+            yield dict(zip(names, values))
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+
+def columnar_report_is_current(data_dir):
+    """True when the .bin report exists and is not older than the JSON report"""
+    bin_path = os.path.join(data_dir, REPORT_BIN)
+    json_path = os.path.join(data_dir, REPORT_JSON)
+    if not os.path.exists(bin_path):
+        return False
+    return not os.path.exists(json_path) or os.path.getmtime(bin_path) >= os.path.getmtime(json_path)
+
+
+def load_report_rows(data_dir, columns=None):
+    """Load report rows from data_dir, preferring the columnar report.
+
+    With the .bin report only the named columns are read; the JSON fallback
+    returns full rows. Whole quality scores come back as ints either way.
+    Raises FileNotFoundError if neither report exists.
+    """
+    if columnar_report_is_current(data_dir):
+        with ColumnarReport(os.path.join(data_dir, REPORT_BIN)) as report:
+            rows = list(report.rows(columns))
+        for row in rows:
+            score = row.get('quality_score')
+            if isinstance(score, float) and score.is_integer():
+                row['quality_score'] = int(score)
+        return rows
+
+    with open(os.path.join(data_dir, REPORT_JSON), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def count_report_rows(data_dir):
+    """Number of conversations in the report, without loading any column"""
+    if columnar_report_is_current(data_dir):
+        with ColumnarReport(os.path.join(data_dir, REPORT_BIN)) as report:
+            return len(report)
+    return len(load_report_rows(data_dir))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+In-memory cache of parsed conversations with background prefetch.
+
+Reviewers work through the pending queue in order, so the app knows which
+conversations will be opened next. prefetch() parses them on a small thread
+pool ahead of time; a view that arrives while its conversation is still being
+prefetched waits for that parse instead of starting a second one. The cache
+is a plain LRU bounded by entry count and lives in each server process.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_NAME = 'conversation'
+
+
+class ConversationCache:
+    def __init__(self, loader, max_entries=512, prefetch_workers=2, metrics=None):
+        """loader(filename) returns the parsed messages of a conversation (a message_records.ParsedConversation)"""
+        self._loader = loader
+        self.max_entries = max_entries
+        self._prefetch_workers = prefetch_workers
+        self._metrics = metrics
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, filename):
+        return filename in self._entries
+
+    def get(self, filename, store=True):
+        """Parsed messages for filename, from memory when possible.
+
+        The returned messages are shared with the cache and read-only.
+        store=False still uses cached entries but does not add new ones, for
+        bulk readers such as exports that would otherwise evict the queue.
+        """
+        with self._lock:
+            messages = self._entries.get(filename)
+            if messages is not None:
+                self._entries.move_to_end(filename)
+            future = self._in_flight.get(filename) if messages is None else None
+
+        if messages is None and future is not None:
+            messages = future.result()
+        self._record(hit=messages is not None)
+        if messages is not None:
+            return messages
+
+        messages = self._loader(filename)
+        if store:
+            self._store(filename, messages)
+        return messages
+
+    def prefetch(self, filenames):
+        """Parse the given conversations in the background; returns immediately"""
+        with self._lock:
+            executor = self._get_executor()
+            for filename in filenames:
+                if filename in self._entries or filename in self._in_flight:
+                    continue
+                self._in_flight[filename] = executor.submit(self._prefetch_one, filename)
+
+    def submit(self, func, *args):
+        """Run func on the prefetch pool, e.g. to look up what to prefetch off the request path"""
+        with self._lock:
+            return self._get_executor().submit(func, *args)
+
+    def _get_executor(self):
+        # Created lazily so gunicorn can fork the app before any thread exists
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._prefetch_workers, thread_name_prefix='prefetch')
+        return self._executor
+
+    def invalidate(self, filename):
+        with self._lock:
+            self._entries.pop(filename, None)
+
+    def _prefetch_one(self, filename):
+        try:
+            messages = self._loader(filename)
+            self._store(filename, messages)
+            return messages
+        except Exception as e:
+            print(f"⚠️  Prefetch of {filename} failed: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._in_flight.pop(filename, None)
+
+    def _store(self, filename, messages):
+        # Misses (chat not found) are not cached so a file copied in later shows up
+        if not messages:
+            return
+        with self._lock:
+            self._entries[filename] = messages
+            self._entries.move_to_end(filename)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _record(self, hit):
+        if self._metrics is not None:
+            self._metrics.record_cache(CACHE_NAME, hit)
@@ -3,12 +3,98 @@
 Script to copy organized WhatsApp conversation data to the web app directory
 Run this to set up your data structure properly
 """
+import argparse
 import os
 import shutil
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-def copy_organized_data():
+from columnar_report import REPORT_BIN, count_report_rows
+from fs_scan import count_files, iter_files
+
+COPY_WORKERS = 8
+PROGRESS_EVERY = 1000
+
+def _already_copied(source_stat, dest_path):
+    """True if dest_path holds a finished copy (same size and mtime) of the source"""
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    return dest_stat.st_size == source_stat.st_size and abs(dest_stat.st_mtime - source_stat.st_mtime) < 1
+
+def _copy_contents(source_path, dest_path, size):
+    """Copy file bytes, letting the kernel do it (and reflink where supported) if possible"""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+                remaining = size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return
+        except OSError:
+            pass  # Unsupported filesystem pair, fall back to a userspace copy
+    shutil.copyfile(source_path, dest_path)
+
+def copy_one_file(source_path, dest_dir, allow_links=True):
+    """Copy or hardlink a single file; returns (action, bytes) with action in linked/copied/skipped"""
+    source_stat = os.stat(source_path)
+    dest_path = os.path.join(dest_dir, os.path.basename(source_path))
+    
+    if _already_copied(source_stat, dest_path):
+        return 'skipped', 0
+    
+    if allow_links and os.stat(dest_dir).st_dev == source_stat.st_dev:
+        try:
+            if os.path.lexists(dest_path):
+                os.unlink(dest_path)
+            os.link(source_path, dest_path)
+            return 'linked', source_stat.st_size
+        except OSError:
+            pass  # e.g. filesystem without hardlink support, copy instead
+    
+    # Copy to a temporary name first so an interrupted run never leaves a
+    # truncated file that would later look complete
+    partial_path = dest_path + '.part'
+    _copy_contents(source_path, partial_path, source_stat.st_size)
+    shutil.copystat(source_path, partial_path)
+    os.replace(partial_path, dest_path)
+    return 'copied', source_stat.st_size
+
+def copy_files(source_files, dest_dir, workers=COPY_WORKERS, allow_links=True, label="files"):
+    """Copy files into dest_dir on a thread pool, resuming past files already present"""
+    stats = {'linked': 0, 'copied': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+    total = len(source_files)
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(copy_one_file, os.fspath(path), dest_dir, allow_links): path for path in source_files}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                action, size = future.result()
+                stats[action] += 1
+                stats['bytes'] += size
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"❌ Error copying {Path(futures[future]).name}: {e}")
+            
+            if done % PROGRESS_EVERY == 0:
+                print(f"   📝 Processed {done}/{total} {label}...")
+    
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    stats['seconds'] = elapsed
+    moved = stats['linked'] + stats['copied']
+    print(f"   ⏱️  {moved} {label} transferred ({stats['linked']} hardlinked, {stats['copied']} copied), "
+          f"{stats['skipped']} already up to date, {stats['failed']} failed")
+    print(f"   ⚡ {total / elapsed:.0f} files/sec, {stats['bytes'] / elapsed / 1e6:.1f} MB/sec")
+    return stats
+
+def copy_organized_data(workers=COPY_WORKERS, allow_links=True):
     """Copy data from the original organized_whatsapp_conversations folder"""
     
     # Current web app directory
@@ -54,10 +140,10 @@ def copy_organized_data():
     source_chat_dir = None
     for source in possible_chat_sources:
         if os.path.exists(source):
-            txt_files = list(Path(source).glob("*.txt"))
-            if txt_files:
+            txt_file_count = count_files(source)
+            if txt_file_count:
                 source_chat_dir = source
-                print(f"✅ Found {len(txt_files)} chat files at: {source}")
+                print(f"✅ Found {txt_file_count} chat files at: {source}")
                 break
     
     if not source_chat_dir:
@@ -83,26 +169,29 @@ def copy_organized_data():
         shutil.copy2(source_report, dest_report)
         print(f"✅ Copied quality_analysis_report.json")
         
+        # Copy the columnar report too when the analyzer produced one
+        source_bin = os.path.join(source_data_dir, REPORT_BIN)
+        if os.path.exists(source_bin):
+            shutil.copy2(source_bin, os.path.join(webapp_organized_dir, REPORT_BIN))
+            print(f"✅ Copied {REPORT_BIN}")
+        
         # Verify the report
-        with open(dest_report, 'r', encoding='utf-8') as f:
-            quality_data = json.load(f)
-        print(f"📊 Quality report contains {len(quality_data)} conversations")
+        print(f"📊 Quality report contains {count_report_rows(webapp_organized_dir)} conversations")
         
     except Exception as e:
         print(f"❌ Error copying quality report: {e}")
         return False
     
     # Copy batch files if they exist
-    batch_files = list(Path(source_data_dir).glob("conversations_batch_*.txt"))
+    batch_files = list(iter_files(source_data_dir, prefix="conversations_batch_"))
     if batch_files:
         print(f"📄 Found {len(batch_files)} batch files, copying...")
-        for batch_file in batch_files:
-            dest_batch = os.path.join(webapp_organized_dir, batch_file.name)
-            shutil.copy2(str(batch_file), dest_batch)
+        # Batch files get rewritten in place by reformat_conversations, so never hardlink them
+        copy_files(batch_files, webapp_organized_dir, workers=workers, allow_links=False, label="batch files")
         print(f"✅ Copied {len(batch_files)} batch files")
     
     # Copy chat files (sample first, then ask for confirmation for all)
-    chat_files = list(Path(source_chat_dir).glob("*.txt"))
+    chat_files = list(iter_files(source_chat_dir))
     
     if len(chat_files) > 1000:
         print(f"⚠️  Found {len(chat_files)} chat files - this is a lot!")
@@ -113,19 +202,8 @@ def copy_organized_data():
             chat_files = chat_files[:1000]
     
     print(f"📁 Copying {len(chat_files)} chat files...")
-    copied_count = 0
-    
-    for i, chat_file in enumerate(chat_files):
-        try:
-            dest_chat = os.path.join(webapp_chat_dir, chat_file.name)
-            shutil.copy2(str(chat_file), dest_chat)
-            copied_count += 1
-            
-            if (i + 1) % 1000 == 0:
-                print(f"   📝 Copied {i + 1}/{len(chat_files)} files...")
-                
-        except Exception as e:
-            print(f"❌ Error copying {chat_file.name}: {e}")
+    stats = copy_files(chat_files, webapp_chat_dir, workers=workers, allow_links=allow_links, label="chat files")
+    copied_count = stats['linked'] + stats['copied'] + stats['skipped']
     
     print(f"✅ Successfully copied {copied_count} chat files")
     
@@ -160,7 +238,7 @@ def verify_data_structure():
     for dir_path in required_dirs:
         if os.path.exists(dir_path):
             if dir_path.endswith('chats'):
-                file_count = len(list(Path(dir_path).glob("*.txt")))
+                file_count = count_files(dir_path)
                 print(f"✅ {os.path.basename(dir_path)}/ ({file_count} .txt files)")
             else:
                 print(f"✅ {os.path.basename(dir_path)}/")
@@ -178,10 +256,17 @@ def verify_data_structure():
     return all_good
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Copy organized conversation data into the web app")
+    parser.add_argument('--workers', type=int, default=COPY_WORKERS,
+                        help="Parallel copy threads for cross-device copies")
+    parser.add_argument('--no-hardlinks', action='store_true',
+                        help="Always copy chat files, even on the same filesystem")
+    args = parser.parse_args()
+    
     print("📋 WhatsApp Conversation Data Setup")
     print("=" * 50)
     
-    if copy_organized_data():
+    if copy_organized_data(workers=args.workers, allow_links=not args.no_hardlinks):
         print("\n" + "=" * 50)
         verify_data_structure()
     else:
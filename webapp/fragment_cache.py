@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+In-memory cache of rendered message card fragments.
+
+Rendering the message cards is most of the time a conversation view takes,
+and the cards of a window only change when the conversation is edited or a
+template changes. Entries are keyed by (filename, edit version, template
+version, window). Each entry keeps the content digest it was rendered from,
+and a lookup with a different digest is a miss.
+
+The cache is an LRU bounded by the memory its fragments take, and lives in
+each server process. Saving edits drops the conversation's fragments in the
+process that saved them. Other processes see a new edit version and miss.
+Hits, misses, render time spent and saved, and the size of the cache are
+reported to the metrics registry.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_NAME = 'fragment'
+
+
+class FragmentCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, metrics=None):
+        self.max_bytes = max_bytes
+        self._metrics = metrics
+        # key -> (content digest, html, bytes held, seconds its render took)
+        self._entries = OrderedDict()
+        self._keys_by_filename = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Bytes held by the cached fragments"""
+        return self._size
+
+    def get(self, key, content_tag, render):
+        """Rendered fragment for key (a tuple starting with the filename); render() makes it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == content_tag:
+                self._entries.move_to_end(key)
+            else:
+                entry = None
+
+        if entry is not None:
+            self._record(True, entry[3])
+            return entry[1]
+
+        started = time.perf_counter()
+        html = render()
+        seconds = time.perf_counter() - started
+        self._record(False, seconds)
+        self._store(key, (content_tag, html, sys.getsizeof(html), seconds))
+        return html
+
+    def invalidate(self, filename):
+        """Drop every fragment of filename, e.g. once its edits are saved"""
+        with self._lock:
+            for key in self._keys_by_filename.pop(filename, ()):
+                self._size -= self._entries.pop(key)[2]
+            self._report_size()
+
+    def _store(self, key, entry):
+        # A fragment bigger than the whole cache would only evict everything else
+        if entry[2] > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[2]
+            self._entries[key] = entry
+            self._keys_by_filename.setdefault(key[0], set()).add(key)
+            self._size += entry[2]
+            while self._size > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._size -= evicted[2]
+                keys = self._keys_by_filename[evicted_key[0]]
+                keys.discard(evicted_key)
+                if not keys:
+                    del self._keys_by_filename[evicted_key[0]]
+            self._report_size()
+
+    def _report_size(self):
+        if self._metrics is not None:
+            self._metrics.set_cache_size(CACHE_NAME, len(self._entries), self._size)
+
+    def _record(self, hit, seconds):
+        if self._metrics is not None:
+            self._metrics.record_cache(CACHE_NAME, hit)
+            self._metrics.record_render(CACHE_NAME, seconds, saved=hit)
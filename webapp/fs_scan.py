@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Lazy directory enumeration built on os.scandir.
+
+Path.glob("*.txt") builds a Path object per entry and callers then wrap it in
+list() just to count it. These helpers yield os.DirEntry objects instead,
+whose stat() result is cached after the first call, so sorting by size or
+checking mtimes costs one stat per file at most.
+"""
+import os
+from itertools import islice
+
+
+def iter_files(directory, suffix='.txt', prefix=''):
+    """Yield os.DirEntry objects for regular files matching prefix*suffix.
+
+    Hidden files are skipped, the same as Path.glob("*.txt").
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.') or not name.endswith(suffix) or not name.startswith(prefix):
+                continue
+            if entry.is_file():
+                yield entry
+
+
+def count_files(directory, suffix='.txt', prefix=''):
+    """Count matching files without materialising a list"""
+    return sum(1 for _ in iter_files(directory, suffix, prefix))
+
+
+def has_files(directory, suffix='.txt', prefix=''):
+    """True as soon as one matching file is found"""
+    return next(iter_files(directory, suffix, prefix), None) is not None
+
+
+def first_files(directory, limit, suffix='.txt', prefix=''):
+    """The first `limit` matching entries in directory order"""
+    return list(islice(iter_files(directory, suffix, prefix), limit))
+
+
+def largest_first(entries):
+    """Sort DirEntry objects by size, biggest first, using the cached stat"""
+    return sorted(entries, key=lambda entry: entry.stat().st_size, reverse=True)
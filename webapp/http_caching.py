@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Response compression and conditional GET for the web app.
+
+compress_responses(app) gzips text responses (HTML, JSON, JSONL and plain
+text) for clients that accept gzip. Streamed exports are compressed as they
+stream. COMPRESS_LEVEL (environment variable, default 6) sets the gzip
+level, 0 turns compression off, and responses under COMPRESS_MIN_BYTES
+(default 1024) are sent as they are.
+
+Views whose output is fully determined by a few values (a conversation's
+content digest and edit version, the template version, the query) name it
+with make_etag() before doing any work. not_modified() then answers a
+matching If-None-Match with 304 Not Modified, and with_etag() marks the
+full response. A gzipped response carries the ETag with a "-gzip" suffix,
+because it is a different representation of the same content.
+"""
+import hashlib
+import os
+import zlib
+
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', '6'))
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/jsonl', 'application/javascript')
+GZIP_SUFFIX = '-gzip'
+
+
+def make_etag(*parts):
+    """Entity tag for a response whose bytes depend only on parts"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def not_modified(etag, weak=False):
+    """304 response if the request's If-None-Match already has etag (either encoding), else None"""
+    from flask import make_response, request
+
+    for candidate in (etag, etag + GZIP_SUFFIX):
+        if request.if_none_match.contains_weak(candidate):
+            return with_etag(make_response('', 304), candidate, weak)
+    return None
+
+
+def with_etag(response, etag, weak=False):
+    """Mark response with etag; browsers revalidate it on every use instead of guessing its freshness"""
+    from flask import make_response
+
+    response = make_response(response)
+    response.set_etag(etag, weak)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _gzip_compressor():
+    # The gzip container with a zero mtime, so equal bodies compress to equal bytes
+    return zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+
+
+def _gzip_stream(chunks):
+    compressor = _gzip_compressor()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _compress(response):
+    from flask import request
+
+    if not response.mimetype or not response.mimetype.startswith(COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or not request.accept_encodings['gzip']):
+        return response
+
+    if response.is_streamed:
+        response.response = _gzip_stream(response.iter_encoded())
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        compressor = _gzip_compressor()
+        response.set_data(compressor.compress(data) + compressor.flush())
+    response.headers['Content-Encoding'] = 'gzip'
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag + GZIP_SUFFIX)
+    return response
+
+
+def compress_responses(app):
+    """Register the gzip hook on a Flask app"""
+    if COMPRESS_LEVEL > 0:
+        app.after_request(_compress)
+    return app
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Compact storage for the parsed messages of one conversation.
+
+A message used to be a dict of six strings, and its text was stored twice:
+'text' is "Sender: message" and 'actual_message' the same message without
+the sender. ParsedConversation keeps a conversation in a few columns instead:
+
+- one UTF-8 buffer with each message's timestamp followed by its text;
+- an array of offsets into it; 'actual_message' is the tail of 'text' from
+  its own offset, so the text is stored once;
+- the role as one byte per message, and the sender name as an index into a
+  tuple of the conversation's interned sender names.
+
+Indexing or iterating gives each message as a new dict with the usual keys
+(id, timestamp, role, text, sender_name, actual_message), so templates,
+JSON responses and editing code see exactly what they saw before and can
+modify what they get.
+"""
+import hashlib
+import sys
+from array import array
+
+ROLES = ('guest', 'agent', 'bot', 'template')
+_ROLE_INDEX = {role: index for index, role in enumerate(ROLES)}
+
+
+class ConversationBuilder:
+    """Collects messages in file order; build() returns the ParsedConversation"""
+
+    def __init__(self):
+        self._parts = []
+        self._offsets = array('I')
+        self._ids = array('I')
+        self._roles = bytearray()
+        self._senders = {}
+        self._sender_index = array('I')
+        self._size = 0
+        self._extra_actual = {}
+
+    def add(self, message_id, timestamp, role, text, sender_name, actual_message):
+        """Append a message; actual_message is normally a suffix of text"""
+        index = len(self._ids)
+        text_start = self._size + _utf8_length(timestamp)
+        end = text_start + _utf8_length(text)
+        if text.endswith(actual_message):
+            self._offsets.extend((self._size, text_start, end - _utf8_length(actual_message)))
+        else:
+            self._offsets.extend((self._size, text_start, end))
+            self._extra_actual[index] = actual_message
+        self._parts.append(timestamp)
+        self._parts.append(text)
+        self._size = end
+        self._ids.append(message_id)
+        self._roles.append(_ROLE_INDEX[role])
+        sender = self._senders.get(sender_name)
+        if sender is None:
+            sender = self._senders[sys.intern(sender_name)] = len(self._senders)
+        self._sender_index.append(sender)
+
+    def build(self):
+        self._offsets.append(self._size)
+        # One encode for the whole conversation rather than one per message
+        return ParsedConversation(''.join(self._parts).encode('utf-8'), self._offsets, self._ids,
+                                  bytes(self._roles), tuple(self._senders), self._sender_index,
+                                  self._extra_actual or None)
+
+
+def _utf8_length(text):
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+
+class ParsedConversation:
+    """Read-only sequence of message dicts backed by compact columns"""
+    __slots__ = ('_buffer', '_offsets', '_ids', '_roles', '_senders', '_sender_index', '_extra_actual', '_digest')
+
+    def __init__(self, buffer, offsets, ids, roles, senders, sender_index, extra_actual=None):
+        self._buffer = buffer
+        # Three per message (timestamp, text and actual_message start) and the end of the buffer
+        self._offsets = offsets
+        self._ids = ids
+        self._roles = roles
+        self._senders = senders
+        self._sender_index = sender_index
+        # actual_message of the rare messages where it isn't a suffix of text
+        self._extra_actual = extra_actual
+        self._digest = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._message(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('message index out of range')
+        return self._message(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._message(index)
+
+    def role(self, index):
+        return ROLES[self._roles[index]]
+
+    def role_counts(self):
+        """{role: number of messages} for every role, without decoding any message"""
+        return {role: self._roles.count(index) for index, role in enumerate(ROLES)}
+
+    def max_id(self):
+        return max(self._ids, default=-1)
+
+    def digest(self):
+        """Hex digest of every message field; equal digests mean equal messages"""
+        if self._digest is None:
+            digest = hashlib.sha1(self._buffer)
+            for column in (self._offsets, self._ids, self._roles, self._sender_index):
+                digest.update(bytes(column))
+            digest.update(repr((self._senders, self._extra_actual)).encode('utf-8'))
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def _message(self, index):
+        buffer = self._buffer
+        timestamp_start, text_start, actual_start, end = self._offsets[3 * index:3 * index + 4]
+        text = buffer[text_start:end].decode('utf-8')
+        if self._extra_actual and index in self._extra_actual:
+            actual_message = self._extra_actual[index]
+        elif actual_start == text_start:
+            actual_message = text
+        else:
+            actual_message = buffer[actual_start:end].decode('utf-8')
+        return {
+            'id': self._ids[index],
+            'timestamp': buffer[timestamp_start:text_start].decode('utf-8'),
+            'role': ROLES[self._roles[index]],
+            'text': text,
+            'sender_name': self._senders[self._sender_index[index]],
+            'actual_message': actual_message
+        }
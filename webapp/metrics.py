@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Request, SQLite query and cache metrics for the web app, rendered in the
+Prometheus text exposition format at /metrics.
+
+Query latency is measured around cursor.execute(). SQLite does the bulk of
+the work (sorting, counting, the first step of a scan) inside execute, so
+that is what the histogram shows; rows fetched afterwards are counted
+separately. Queries slower than SLOW_QUERY_MS (environment variable, default
+100) are printed to the console. Caches report their lookups, the render
+time they spent and saved, and how much they hold.
+
+The registry lives in each server process, so with several gunicorn workers
+a scrape only returns the numbers of the worker that answered it. Every
+series carries a pid label naming that worker. Scrape each worker, or sum
+the series over pid once every worker has been scraped; a series whose pid
+disappears belongs to a worker that was restarted.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+QUERY_LABEL_LENGTH = 100
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels) + '}'
+
+
+def query_label(sql):
+    """Collapse a SQL statement into a short, stable label"""
+    return ' '.join(sql.split())[:QUERY_LABEL_LENGTH]
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._request_latency = {}
+        self._request_counts = {}
+        self._query_latency = {}
+        self._query_rows = {}
+        self._cache_requests = {}
+        self._cache_render_seconds = {}
+        self._cache_sizes = {}
+        self._slow_queries = 0
+
+    def observe_request(self, route, method, status, seconds):
+        with self._lock:
+            key = (('route', route), ('method', method))
+            self._request_latency.setdefault(key, Histogram()).observe(seconds)
+            count_key = key + (('status', status),)
+            self._request_counts[count_key] = self._request_counts.get(count_key, 0) + 1
+
+    def observe_query(self, sql, seconds):
+        label = query_label(sql)
+        with self._lock:
+            self._query_latency.setdefault((('query', label),), Histogram()).observe(seconds)
+            if seconds * 1000 >= self.slow_query_ms:
+                self._slow_queries += 1
+                slow = True
+            else:
+                slow = False
+        if slow:
+            print(f"🐢 Slow query ({seconds * 1000:.1f} ms): {label}")
+        return label
+
+    def count_rows(self, label, rows):
+        with self._lock:
+            key = (('query', label),)
+            self._query_rows[key] = self._query_rows.get(key, 0) + rows
+
+    def record_cache(self, cache, hit):
+        """Count a lookup in one of the app's in-memory caches"""
+        with self._lock:
+            key = (('cache', cache), ('result', 'hit' if hit else 'miss'))
+            self._cache_requests[key] = self._cache_requests.get(key, 0) + 1
+
+    def record_render(self, cache, seconds, saved=False):
+        """Count render time a cache spent on a miss, or saved on a hit (what the cached render took)"""
+        with self._lock:
+            key = (('cache', cache), ('result', 'saved' if saved else 'spent'))
+            self._cache_render_seconds[key] = self._cache_render_seconds.get(key, 0.0) + seconds
+
+    def set_cache_size(self, cache, entries, size):
+        """Current entries and bytes held by a cache"""
+        with self._lock:
+            self._cache_sizes[(('cache', cache), ('unit', 'entries'))] = entries
+            self._cache_sizes[(('cache', cache), ('unit', 'bytes'))] = size
+
+    def render(self):
+        """Render every metric in Prometheus text format, labelled with this process's pid"""
+        lines = []
+        # Read at render time: workers forked after import must not report their parent's pid
+        process = (('pid', os.getpid()),)
+        with self._lock:
+            self._render_histograms(lines, 'webapp_request_duration_seconds',
+                                    'Request latency by route', self._request_latency, process)
+            self._render_counters(lines, 'webapp_requests_total',
+                                  'Requests by route, method and status', self._request_counts, process)
+            self._render_histograms(lines, 'webapp_db_query_duration_seconds',
+                                    'SQLite statement execution time', self._query_latency, process)
+            self._render_counters(lines, 'webapp_db_rows_total',
+                                  'Rows fetched or modified per statement', self._query_rows, process)
+            self._render_counters(lines, 'webapp_cache_requests_total',
+                                  'In-memory cache lookups by result', self._cache_requests, process)
+            self._render_counters(lines, 'webapp_cache_render_seconds_total',
+                                  'Render time spent on cache misses and saved by cache hits',
+                                  self._cache_render_seconds, process)
+            self._render_gauges(lines, 'webapp_cache_size', 'Entries and bytes held by a cache', self._cache_sizes,
+                                process)
+            self._render_counters(lines, 'webapp_db_slow_queries_total',
+                                  f'Statements slower than {self.slow_query_ms:g} ms', {(): self._slow_queries},
+                                  process)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, histograms, process=()):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, histogram in sorted(histograms.items()):
+            labels = process + labels
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", f"{bound:g}"),))} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram.count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram.total:.6f}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+
+    @staticmethod
+    def _render_counters(lines, name, help_text, counters, process=(), metric_type='counter'):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(counters.items()):
+            if isinstance(value, float):
+                value = f'{value:.6f}'
+            lines.append(f'{name}{_format_labels(process + labels)} {value}')
+
+    @staticmethod
+    def _render_gauges(lines, name, help_text, gauges, process=()):
+        MetricsRegistry._render_counters(lines, name, help_text, gauges, process, metric_type='gauge')
+
+
+registry = MetricsRegistry()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """sqlite3 cursor that reports statement latency and row counts to the registry"""
+
+    _query = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._query = registry.observe_query(sql, time.perf_counter() - start)
+            if self.rowcount > 0:
+                registry.count_rows(self._query, self.rowcount)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._query = registry.observe_query(sql, time.perf_counter() - start)
+            if self.rowcount > 0:
+                registry.count_rows(self._query, self.rowcount)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None and self._query:
+            registry.count_rows(self._query, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        if self._query:
+            registry.count_rows(self._query, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self._query:
+            registry.count_rows(self._query, len(rows))
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+
+def instrumented_connect(database, **kwargs):
+    """sqlite3.connect() returning a connection whose statements are measured"""
+    return sqlite3.connect(database, factory=InstrumentedConnection, **kwargs)
+
+
+def instrument_app(app):
+    """Register request timing hooks on a Flask app"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            registry.observe_request(route, request.method, response.status_code,
+                                     time.perf_counter() - started)
+        return response
+
+    return app
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Multi-turn training samples from reviewed conversations.
+
+The pair export keeps only a guest message directly followed by an agent
+reply. This module keeps the whole exchange instead:
+
+1. guest and agent messages become user and assistant turns. Bot and template
+   messages are dropped, and consecutive turns of the same role are merged
+   into one, since a customer often splits a question over several messages.
+2. The turns are grouped into exchanges (a user turn and the assistant reply)
+   and packed greedily into windows that stay under a budget measured in
+   characters or tokens. Each window becomes one sample.
+
+An exchange that is larger than the budget on its own is skipped. The window
+before it is closed so no sample spans the gap.
+
+Token counts use tiktoken when it is installed and otherwise an estimate of
+one token per 4 bytes of UTF-8. The estimate counts Arabic text, at 2 bytes
+a letter, about twice as heavily as Latin, which is roughly what real
+tokenizers do.
+"""
+import math
+
+ROLE_MAP = {'guest': 'user', 'agent': 'assistant'}
+BUDGET_UNITS = ('tokens', 'chars')
+# Chat formats add a few tokens around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+BYTES_PER_TOKEN = 4
+TIKTOKEN_ENCODING = 'cl100k_base'
+
+
+def merge_turns(messages):
+    """(role, content) pairs -> alternating user/assistant turns with same-role runs merged"""
+    turns = []
+    for role, content in messages:
+        role = ROLE_MAP.get(role)
+        if role is None or not content:
+            continue
+        if turns and turns[-1]['role'] == role:
+            turns[-1]['content'] += '\n' + content
+        else:
+            turns.append({'role': role, 'content': content})
+    return turns
+
+
+def iter_exchanges(turns):
+    """(user, assistant) turn pairs; an opening agent greeting and an unanswered last question are left out"""
+    for i in range(len(turns) - 1):
+        if turns[i]['role'] == 'user' and turns[i + 1]['role'] == 'assistant':
+            yield turns[i], turns[i + 1]
+
+
+def iter_windows(turns, budget, measure):
+    """Pack consecutive exchanges into message lists whose measured size stays within budget"""
+    window = []
+    used = 0
+    for user, assistant in iter_exchanges(turns):
+        cost = measure(user['content']) + measure(assistant['content'])
+        if cost > budget:
+            # Too large for any sample; don't let a window span the gap it leaves
+            if window:
+                yield window
+            window, used = [], 0
+            continue
+        if window and used + cost > budget:
+            yield window
+            window, used = [], 0
+        window.extend((user, assistant))
+        used += cost
+    if window:
+        yield window
+
+
+def length_function(unit):
+    """Size of one message's content in the given budget unit"""
+    if unit == 'chars':
+        return len
+    if unit != 'tokens':
+        raise ValueError(f"Unknown budget unit {unit!r}, expected one of {', '.join(BUDGET_UNITS)}")
+
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception:
+        # Not installed, or its encoding files can't be downloaded
+        encoding = None
+
+    if encoding is not None:
+        return lambda text: len(encoding.encode(text)) + MESSAGE_OVERHEAD_TOKENS
+    return lambda text: math.ceil(len(text.encode('utf-8')) / BYTES_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
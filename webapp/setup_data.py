@@ -6,7 +6,8 @@ Run this before starting the web app
 import os
 import shutil
 import json
-from pathlib import Path
+
+from fs_scan import count_files, first_files
 
 def setup_data_structure():
     """Set up the data structure for the web app"""
@@ -37,13 +38,13 @@ def setup_data_structure():
     print("=" * 50)
     
     # Check if chat files exist
-    chat_files = list(Path(chat_dir).glob("*.txt"))
-    if not chat_files:
+    chat_file_count = count_files(chat_dir)
+    if not chat_file_count:
         print(f"❌ No chat files found in: {chat_dir}")
         print(f"📥 Please copy your WhatsApp conversation files (.txt) to: {chat_dir}")
         print(f"   Example: cp /path/to/your/chats/*.txt {chat_dir}/")
     else:
-        print(f"✅ Found {len(chat_files)} chat files in {chat_dir}")
+        print(f"✅ Found {chat_file_count} chat files in {chat_dir}")
     
     # Check if quality analysis report exists
     quality_report = os.path.join(organized_dir, "quality_analysis_report.json")
@@ -53,7 +54,7 @@ def setup_data_structure():
         print(f"   Example: cp /path/to/organized_whatsapp_conversations/quality_analysis_report.json {organized_dir}/")
         
         # Create a sample quality report if none exists
-        create_sample_quality_report(quality_report, chat_files)
+        create_sample_quality_report(quality_report, chat_dir, chat_file_count)
     else:
         print(f"✅ Quality analysis report found: {quality_report}")
     
@@ -72,15 +73,15 @@ def setup_data_structure():
     
     return True
 
-def create_sample_quality_report(report_path, chat_files):
+def create_sample_quality_report(report_path, chat_dir, chat_file_count):
     """Create a sample quality report if chat files exist but no report"""
-    if not chat_files:
+    if not chat_file_count:
         return
     
-    print(f"📝 Creating sample quality report with {len(chat_files)} files...")
+    print(f"📝 Creating sample quality report with {chat_file_count} files...")
     
     sample_data = []
-    for i, chat_file in enumerate(chat_files[:100]):  # Limit to first 100 files for demo
+    for i, chat_file in enumerate(first_files(chat_dir, 100)):  # Limit to first 100 files for demo
         sample_data.append({
             "filename": chat_file.name,
             "quality_score": 95 - (i % 20),  # Sample scores 75-95
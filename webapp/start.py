@@ -1,29 +1,111 @@
 #!/usr/bin/env python3
 """
 Simple script to start the WhatsApp Conversation Organizer web app
+
+The app is served by a production WSGI server by default: gunicorn (worker
+processes, each with a pool of threads) where it is installed, otherwise
+waitress (a thread pool in one process, also works on Windows). --server dev
+keeps Flask's development server.
 """
-import webbrowser
+import argparse
+import os
+import threading
 import time
-from app import app
+import webbrowser
+
+SERVERS = ('auto', 'gunicorn', 'waitress', 'dev')
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_THREADS = 8
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Start the WhatsApp Conversation Organizer web app")
+    parser.add_argument('--server', choices=SERVERS, default=os.environ.get('WEBAPP_SERVER', 'auto'),
+                        help="WSGI server; auto picks gunicorn, then waitress")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('WEBAPP_PORT', 5001)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEBAPP_WORKERS', DEFAULT_WORKERS)),
+                        help="Worker processes (gunicorn only)")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEBAPP_THREADS', DEFAULT_THREADS)),
+                        help="Request threads per worker")
+    parser.add_argument('--no-browser', action='store_true', help="Don't open a browser tab on start")
+    return parser.parse_args(argv)
+
+
+def pick_server(requested):
+    """Resolve 'auto' to the best installed WSGI server"""
+    if requested != 'auto':
+        return requested
+    for server in ('gunicorn', 'waitress'):
+        try:
+            __import__(server)
+            return server
+        except ImportError:
+            continue
+    print("⚠️  Neither gunicorn nor waitress is installed (pip install waitress); using the development server")
+    return 'dev'
+
+
+def serve_gunicorn(app, host, port, workers, threads):
+    """Fork `workers` gunicorn processes that each serve requests on `threads` threads"""
+    from gunicorn.app.base import BaseApplication
+
+    class ReviewApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('accesslog', None)
+
+        def load(self):
+            # The app (and its database setup) is already loaded here, before
+            # forking, so workers share it instead of each initialising it
+            return app
+
+    ReviewApplication().run()
+
+
+def serve_waitress(app, host, port, threads):
+    from waitress import serve
+
+    serve(app, host=host, port=port, threads=threads)
+
+
+def start_app(argv=None):
+    args = parse_args(argv)
+    server = pick_server(args.server)
+
+    from app import app
 
-def start_app():
     print("🚀 Starting WhatsApp Conversation Organizer...")
     print(f"📊 Loaded conversation data successfully")
-    print(f"🌐 Web app will be available at: http://localhost:5001")
-    print(f"👥 Team Member 1: http://localhost:5001/review?reviewer=Team%20Member%201")
-    print(f"👥 Team Member 2: http://localhost:5001/review?reviewer=Team%20Member%202")
+    if server == 'gunicorn':
+        print(f"⚙️  Server: gunicorn, {args.workers} workers x {args.threads} threads")
+    elif server == 'waitress':
+        print(f"⚙️  Server: waitress, {args.threads} threads")
+    else:
+        print("⚙️  Server: Flask development server (not for team use)")
+    print(f"🌐 Web app will be available at: http://localhost:{args.port}")
+    print(f"👥 Team Member 1: http://localhost:{args.port}/review?reviewer=Team%20Member%201")
+    print(f"👥 Team Member 2: http://localhost:{args.port}/review?reviewer=Team%20Member%202")
     print(f"\n💡 Press Ctrl+C to stop the server")
-    
-    # Open browser after a short delay
-    def open_browser():
-        time.sleep(2)
-        webbrowser.open('http://localhost:5001')
-    
-    import threading
-    threading.Thread(target=open_browser, daemon=True).start()
-    
-    # Start the Flask app
-    app.run(debug=False, host='0.0.0.0', port=5001)
+
+    if not args.no_browser:
+        # Open browser after a short delay
+        def open_browser():
+            time.sleep(2)
+            webbrowser.open(f'http://localhost:{args.port}')
+
+        threading.Thread(target=open_browser, daemon=True).start()
+
+    if server == 'gunicorn':
+        serve_gunicorn(app, args.host, args.port, args.workers, args.threads)
+    elif server == 'waitress':
+        serve_waitress(app, args.host, args.port, args.threads)
+    else:
+        app.run(debug=False, host=args.host, port=args.port)
+
 
 if __name__ == '__main__':
-    start_app()
\ No newline at end of file
+    start_app()
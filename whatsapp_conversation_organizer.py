@@ -1,202 +1,493 @@
 #!/usr/bin/env python3
+import heapq
+import math
+import multiprocessing
 import os
 import re
 import random
 from datetime import datetime
 from pathlib import Path
+import argparse
+import cProfile
 import json
+import pstats
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_writer import write_review_batches
+from byte_parser import ByteParser, NeedsTextParse
+from conversation_records import Analysis, Features, RankedConversation, ScannedFile
+from file_budget import (DEFAULT_MAX_FILE_MB, DEFAULT_MAX_MESSAGES, DEFAULT_SAMPLE_MESSAGES, DEFAULT_TIME_LIMIT,
+                         FileBudget, FileTimeLimitExceeded, until_deadline)
+from run_metrics import RunMetrics
+from scoring_profile import ScoringProfile, load_scoring_profile
+from shard_report import (in_shard, load_partial_reports, merge_partial_reports, parse_shard,
+                          partial_report_path, rank_key, write_partial_report)
+from webapp.chat_store import decode_chat, open_chat_store
+from webapp.columnar_report import REPORT_BIN, write_columnar_report
+from webapp.fs_scan import iter_files
+
+TIMESTAMP_FORMATS = ['%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S']
+FEATURES_FILENAME = 'conversation_features.jsonl'
+RUN_REPORT_FILENAME = 'run_report.json'
+PROFILE_FILENAME = 'organizer.pstats'
+PROFILE_TOP_FUNCTIONS = 25
+# A line that can hold a message: starts with '[' once decoding has dropped any
+# invalid bytes (all >= 0x80) in front of it. Text mode also splits on a lone \r.
+MESSAGE_LINE_BYTES = re.compile(rb'[\r\n][\x80-\xff]*\[')
+
+class TopKThreshold:
+    """Score a conversation must reach to still make the top k, tracked while scanning"""
+    def __init__(self, k):
+        self.k = k
+        self._scores = []
+    
+    def offer(self, score):
+        if score <= 0 or self.k <= 0:
+            return
+        if len(self._scores) < self.k:
+            heapq.heappush(self._scores, score)
+        elif score > self._scores[0]:
+            heapq.heapreplace(self._scores, score)
+    
+    @property
+    def value(self):
+        # Until k conversations have been scored anything with a positive score could make it
+        return self._scores[0] if self.k > 0 and len(self._scores) >= self.k else 0
 
 class ConversationAnalyzer:
-    def __init__(self, chat_directory):
+    def __init__(self, chat_directory, scoring_profile=None, metrics=None, budget=None, parser='bytes'):
         self.chat_directory = Path(chat_directory)
+        self.metrics = metrics or RunMetrics()
+        self.scoring_profile = scoring_profile or load_scoring_profile()
+        # Sampling and time limits for pathological chats (see file_budget.py)
+        self.budget = budget or FileBudget()
+        # parser='text' decodes every file up front; both give the same features (see byte_parser.py)
+        self.parser = parser
+        self.byte_parser = None
+        if parser == 'bytes':
+            self.byte_parser = ByteParser(self.scoring_profile.question_words,
+                                          self.scoring_profile.template_indicators, TIMESTAMP_FORMATS)
+        # chat_directory may also be a packed chat store (see webapp/chat_store.py)
+        self.chat_store = open_chat_store(self.chat_directory)
+        self.features = []
         self.conversations = []
+        self.pruned_for_top_k = None
+        # Score ceiling per message line count, whatever the file size (see score_upper_bound)
+        self._line_ceilings = {}
+    
+    def _read_chat(self, file_path):
+        """Return (text, size in bytes) for a chat on disk or in the packed chat store"""
+        if self.chat_store is not None:
+            name = Path(file_path).name
+            return self.chat_store.read_text(name), self.chat_store.size(name)
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read(), os.fstat(f.fileno()).st_size
+    
+    def _read_chat_bytes(self, file_path):
+        if self.chat_store is not None:
+            return self.chat_store.read_bytes(Path(file_path).name)
+        with open(file_path, 'rb') as f:
+            return f.read()
+    
+    def read_chat_text(self, file_path):
+        """Read a chat export from disk or, for a packed chat store, by random access"""
+        return self._read_chat(file_path)[0]
+    
+    def list_chat_files(self, with_sizes=False):
+        """All chat files to scan as paths under chat_directory, optionally paired with their sizes"""
+        if self.chat_store is not None:
+            names = self.chat_store.names()
+            if with_sizes:
+                return [(self.chat_directory / name, self.chat_store.size(name)) for name in names]
+            return [self.chat_directory / name for name in names]
+        
+        if with_sizes:
+            return [(Path(entry.path), entry.stat().st_size) for entry in iter_files(self.chat_directory)]
+        return [Path(entry.path) for entry in iter_files(self.chat_directory)]
+    
+    def extract_features(self, file_path, threshold=None):
+        """Extract the raw, profile-independent features used for quality scoring.
+
+        With a threshold, returns None without parsing when the file's score
+        ceiling (score_upper_bound) can't beat it. Returns None as well for a
+        file that runs over the budget's time limit.
+        """
+        features, size, stage_times, skipped = self._extract_features_timed(file_path, threshold)
+        self.metrics.record_file(file_path, size, stage_times)
+        self._count_outcome(file_path, features, skipped)
+        return features
+    
+    def _count_outcome(self, file_path, features, skipped):
+        """Count sampled and skipped ('pruned' or 'timed_out') files for the run report"""
+        if skipped == 'timed_out':
+            print(f"Skipped {file_path}: not done after the {self.budget.time_limit}s per-file time limit")
+        if skipped:
+            self.metrics.count(f'files_{skipped}')
+        elif features and features.get('sampled_messages'):
+            self.metrics.count('files_sampled')
+    
+    def score_upper_bound(self, data):
+        """Highest score a chat could get, from its raw bytes without decoding or parsing it.
+
+        Every message is a line starting with '[', so those lines bound the
+        message and question counts; the file size bounds the text lengths.
+        """
+        return self._score_ceiling(len(MESSAGE_LINE_BYTES.findall(data)) + 1, len(data))
+    
+    def _score_ceiling(self, lines, size):
+        return self.scoring_profile.upper_bound({
+            'message_count': (0, lines),
+            'question_count': (0, lines),
+            # Scored chats have at least min_messages messages (or a sample of them)
+            # sharing at most size characters
+            'avg_message_length': (0, size / max(1, min(self.scoring_profile.min_messages,
+                                                        self.budget.sample_messages))),
+            'length_spread': (0, size),
+            'template_ratio': (0, 1),
+            'unique_content_ratio': (0, 1),
+        })
+    
+    def _can_reach(self, data, threshold):
+        """score_upper_bound(data) > 0 and >= threshold, usually settled by the cached ceiling for the line count"""
+        lines = len(MESSAGE_LINE_BYTES.findall(data)) + 1
+        ceiling = self._line_ceilings.get(lines)
+        if ceiling is None:
+            # The bound only grows with the size, so this holds for every file with this many lines
+            ceiling = self._line_ceilings[lines] = self._score_ceiling(lines, math.inf)
+        if ceiling <= 0 or ceiling < threshold:
+            return False
+        bound = self._score_ceiling(lines, len(data))
+        return bound > 0 and bound >= threshold
+    
+    def _extract_features_timed(self, file_path, threshold=None):
+        """extract_features plus the file size, seconds spent per stage and why the file was
+        skipped: None, 'pruned' or 'timed_out'"""
+        started = time.perf_counter()
+        deadline = self.budget.deadline(started)
+        if threshold is None and self.byte_parser is None:
+            content, size = self._read_chat(file_path)
+            read_done = time.perf_counter()
+            stage_times = {'read': read_done - started}
+        else:
+            data = self._read_chat_bytes(file_path)
+            size = len(data)
+            read_done = time.perf_counter()
+            stage_times = {'read': read_done - started}
+            if threshold is not None:
+                if not self._can_reach(data, threshold):
+                    stage_times['prune'] = time.perf_counter() - read_done
+                    return None, size, stage_times, 'pruned'
+                stage_times['prune'] = time.perf_counter() - read_done
+                read_done = time.perf_counter()
+            content = data if self.byte_parser is not None else decode_chat(data)
+        
+        try:
+            return self._extract_features_within(file_path, content, size, deadline, read_done, stage_times)
+        except FileTimeLimitExceeded:
+            stage_times['parse'] = time.perf_counter() - read_done
+            return None, size, stage_times, 'timed_out'
+    
+    def _extract_features_within(self, file_path, content, size, deadline, read_done, stage_times):
+        """Parse and classify chat text, or raw bytes for the byte parser, raising
+        FileTimeLimitExceeded once past the deadline"""
+        if isinstance(content, bytes):
+            # Over-budget chats are sampled from the decoded text
+            if not self.budget.over(size, content):
+                try:
+                    return self._extract_features_from_bytes(content, size, deadline, read_done, stage_times)
+                except NeedsTextParse:
+                    pass
+            content = decode_chat(content)
+        
+        content = content.strip()
+        if not content:
+            stage_times['parse'] = time.perf_counter() - read_done
+            return None, size, stage_times, None
+        
+        sampled = self.budget.over(size, content)
+        if sampled:
+            lines, total_messages = self.budget.sample_lines(content, Path(file_path).name)
+        else:
+            lines = content.split('\n')
+        messages = []
+        
+        # Parse messages with timestamps
+        for line in until_deadline(lines, deadline):
+            timestamp_match = re.match(r'\[([^\]]+)\]', line)
+            if timestamp_match:
+                timestamp = timestamp_match.group(1)
+                message_text = line[len(timestamp_match.group(0)):].strip()
+                if message_text:
+                    messages.append({
+                        'timestamp': timestamp,
+                        'text': message_text
+                    })
+        
+        # Time span analysis
+        timestamps = []
+        for msg in until_deadline(messages, deadline):
+            # Try different timestamp formats
+            timestamp_str = msg['timestamp']
+            for fmt in TIMESTAMP_FORMATS:
+                try:
+                    timestamps.append(datetime.strptime(timestamp_str, fmt))
+                    break
+                except ValueError:
+                    continue
+        
+        parse_done = time.perf_counter()
+        stage_times['parse'] = parse_done - read_done
+        if not messages:
+            return None, size, stage_times, None
+        
+        profile = self.scoring_profile
+        question_count = 0
+        template_count = 0
+        for msg in until_deadline(messages, deadline):
+            text_lower = msg['text'].lower()
+            if any(word in text_lower for word in profile.question_words):
+                question_count += 1
+            if any(indicator in text_lower for indicator in profile.template_indicators):
+                template_count += 1
+        
+        features = self._build_features([msg['text'] for msg in messages], timestamps,
+                                        question_count, template_count)
+        if sampled:
+            # Counts scale up to the whole chat; averages and ratios stand as sampled
+            features['message_count'] = total_messages
+            features['question_count'] = round(question_count * total_messages / len(messages))
+            features['sampled_messages'] = len(messages)
+        
+        stage_times['classify'] = time.perf_counter() - parse_done
+        return features, size, stage_times, None
+    
+    def _extract_features_from_bytes(self, data, size, deadline, read_done, stage_times):
+        texts, timestamps = self.byte_parser.parse(data, deadline)
+        parse_done = time.perf_counter()
+        stage_times['parse'] = parse_done - read_done
+        if not texts:
+            return None, size, stage_times, None
+        
+        question_count = 0
+        template_count = 0
+        classify = self.byte_parser.classify
+        for text in until_deadline(texts, deadline):
+            is_question, is_template = classify(text)
+            question_count += is_question
+            template_count += is_template
+        
+        features = self._build_features(texts, timestamps, question_count, template_count)
+        stage_times['classify'] = time.perf_counter() - parse_done
+        return features, size, stage_times, None
+    
+    def _build_features(self, texts, timestamps, question_count, template_count):
+        """The Features record from message texts (str, or bytes for ASCII ones) and parsed timestamps"""
+        message_lengths = [len(text) for text in texts]
+        features = Features(
+            message_count=len(texts),
+            avg_message_length=sum(message_lengths) / len(texts),
+            question_count=question_count,
+            template_ratio=template_count / len(texts),
+            length_spread=max(message_lengths) - min(message_lengths),
+            unique_content_ratio=len(set(texts)) / len(texts),
+            time_span_hours=None
+        )
         
+        if len(timestamps) >= 2:
+            time_span = max(timestamps) - min(timestamps)
+            features['time_span_hours'] = time_span.total_seconds() / 3600
+        return features
+    
+    def score_features(self, features):
+        """Score extracted features with the active scoring profile"""
+        if not features or features['message_count'] < self.scoring_profile.min_messages:
+            return 0, {}
+        
+        quality_score = self.scoring_profile.score(features)
+        analysis = Analysis(features, self.scoring_profile.matches('conversation_flow', features))
+        return quality_score, analysis
+    
     def analyze_conversation_quality(self, file_path):
         """Analyze the quality of a conversation based on multiple criteria"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            if not content.strip():
-                return 0, {}
-            
-            lines = content.strip().split('\n')
-            messages = []
-            
-            # Parse messages with timestamps
-            for line in lines:
-                timestamp_match = re.match(r'\[([^\]]+)\]', line)
-                if timestamp_match:
-                    timestamp = timestamp_match.group(1)
-                    message_text = line[len(timestamp_match.group(0)):].strip()
-                    if message_text:
-                        messages.append({
-                            'timestamp': timestamp,
-                            'text': message_text
-                        })
-            
-            if len(messages) < 2:
-                return 0, {}
-            
-            quality_score = 0
-            analysis = {
-                'message_count': len(messages),
-                'avg_message_length': 0,
-                'has_questions': False,
-                'conversation_flow': False,
-                'template_ratio': 0,
-                'unique_content_ratio': 0,
-                'time_span_hours': 0
-            }
-            
-            # 1. Message count (more messages = better conversation)
-            analysis['message_count'] = len(messages)
-            if len(messages) >= 10:
-                quality_score += 20
-            elif len(messages) >= 5:
-                quality_score += 10
-            elif len(messages) >= 3:
-                quality_score += 5
-            
-            # 2. Average message length (avoid too short or too long)
-            total_length = sum(len(msg['text']) for msg in messages)
-            analysis['avg_message_length'] = total_length / len(messages)
-            if 20 <= analysis['avg_message_length'] <= 200:
-                quality_score += 15
-            elif 10 <= analysis['avg_message_length'] <= 300:
-                quality_score += 10
-            
-            # 3. Check for questions (indicates engagement)
-            question_words = ['?', 'how', 'what', 'when', 'where', 'why', 'can', 'could', 'would', 'هل', 'كيف', 'ماذا', 'متى', 'أين', 'لماذا']
-            question_count = 0
-            for msg in messages:
-                text_lower = msg['text'].lower()
-                if any(word in text_lower for word in question_words):
-                    question_count += 1
-            
-            if question_count > 0:
-                analysis['has_questions'] = True
-                quality_score += min(question_count * 5, 20)
-            
-            # 4. Template detection (lower score for high template ratio)
-            template_indicators = [
-                'template', 'verification code', 'your code is', 'was sent',
-                'نرحب بك', 'رمز التحقق', 'تم إرسال', 'مطعم', 'حجز'
-            ]
-            
-            template_count = 0
-            for msg in messages:
-                text_lower = msg['text'].lower()
-                if any(indicator in text_lower for indicator in template_indicators):
-                    template_count += 1
-            
-            analysis['template_ratio'] = template_count / len(messages)
-            if analysis['template_ratio'] < 0.3:
-                quality_score += 15
-            elif analysis['template_ratio'] < 0.5:
-                quality_score += 10
-            else:
-                quality_score -= 10
-            
-            # 5. Conversation flow (check for back-and-forth pattern)
-            if len(messages) >= 4:
-                flow_score = 0
-                message_lengths = [len(msg['text']) for msg in messages]
-                
-                # Check for variety in message lengths (indicates natural conversation)
-                length_variance = max(message_lengths) - min(message_lengths)
-                if length_variance > 50:
-                    flow_score += 10
-                    analysis['conversation_flow'] = True
-                
-                quality_score += flow_score
-            
-            # 6. Unique content ratio
-            unique_messages = set(msg['text'] for msg in messages)
-            analysis['unique_content_ratio'] = len(unique_messages) / len(messages)
-            if analysis['unique_content_ratio'] > 0.8:
-                quality_score += 10
-            elif analysis['unique_content_ratio'] > 0.6:
-                quality_score += 5
-            
-            # 7. Time span analysis
-            try:
-                timestamps = []
-                for msg in messages:
-                    # Try different timestamp formats
-                    timestamp_str = msg['timestamp']
-                    for fmt in ['%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S']:
-                        try:
-                            ts = datetime.strptime(timestamp_str, fmt)
-                            timestamps.append(ts)
-                            break
-                        except ValueError:
-                            continue
-                
-                if len(timestamps) >= 2:
-                    time_span = max(timestamps) - min(timestamps)
-                    analysis['time_span_hours'] = time_span.total_seconds() / 3600
-                    
-                    # Prefer conversations spanning reasonable time (not too quick, not too long)
-                    if 0.5 <= analysis['time_span_hours'] <= 48:
-                        quality_score += 10
-                    elif 0.1 <= analysis['time_span_hours'] <= 168:  # up to a week
-                        quality_score += 5
-            
-            except Exception:
-                pass
-            
-            return max(0, quality_score), analysis
-            
+            return self.score_features(self.extract_features(file_path))
         except Exception as e:
             print(f"Error analyzing {file_path}: {e}")
             return 0, {}
     
-    def scan_all_conversations(self):
-        """Scan all conversation files and analyze their quality"""
+    def scan_all_conversations(self, workers=1, shard=None, prune_top_k=None):
+        """Scan all conversation files and analyze their quality.
+
+        shard=(i, N) scans only the files that hash to shard i of N (see shard_report.py).
+        prune_top_k=K skips files that provably can't make the top K. The top K
+        comes out the same, but those files are missing from the features and
+        from the conversations below the top K.
+        """
         print("Scanning conversations for quality analysis...")
+        print(f"Scoring profile: {self.scoring_profile.label}")
         
-        txt_files = list(self.chat_directory.glob("*.txt"))
+        with self.metrics.stage('enumerate'):
+            # Pruning starts once k conversations are scored; big chats score
+            # high, so the largest-first order raises the threshold early
+            if workers > 1 or prune_top_k is not None:
+                file_sizes = self.list_chat_files(with_sizes=True)
+                if shard:
+                    file_sizes = [(file_path, size) for file_path, size in file_sizes if in_shard(file_path.name, shard)]
+                txt_files = [file_path for file_path, _ in file_sizes]
+            else:
+                txt_files = self.list_chat_files()
+                if shard:
+                    txt_files = [file_path for file_path in txt_files if in_shard(file_path.name, shard)]
         total_files = len(txt_files)
-        print(f"Found {total_files} conversation files")
+        if shard:
+            print(f"Found {total_files} conversation files in shard {shard[0]}/{shard[1]}")
+        else:
+            print(f"Found {total_files} conversation files")
         
-        processed = 0
-        for file_path in txt_files:
+        threshold = TopKThreshold(prune_top_k) if prune_top_k is not None else None
+        self.pruned_for_top_k = prune_top_k
+        pruned_before = self.metrics.counters.get('files_pruned', 0)
+        if workers > 1:
+            results = self._extract_features_parallel(file_sizes, workers, threshold)
+        elif threshold is not None:
+            order = sorted(range(total_files), key=lambda i: file_sizes[i][1], reverse=True)
+            results = [None] * total_files
+            for index, features in zip(order, self._extract_features_serial([txt_files[i] for i in order], threshold)):
+                results[index] = features
+        else:
+            results = self._extract_features_serial(txt_files)
+        
+        self.features = []
+        for file_path, features in zip(txt_files, results):
+            if features:
+                self.features.append(ScannedFile(str(file_path), features))
+        
+        if threshold is not None:
+            pruned = self.metrics.counters.get('files_pruned', 0) - pruned_before
+            print(f"Pruned {pruned} of {total_files} files ({pruned / max(1, total_files):.1%}) "
+                  f"that could not reach the top {prune_top_k}")
+        self.rank_features()
+    
+    def _extract_features_serial(self, txt_files, threshold=None):
+        total_files = len(txt_files)
+        for processed, file_path in enumerate(txt_files, 1):
             try:
-                quality_score, analysis = self.analyze_conversation_quality(file_path)
-                
-                if quality_score > 0:  # Only include conversations with some quality
-                    self.conversations.append({
-                        'file_path': str(file_path),
-                        'filename': file_path.name,
-                        'quality_score': quality_score,
-                        'analysis': analysis
-                    })
+                if threshold is None:
+                    yield self.extract_features(file_path)
+                else:
+                    features = self.extract_features(file_path, threshold.value)
+                    if features:
+                        threshold.offer(self.score_features(features)[0])
+                    yield features
+            except Exception as e:
+                print(f"Error processing {file_path}: {e}")
+                yield None
+            
+            if processed % 10000 == 0:
+                print(f"Processed {processed}/{total_files} files...")
+    
+    def _extract_features_parallel(self, file_sizes, workers, threshold=None):
+        """Extract features on a process pool, handing out the largest files first
+        so one huge chat picked up late does not leave the other workers idle"""
+        total_files = len(file_sizes)
+        order = sorted(range(total_files), key=lambda i: file_sizes[i][1], reverse=True)
+        chunksize = max(1, min(64, total_files // (workers * 64)))
+        results = [None] * total_files
+        # Workers read the threshold as it rises; a stale value only prunes less
+        shared_threshold = multiprocessing.Value('d', 0.0, lock=False) if threshold is not None else None
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_scan_worker,
+                                 initargs=(str(self.chat_directory), self.scoring_profile.source,
+                                           shared_threshold, self.budget, self.parser)) as pool:
+            outcomes = pool.map(_extract_features_in_worker,
+                                [str(file_sizes[i][0]) for i in order], chunksize=chunksize)
+            for processed, (index, (features, size, stage_times, skipped, error)) in enumerate(zip(order, outcomes), 1):
+                if error:
+                    print(f"Error processing {file_sizes[index][0]}: {error}")
+                else:
+                    self.metrics.record_file(file_sizes[index][0], size, stage_times)
+                self._count_outcome(file_sizes[index][0], features, skipped)
+                if features and threshold is not None:
+                    threshold.offer(self.score_features(features)[0])
+                    shared_threshold.value = threshold.value
+                results[index] = features
                 
-                processed += 1
                 if processed % 10000 == 0:
                     print(f"Processed {processed}/{total_files} files...")
-                    
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-                continue
+        
+        return results
+    
+    def rank_features(self):
+        """Score and sort the extracted features without touching any chat file"""
+        self.conversations = []
+        with self.metrics.stage('score'):
+            for record in self.features:
+                quality_score, analysis = self.score_features(record['features'])
+                
+                if quality_score > 0:  # Only include conversations with some quality
+                    self.conversations.append(RankedConversation(record, quality_score, analysis))
         
         print(f"Analysis complete. Found {len(self.conversations)} quality conversations")
         
-        # Sort by quality score
-        self.conversations.sort(key=lambda x: x['quality_score'], reverse=True)
+        # Sort by quality score; ties go by filename so shards merge to the same order
+        with self.metrics.stage('sort'):
+            self.conversations.sort(key=rank_key)
+    
+    def save_features(self, features_path):
+        """Persist the raw per-file features so the corpus can be re-ranked later"""
+        with open(features_path, 'w', encoding='utf-8') as f:
+            header = {
+                'format': 'conversation_features',
+                'feature_signature': self.scoring_profile.feature_signature,
+                'scoring_profile': self.scoring_profile.label,
+                'file_count': len(self.features)
+            }
+            if self.pruned_for_top_k is not None:
+                header['pruned_for_top_k'] = self.pruned_for_top_k
+            f.write(json.dumps(header, ensure_ascii=False) + '\n')
+            for record in self.features:
+                f.write(json.dumps(record.to_dict(), ensure_ascii=False) + '\n')
+        
+        print(f"Saved features for {len(self.features)} files to {features_path}")
+    
+    def load_features(self, features_path):
+        """Load features saved by save_features, checking they match the active profile"""
+        with open(features_path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('pruned_for_top_k') is not None:
+                raise ValueError(
+                    f"{features_path} comes from a --prune scan and lacks the files that could not reach "
+                    f"its top {header['pruned_for_top_k']}; a full rescan is required"
+                )
+            if header.get('feature_signature') != self.scoring_profile.feature_signature:
+                raise ValueError(
+                    f"{features_path} was extracted with different indicator lists "
+                    f"({header.get('scoring_profile')}); a full rescan is required"
+                )
+            records = (json.loads(line) for line in f if line.strip())
+            self.features = [ScannedFile(record['file_path'], Features(**record['features'])) for record in records]
         
+        print(f"Loaded features for {len(self.features)} files from {features_path}")
+    
     def get_top_conversations(self, count=5000):
         """Get the top N conversations by quality"""
         return self.conversations[:count]
     
     def format_conversation_for_team(self, file_path):
-        """Format a conversation file for team review with proper agent/guest/template/bot classification"""
+        """Format a conversation file for team review with proper agent/guest/template/bot classification.
+
+        Chats over the file budget are formatted from the same message sample the score came from.
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            deadline = self.budget.deadline(time.perf_counter())
+            content, size = self._read_chat(file_path)
+            content = content.strip()
             
-            lines = content.strip().split('\n')
+            if self.budget.over(size, content):
+                lines, _ = self.budget.sample_lines(content, Path(file_path).name)
+            else:
+                lines = content.split('\n')
             formatted_messages = []
             
             # Known agent names (add more as needed)
@@ -220,7 +511,7 @@ class ConversationAnalyzer:
                 'تم تحويلك الى احد مندوبي', 'اختر اللغة المفضلة'
             ]
             
-            for line in lines:
+            for line in until_deadline(lines, deadline):
                 timestamp_match = re.match(r'\[([^\]]+)\]', line)
                 if timestamp_match:
                     message_text = line[len(timestamp_match.group(0)):].strip()
@@ -256,11 +547,15 @@ class ConversationAnalyzer:
             
             return formatted_messages
             
+        except FileTimeLimitExceeded:
+            print(f"Skipped formatting {file_path}: not done after the {self.budget.time_limit}s per-file time limit")
+            self.metrics.count('format_timed_out')
+            return []
         except Exception as e:
             print(f"Error formatting {file_path}: {e}")
             return []
     
-    def save_top_conversations(self, output_dir, count=5000):
+    def save_top_conversations(self, output_dir, count=5000, write_batches=True, workers=4):
         """Save the top conversations to organized files"""
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
@@ -268,65 +563,119 @@ class ConversationAnalyzer:
         top_conversations = self.get_top_conversations(count)
         
         # Save quality analysis report
-        quality_report = []
-        for conv in top_conversations:
-            quality_report.append({
-                'filename': conv['filename'],
-                'quality_score': conv['quality_score'],
-                'message_count': conv['analysis']['message_count'],
-                'avg_message_length': round(conv['analysis']['avg_message_length'], 2),
-                'has_questions': conv['analysis']['has_questions'],
-                'template_ratio': round(conv['analysis']['template_ratio'], 2),
-                'unique_content_ratio': round(conv['analysis']['unique_content_ratio'], 2)
-            })
+        quality_report = [report_row(conv) for conv in top_conversations]
         
-        with open(output_path / 'quality_analysis_report.json', 'w', encoding='utf-8') as f:
-            json.dump(quality_report, f, indent=2, ensure_ascii=False)
+        with self.metrics.stage('write'):
+            with open(output_path / 'quality_analysis_report.json', 'w', encoding='utf-8') as f:
+                json.dump(quality_report, f, indent=2, ensure_ascii=False)
+            
+            # Compact columnar copy so consumers can read just the columns they need
+            write_columnar_report(output_path / REPORT_BIN, quality_report)
         
-        # Create batches for team review (500 conversations per file for manageable chunks)
-        batch_size = 500
-        batch_num = 1
+        if not write_batches:
+            print(f"Saved quality report for {len(top_conversations)} conversations to {output_path}")
+            return len(top_conversations)
         
-        for i in range(0, len(top_conversations), batch_size):
-            batch = top_conversations[i:i + batch_size]
-            batch_file = output_path / f'conversations_batch_{batch_num:02d}.txt'
-            
-            with open(batch_file, 'w', encoding='utf-8') as f:
-                f.write(f"=== BATCH {batch_num} - TOP QUALITY WHATSAPP CONVERSATIONS ===\n")
-                f.write(f"Total conversations in this batch: {len(batch)}\n")
-                f.write(f"Quality score range: {batch[-1]['quality_score']} - {batch[0]['quality_score']}\n")
-                f.write(f"\nCLASSIFICATION LEGEND:\n")
-                f.write(f"• agent: Staff members (Rona, Soha, Modi, Sarah Call Center, etc.)\n")
-                f.write(f"• guest: Customer/client messages\n") 
-                f.write(f"• template: Automated template messages (booking confirmations, etc.)\n")
-                f.write(f"• bot: Automated bot responses\n\n")
-                
-                for j, conv in enumerate(batch, 1):
-                    f.write(f"\n{'='*80}\n")
-                    f.write(f"CONVERSATION {i + j} - File: {conv['filename']}\n")
-                    f.write(f"Quality Score: {conv['quality_score']}\n")
-                    f.write(f"Messages: {conv['analysis']['message_count']}, ")
-                    f.write(f"Avg Length: {conv['analysis']['avg_message_length']:.1f}, ")
-                    f.write(f"Questions: {conv['analysis']['has_questions']}\n")
-                    f.write(f"{'='*80}\n")
-                    
-                    formatted_messages = self.format_conversation_for_team(conv['file_path'])
-                    for message in formatted_messages:
-                        f.write(f"{message}\n")
-                    f.write(f"\n")
-            
-            batch_num += 1
+        # Create batches for team review (500 conversations per file for manageable chunks)
+        batch_entries = [{
+            'filename': conv['filename'],
+            'file_path': conv['file_path'],
+            'quality_score': conv['quality_score'],
+            'message_count': conv['analysis']['message_count'],
+            'avg_message_length': conv['analysis']['avg_message_length'],
+            'has_questions': conv['analysis']['has_questions'],
+            'sampled': conv['analysis'].get('sampled', False)
+        } for conv in top_conversations]
+        batch_count = write_review_batches(batch_entries, output_path, self.format_conversation_for_team,
+                                           workers=workers, metrics=self.metrics)
         
         print(f"Saved {len(top_conversations)} top quality conversations to {output_path}")
-        print(f"Created {batch_num - 1} batch files for team review")
+        print(f"Created {batch_count} batch files for team review")
         
         return len(top_conversations)
 
-def main():
-    # Configuration
-    chat_directory = "/Users/mahmouddinnawi/Desktop/chats"
-    output_directory = "/Users/mahmouddinnawi/Data_Org/organized_whatsapp_conversations"
-    target_conversations = 5000
+def report_row(conv):
+    """One quality_analysis_report.json entry for a ranked conversation"""
+    return {
+        'filename': conv['filename'],
+        'quality_score': conv['quality_score'],
+        'message_count': conv['analysis']['message_count'],
+        'avg_message_length': round(conv['analysis']['avg_message_length'], 2),
+        'has_questions': conv['analysis']['has_questions'],
+        'template_ratio': round(conv['analysis']['template_ratio'], 2),
+        'unique_content_ratio': round(conv['analysis']['unique_content_ratio'], 2)
+    }
+
+_scan_worker_analyzer = None
+_scan_worker_threshold = None
+
+def _init_scan_worker(chat_directory, profile_source, shared_threshold=None, budget=None, parser='bytes'):
+    """Process pool initializer: build one analyzer per worker process"""
+    global _scan_worker_analyzer, _scan_worker_threshold
+    _scan_worker_analyzer = ConversationAnalyzer(chat_directory, ScoringProfile(profile_source), budget=budget,
+                                                 parser=parser)
+    _scan_worker_threshold = shared_threshold
+
+def _extract_features_in_worker(file_path):
+    try:
+        threshold = _scan_worker_threshold.value if _scan_worker_threshold is not None else None
+        features, size, stage_times, skipped = _scan_worker_analyzer._extract_features_timed(file_path, threshold)
+        return features, size, stage_times, skipped, None
+    except Exception as e:
+        return None, 0, {}, None, str(e)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="WhatsApp Conversation Quality Analyzer")
+    parser.add_argument('--chat-dir', default="/Users/mahmouddinnawi/Desktop/chats",
+                        help="Directory containing the exported chat .txt files")
+    parser.add_argument('--output-dir', default="/Users/mahmouddinnawi/Data_Org/organized_whatsapp_conversations",
+                        help="Where the quality report and batch files are written")
+    parser.add_argument('--target', type=int, default=5000,
+                        help="Number of top conversations to keep")
+    parser.add_argument('--scoring-profile', default=None,
+                        help="Scoring profile JSON (defaults to scoring_profile.json)")
+    parser.add_argument('--rerank', action='store_true',
+                        help="Re-rank from the stored conversation_features.jsonl instead of rescanning")
+    parser.add_argument('--report-only', action='store_true',
+                        help="Only write quality_analysis_report.json, skip the batch files")
+    parser.add_argument('--scan-workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes extracting features in parallel (1 scans serially)")
+    parser.add_argument('--writers', type=int, default=4,
+                        help="Worker threads formatting batch files in parallel")
+    parser.add_argument('--run-report', default=None,
+                        help=f"Where to write the JSON run report (defaults to <output-dir>/{RUN_REPORT_FILENAME})")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"Run under cProfile and dump pstats to <output-dir>/{PROFILE_FILENAME}")
+    parser.add_argument('--prune', action='store_true',
+                        help="Skip files whose byte-level score ceiling can't reach the top --target "
+                             "(same selection; the saved features then can't be used with --rerank)")
+    parser.add_argument('--max-file-mb', type=float, default=DEFAULT_MAX_FILE_MB,
+                        help="Score chats larger than this from a message sample (0 turns it off)")
+    parser.add_argument('--max-messages', type=int, default=DEFAULT_MAX_MESSAGES,
+                        help="Score chats with more messages than this from a message sample (0 turns it off)")
+    parser.add_argument('--sample-messages', type=int, default=DEFAULT_SAMPLE_MESSAGES,
+                        help="Messages in the stratified sample of an over-budget chat")
+    parser.add_argument('--file-time-limit', type=float, default=DEFAULT_TIME_LIMIT,
+                        help="Seconds one chat may take before it is logged and skipped (0 turns it off)")
+    parser.add_argument('--parser', choices=('bytes', 'text'), default='bytes',
+                        help="Parse chats as raw bytes, decoding only non-ASCII messages, or decode whole files first")
+    parser.add_argument('--shard', type=parse_shard, default=None, metavar='I/N',
+                        help="Scan only shard I of N and write a partial top --target report (see --merge)")
+    parser.add_argument('--merge', nargs='+', default=None, metavar='PARTIAL_REPORT',
+                        help="Combine the partial reports of all N shards into the final report and batch files")
+    args = parser.parse_args(argv)
+    if args.shard and (args.merge or args.rerank):
+        parser.error("--shard can't be combined with --merge or --rerank")
+    if args.merge and args.rerank:
+        parser.error("--merge can't be combined with --rerank")
+    return args
+
+def run(args):
+    """Run one analysis pipeline; returns the analyzer"""
+    chat_directory = args.chat_dir
+    output_directory = args.output_dir
+    target_conversations = args.target
+    features_path = Path(output_directory) / FEATURES_FILENAME
     
     print("=== WhatsApp Conversation Quality Analyzer ===")
     print(f"Source directory: {chat_directory}")
@@ -335,10 +684,34 @@ def main():
     print()
     
     # Initialize analyzer
-    analyzer = ConversationAnalyzer(chat_directory)
+    budget = FileBudget(int(args.max_file_mb * 1024 * 1024), args.max_messages, args.sample_messages,
+                        args.file_time_limit)
+    analyzer = ConversationAnalyzer(chat_directory, load_scoring_profile(args.scoring_profile), budget=budget,
+                                    parser=args.parser)
     
-    # Scan and analyze all conversations
-    analyzer.scan_all_conversations()
+    if args.shard:
+        return run_shard(analyzer, args)
+    
+    if args.merge:
+        # The shards already scored everything; only the batch files read chats
+        reports = load_partial_reports(args.merge, analyzer.scoring_profile, target_conversations)
+        analyzer.conversations = [
+            dict(conv, file_path=str(Path(chat_directory) / conv['filename']))
+            for conv in merge_partial_reports(reports, target_conversations)
+        ]
+        print(f"Merged {len(reports)} partial reports "
+              f"({sum(report['conversations_ranked'] for report in reports)} quality conversations)")
+    elif args.rerank:
+        # Re-rank the whole corpus from stored features without reading chat files
+        print(f"Re-ranking with scoring profile: {analyzer.scoring_profile.label}")
+        analyzer.load_features(features_path)
+        analyzer.rank_features()
+    else:
+        # Scan and analyze all conversations
+        analyzer.scan_all_conversations(workers=args.scan_workers,
+                                        prune_top_k=target_conversations if args.prune else None)
+        Path(output_directory).mkdir(exist_ok=True)
+        analyzer.save_features(features_path)
     
     if len(analyzer.conversations) < target_conversations:
         print(f"Warning: Only found {len(analyzer.conversations)} quality conversations")
@@ -346,13 +719,72 @@ def main():
         target_conversations = len(analyzer.conversations)
     
     # Save top quality conversations
-    saved_count = analyzer.save_top_conversations(output_directory, target_conversations)
+    saved_count = analyzer.save_top_conversations(output_directory, target_conversations,
+                                                  write_batches=not args.report_only,
+                                                  workers=args.writers)
+    
+    run_report_path = args.run_report or Path(output_directory) / RUN_REPORT_FILENAME
+    run_report = analyzer.metrics.write_report(
+        run_report_path,
+        scoring_profile=analyzer.scoring_profile.label,
+        mode='merge' if args.merge else 'rerank' if args.rerank else 'scan',
+        scan_workers=args.scan_workers,
+        conversations_ranked=len(analyzer.conversations),
+        conversations_saved=saved_count
+    )
     
     print(f"\n=== SUMMARY ===")
     print(f"Total conversations analyzed: {len(analyzer.conversations)}")
     print(f"Top conversations saved: {saved_count}")
     print(f"Output location: {output_directory}")
+    print(f"Run report: {run_report_path} ({run_report['wall_seconds']}s, {run_report['files_per_sec']} files/sec)")
     print(f"Ready for team manual organization!")
+    return analyzer
+
+def run_shard(analyzer, args):
+    """Scan one shard and write its partial top-K report for a later --merge"""
+    output_directory = Path(args.output_dir)
+    analyzer.scan_all_conversations(workers=args.scan_workers, shard=args.shard,
+                                    prune_top_k=args.target if args.prune else None)
+    output_directory.mkdir(exist_ok=True)
+    report_path = partial_report_path(output_directory, args.shard)
+    write_partial_report(report_path, args.shard, analyzer.conversations, args.target,
+                         analyzer.scoring_profile, analyzer.metrics.files,
+                         files_pruned=analyzer.metrics.counters.get('files_pruned', 0))
+    
+    index, count = args.shard
+    run_report_path = args.run_report or output_directory / f"run_report_shard_{index:03d}_of_{count:03d}.json"
+    run_report = analyzer.metrics.write_report(
+        run_report_path,
+        scoring_profile=analyzer.scoring_profile.label,
+        mode='shard',
+        shard=f"{index}/{count}",
+        scan_workers=args.scan_workers,
+        conversations_ranked=len(analyzer.conversations),
+        conversations_saved=min(args.target, len(analyzer.conversations))
+    )
+    
+    print(f"\n=== SHARD {index}/{count} SUMMARY ===")
+    print(f"Quality conversations in shard: {len(analyzer.conversations)}")
+    print(f"Partial report (top {args.target}): {report_path}")
+    print(f"Run report: {run_report_path} ({run_report['wall_seconds']}s, {run_report['files_per_sec']} files/sec)")
+    print(f"Merge all {count} shards with --merge {output_directory / 'partial_report_*.json'}")
+    return analyzer
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        run(args)
+        return
+    
+    # cProfile only sees this process, so combine with --scan-workers 1 to
+    # include feature extraction in the profile
+    profiler = cProfile.Profile()
+    profiler.runcall(run, args)
+    pstats_path = Path(args.output_dir) / PROFILE_FILENAME
+    profiler.dump_stats(pstats_path)
+    print(f"\n=== PROFILE (top {PROFILE_TOP_FUNCTIONS} by cumulative time, full stats in {pstats_path}) ===")
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()